@@ -0,0 +1,51 @@
+# backends — pluggable model servers for embeddings and chat
+#
+#   REFLECTION_EMBEDDING_BACKEND / REFLECTION_CHAT_BACKEND = "lmstudio" (default) | "local"
+#   (REFLECTION_BACKEND sets both at once)
+from __future__ import annotations
+
+from modules.backends.base import ChatBackend, EmbeddingBackend, PredictionFragment
+
+BACKENDS = ("lmstudio", "local")
+
+
+def get_embedding_backend(model_name: str, backend: str | None = None) -> EmbeddingBackend:
+    from modules.vectors.settings import get_settings
+
+    config = get_settings()
+    backend = backend or config.embedding_backend
+    if backend == "lmstudio":
+        from modules.backends.lmstudio_backend import lmstudio_embedding_model
+        return lmstudio_embedding_model(model_name)
+    if backend == "local":
+        from modules.backends.local import HashedEmbeddingModel
+        return HashedEmbeddingModel(dim=config.local_embedding_dim, latency_s=config.local_embedding_latency_s)
+    raise ValueError(f"Unknown embedding backend {backend!r} (expected one of {BACKENDS})")
+
+
+def get_chat_backend(model_name: str, backend: str | None = None) -> ChatBackend:
+    from modules.orchestration.orc_settings import get_settings
+
+    config = get_settings()
+    backend = backend or config.chat_backend
+    if backend == "lmstudio":
+        from modules.backends.lmstudio_backend import lmstudio_llm
+        return lmstudio_llm(model_name)
+    if backend == "local":
+        from modules.backends.local import CannedChatModel
+        return CannedChatModel(
+            response=config.local_chat_response,
+            token_latency_s=config.local_chat_token_latency_s,
+            reasoning=config.local_chat_reasoning,
+        )
+    raise ValueError(f"Unknown chat backend {backend!r} (expected one of {BACKENDS})")
+
+
+__all__ = [
+    "BACKENDS",
+    "ChatBackend",
+    "EmbeddingBackend",
+    "PredictionFragment",
+    "get_chat_backend",
+    "get_embedding_backend",
+]
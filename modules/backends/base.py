@@ -0,0 +1,36 @@
+# backends/base.py — what the app needs from an embedding / chat model server
+from __future__ import annotations
+
+from typing import Any, Callable, List, Optional, Protocol, Sequence, Union, overload
+
+
+class EmbeddingBackend(Protocol):
+    """Shape of `lmstudio.embedding_model(...)`: one string in, one vector out; a list in, a list out."""
+
+    @overload
+    def embed(self, input: str) -> List[float]: ...
+    @overload
+    def embed(self, input: Sequence[str]) -> List[List[float]]: ...
+    def embed(self, input: Union[str, Sequence[str]]) -> Union[List[float], List[List[float]]]: ...
+
+
+class PredictionFragment(Protocol):
+    """A streamed piece of a chat response (matches `lmstudio.LlmPredictionFragment`)."""
+    content: str
+    # "none" | "reasoning" | "reasoningStartTag" | "reasoningEndTag"
+    reasoning_type: str
+
+
+class ChatResult(Protocol):
+    content: str
+
+
+class ChatBackend(Protocol):
+    """Shape of `lmstudio.llm(...)` as used by ModelInterface."""
+
+    def respond(
+        self,
+        history: Any,
+        config: Optional[dict] = None,
+        on_prediction_fragment: Optional[Callable[[PredictionFragment], None]] = None,
+    ) -> ChatResult: ...
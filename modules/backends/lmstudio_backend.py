@@ -0,0 +1,18 @@
+# backends/lmstudio_backend.py — the real thing: models served by LM Studio
+from __future__ import annotations
+
+from modules.backends.base import ChatBackend, EmbeddingBackend
+
+
+def lmstudio_embedding_model(model_name: str) -> EmbeddingBackend:
+    # imported here so the local backend works without the lmstudio SDK installed
+    import lmstudio as lms
+
+    # lazily loads the model in LM Studio if it isn't already resident
+    return lms.embedding_model(model_name)
+
+
+def lmstudio_llm(model_name: str) -> ChatBackend:
+    import lmstudio as lms
+
+    return lms.llm(model_name)
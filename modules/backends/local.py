@@ -0,0 +1,126 @@
+# backends/local.py — deterministic stand-ins for LM Studio (tests, benchmarks, offline use)
+from __future__ import annotations
+
+import hashlib
+import math
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional, Sequence, Union
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_STREAM_TOKEN_RE = re.compile(r"\s*\S+")
+
+DEFAULT_CHAT_RESPONSE = (
+    "This is a canned response from Reflection's local model backend. "
+    "No model server was contacted; set REFLECTION_CHAT_BACKEND=lmstudio to talk to a real model."
+)
+
+
+class HashedEmbeddingModel:
+    """Feature-hashed bag-of-words embeddings: fixed dimension, no model, no server.
+
+    Every lowercased word is hashed (blake2b) to a bucket and a sign, and the summed
+    vector is L2-normalised. The same text always gets the same vector, and notes
+    that share words end up close under cosine distance — good enough to exercise
+    retrieval end to end. `latency_s` adds a fixed delay per request, to stand in
+    for a server round trip in throughput tests.
+    """
+
+    def __init__(self, dim: int = 768, latency_s: float = 0.0):
+        if dim <= 0:
+            raise ValueError("dim must be positive")
+        self.dim = dim
+        self.latency_s = latency_s
+        self.requests = 0
+
+    def _vector(self, text: str) -> List[float]:
+        vec = [0.0] * self.dim
+        words = _WORD_RE.findall(text.lower()) or [text]
+        for word in words:
+            digest = hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dim
+            vec[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vec))
+        if norm == 0.0:
+            # every word cancelled out; any fixed unit vector keeps cosine distance defined
+            vec[0] = 1.0
+            return vec
+        return [v / norm for v in vec]
+
+    def embed(self, input: Union[str, Sequence[str]]) -> Union[List[float], List[List[float]]]:
+        self.requests += 1
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        if isinstance(input, str):
+            return self._vector(input)
+        return [self._vector(t) for t in input]
+
+
+@dataclass
+class LocalFragment:
+    content: str
+    reasoning_type: str = "none"
+    tokens_count: int = 1
+
+
+@dataclass
+class LocalChatResult:
+    content: str
+    reasoning: str = ""
+    tokens: int = 0
+    time_to_first_token_s: Optional[float] = None
+    total_time_s: float = 0.0
+
+
+class CannedChatModel:
+    """Streams a fixed response token by token, `token_latency_s` apart.
+
+    With `reasoning` set, a <think> block is streamed first using the same
+    fragment types LM Studio reports, so the UI's thinking view can be exercised too.
+    """
+
+    def __init__(self, response: str = DEFAULT_CHAT_RESPONSE, token_latency_s: float = 0.02, reasoning: str = ""):
+        self.response = response
+        self.token_latency_s = token_latency_s
+        self.reasoning = reasoning
+
+    def _stream(self):
+        if self.reasoning:
+            yield LocalFragment("<think>", "reasoningStartTag")
+            for tok in _STREAM_TOKEN_RE.findall(self.reasoning):
+                yield LocalFragment(tok, "reasoning")
+            yield LocalFragment("</think>", "reasoningEndTag")
+        for tok in _STREAM_TOKEN_RE.findall(self.response):
+            yield LocalFragment(tok, "none")
+
+    def respond(
+        self,
+        history: Any,
+        config: Optional[dict] = None,
+        on_prediction_fragment: Optional[Callable[[LocalFragment], None]] = None,
+    ) -> LocalChatResult:
+        started = time.perf_counter()
+        first: Optional[float] = None
+        content: List[str] = []
+        reasoning: List[str] = []
+        tokens = 0
+        for fragment in self._stream():
+            if self.token_latency_s:
+                time.sleep(self.token_latency_s)
+            if first is None:
+                first = time.perf_counter() - started
+            tokens += 1
+            if fragment.reasoning_type == "none":
+                content.append(fragment.content)
+            elif fragment.reasoning_type == "reasoning":
+                reasoning.append(fragment.content)
+            if on_prediction_fragment is not None:
+                on_prediction_fragment(fragment)
+        return LocalChatResult(
+            content="".join(content),
+            reasoning="".join(reasoning),
+            tokens=tokens,
+            time_to_first_token_s=first,
+            total_time_s=time.perf_counter() - started,
+        )
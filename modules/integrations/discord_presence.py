@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-from concurrent.futures import thread
 import os
 import threading
 import time
@@ -8,8 +7,6 @@ from typing import Optional
 from dotenv import load_dotenv
 load_dotenv()
 
-from click import Option
-from pypresence import Presence
 
 class DiscordRichPresence:
     def __init__(
@@ -22,7 +19,7 @@ class DiscordRichPresence:
             raise ValueError("Missing discord app ID.")
         
         self.update_interval = update_interval
-        self._rpc: Optional[Presence] = None
+        self._rpc = None
         self._thread: Optional[threading.Thread] = None
         self._running : bool = False
         
@@ -32,6 +29,7 @@ class DiscordRichPresence:
         
         print(f"[Discord RPC] using app ID: {self.client_id}") 
         
+        from pypresence import Presence
         self._rpc = Presence(self.client_id)
         self._rpc.connect()
         print("[Discord RPC] connected") 
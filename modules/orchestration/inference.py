@@ -1,17 +1,19 @@
 from datetime import datetime
 import uuid
 from dotenv import load_dotenv
-import lmstudio as lms
 
+from modules.backends import PredictionFragment, get_chat_backend
 from modules.orchestration.sql.chatLogStore import ChatLogStore, Message
 from modules.orchestration.orc_settings import get_settings
 from modules.vectors.VectorService import VectorService
 load_dotenv()
 
 class ModelInterface:
-    def __init__(self, model: str | None = None, on_fragment = None) -> None:
-        self.model = lms.llm(model or get_settings().default_model)
-        self.vectors = VectorService()
+    def __init__(self, model: str | None = None, on_fragment = None, vectors: VectorService | None = None) -> None:
+        # LM Studio, or the canned local model (REFLECTION_CHAT_BACKEND=local)
+        self.model = get_chat_backend(model or get_settings().default_model)
+        # pass the app's VectorService in to share its store/embedder handles
+        self.vectors = vectors or VectorService()
         self.on_fragment = on_fragment
         
         
@@ -36,7 +38,7 @@ class ModelInterface:
         # Local stream receiver. Forwards both reasoning and answer fragments so the UI
         # can show thinking-in-progress — only the literal <think>/</think> boundary
         # marker fragments are dropped, since their content is just the tag text itself.
-        def _on_fragment_recieved(fragment: lms.LlmPredictionFragment):
+        def _on_fragment_recieved(fragment: PredictionFragment):
             if not fragment or fragment.reasoning_type in ("reasoningStartTag", "reasoningEndTag"):
                 return
             if self.on_fragment is not None:
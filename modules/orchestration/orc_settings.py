@@ -9,6 +9,8 @@ from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict
 
+from modules.backends.local import DEFAULT_CHAT_RESPONSE
+
 APP_NAME = "reflection_etl"  # keep this consistent across the whole app
 
 
@@ -50,6 +52,11 @@ class OrchestrationSettings:
 
     default_model: str
     request_timeout_s: float
+
+    chat_backend: str
+    local_chat_token_latency_s: float
+    local_chat_response: str
+    local_chat_reasoning: str
     
     messages_table_name: str
     threads_table_name: str
@@ -89,6 +96,12 @@ def get_settings() -> OrchestrationSettings:
 
     default_model = str(cfg("DEFAULT_MODEL", "qwen3-4b"))
     request_timeout_s = float(cfg("REQUEST_TIMEOUT_S", 30.0))
+
+    # "lmstudio" or "local" (canned token stream, no model server)
+    chat_backend = str(cfg("CHAT_BACKEND", cfg("BACKEND", "lmstudio"))).strip().lower()
+    local_chat_token_latency_s = float(cfg("LOCAL_CHAT_TOKEN_LATENCY_S", 0.02))
+    local_chat_response = str(cfg("LOCAL_CHAT_RESPONSE", DEFAULT_CHAT_RESPONSE))
+    local_chat_reasoning = str(cfg("LOCAL_CHAT_REASONING", ""))
     
     messages_table_name = str(cfg("MSG_TABLE_NAME", "messages"))
     threads_table_name = str(cfg("THREADS_TABLE_NAME", "threads"))
@@ -99,6 +112,10 @@ def get_settings() -> OrchestrationSettings:
         chat_db_path=chat_db_path,
         default_model=default_model,
         request_timeout_s=request_timeout_s,
+        chat_backend=chat_backend,
+        local_chat_token_latency_s=local_chat_token_latency_s,
+        local_chat_response=local_chat_response,
+        local_chat_reasoning=local_chat_reasoning,
         messages_table_name=messages_table_name,
         threads_table_name=threads_table_name
     )
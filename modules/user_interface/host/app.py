@@ -2,7 +2,6 @@
 from __future__ import annotations
 
 import os
-from dataclasses import asdict
 from pathlib import Path
 import json
 
@@ -11,10 +10,16 @@ import webview
 from modules.orchestration.inference import ModelInterface
 from modules.orchestration.sql.chatLogStore import ChatLogStore
 from modules.vectors.VectorService import VectorService
+from modules.vectors.settings import get_settings as get_vector_settings
+from modules.vectors.watcher import VaultWatcher
+from modules.vectors.jobs import IngestJobManager
+from . import startup_profile
 from .window_ref import get_main_window, set_main_window
 
 _vector_service: VectorService | None = None
 _model_interface: ModelInterface | None = None
+_vault_watcher: VaultWatcher | None = None
+_ingest_jobs: IngestJobManager | None = None
 
 def get_vector_service() -> VectorService:
     global _vector_service
@@ -28,120 +33,227 @@ def get_model_interface() -> ModelInterface:
         _model_interface = ModelInterface(
             on_fragment=lambda data: get_main_window().evaluate_js(
                 f"window._onChatFragment({json.dumps(data)})"
-            )
+            ),
+            vectors=get_vector_service(),
         )
     return _model_interface
 
+def get_ingest_jobs() -> IngestJobManager:
+    global _ingest_jobs
+    if _ingest_jobs is None:
+        # same evaluate_js channel the chat fragments use
+        _ingest_jobs = IngestJobManager(
+            get_vector_service(),
+            on_event=lambda data: get_main_window().evaluate_js(
+                f"window._onIngestProgress && window._onIngestProgress({json.dumps(data)})"
+            ),
+        )
+    return _ingest_jobs
+
+def start_vault_watcher() -> VaultWatcher | None:
+    """Start watching REFLECTION_VAULT_PATH, if one is configured. Safe to call repeatedly."""
+    global _vault_watcher
+    if _vault_watcher is None and get_vector_settings().vault_path is not None:
+        try:
+            watcher = VaultWatcher(get_vector_service())
+            watcher.start()
+            _vault_watcher = watcher
+            print(f"[watcher] watching {watcher.root} ({watcher.backend_name})")
+        except Exception as e:
+            print(f"[watcher] disabled: {e}")
+    return _vault_watcher
+
+def warm_up() -> None:
+    """Runs on pywebview's start thread once the window is up.
+
+    Nothing heavy is imported before the window shows; this opens Chroma and loads
+    the parser/tokenizer in the background so the first query or ingest doesn't
+    pay for them, then starts the vault watcher.
+    """
+    startup_profile.mark("gui loop started")
+    try:
+        get_vector_service().warm_up()
+    except Exception as e:
+        print(f"[startup] warm-up failed: {e}")
+    startup_profile.mark("vector service warm")
+    start_vault_watcher()
+    startup_profile.report()
+
+def stop_vault_watcher() -> None:
+    global _vault_watcher
+    if _vault_watcher is not None:
+        _vault_watcher.stop()
+        _vault_watcher = None
+
 class JsApi:
     def __init__(self) -> None:
         pass
     
     # --- Ingestion ---------------------------------------------------
     
-    def select_and_ingest_markdown_files(self) -> dict:
-        """A method to open an Open dialog window with multi-select. This will allow the web interface to "select" the files. In reality PyWebview will select.
-        
+    def ingest_file(self, path: str) -> dict:
+        """Ingest one note in the background. JS: window.pywebview.api.ingest_file(path)
+
         Returns:
-            dict: IngestSummary
+            dict: {"job_id": str} — progress arrives through window._onIngestProgress
         """
-        window = get_main_window()
-        
-        if window is None:
-            return {
-                "files_processed": 0,
-                "total_chunks": 0,
-                "errors": ["No window attached to JsAPI."]
-            }
-            
-        # open the OS file dialog
-        file_types = (
-            "Markdown files (*.md;*.markdown)",
-            "All files (*.*)",
-        )
-        selected_paths = window.create_file_dialog(
-            webview.OPEN_DIALOG,
-            allow_multiple=True,
-            file_types=file_types,
-        )
-        #user cancels
-        if not selected_paths:
-            return {
-                "files_processed": 0,
-                "total_chunks": 0,
-                "errors": ["No files selected."]
-            }
-            
-        #begin to ingest each to VectorService
-        summaries = []
+        return self.start_ingest_files_job([path] if path else [])
+
+    def ingest_directory(self, path: str) -> dict:
+        """Ingest a folder in the background. JS: window.pywebview.api.ingest_directory(path)
+
+        Returns:
+            dict: {"job_id": str} — progress arrives through window._onIngestProgress
+        """
+        return self.start_ingest_job(path)
+
+    def ingest_handles(self) -> dict:
+        """JS: window.pywebview.api.ingest_handles() — lifetimes of the warm ingest handles."""
+        vectors = get_vector_service()
+        return vectors.ingest_context.lifetimes()
+
+    def embedding_stats(self) -> dict:
+        """JS: window.pywebview.api.embedding_stats() — chosen batch sizes, latency, embeddings/s."""
         vectors = get_vector_service()
-        for path in selected_paths:
-            summary = vectors.ingest_file(path)
-            summaries.append(summary)
-            
-        #combine summaries later
-        files_processed = sum(s.files_processed for s in summaries)
-        total_chunks = sum(s.total_chunks for s in summaries)
-        errors = [err for s in summaries for err in s.errors]
+        return {"stats": vectors.embedding_stats()}
 
+    def query_cache_stats(self) -> dict:
+        """JS: window.pywebview.api.query_cache_stats() — hit rate of the query-vector cache."""
+        vectors = get_vector_service()
+        return {"stats": vectors.query_cache_stats()}
+
+    def ingest_metrics(self, since: float | None = None) -> dict:
+        """JS: window.pywebview.api.ingest_metrics() — per-stage time histograms of past ingests.
+
+        `metrics` is null unless REFLECTION_METRICS_ENABLED is set.
+        """
+        vectors = get_vector_service()
+        return {"metrics": vectors.ingest_metrics(since=since)}
+
+    def watcher_status(self) -> dict:
+        """JS: window.pywebview.api.watcher_status()"""
+        watcher = _vault_watcher
+        if watcher is None:
+            return {"running": False}
         return {
-            "files_processed": files_processed,
-            "total_chunks": total_chunks,
-            "errors": errors,
+            "running": watcher.running,
+            "backend": watcher.backend_name,
+            "vault_path": str(watcher.root),
+            "pending": watcher.pending_count(),
         }
-        
-    def select_and_ingest_markdown_folder(self) -> dict:
+
+    def vacuum_index(self) -> dict:
+        """JS: window.pywebview.api.vacuum_index()"""
+        vectors = get_vector_service()
+        return {"removed": vectors.vacuum()}
+
+    # --- Background ingestion jobs ------------------------------------
+    # Progress is pushed to window._onIngestProgress(job) while the job runs.
+
+    def start_ingest_job(self, path: str, force: bool = False) -> dict:
+        """Ingest a folder in the background. JS: window.pywebview.api.start_ingest_job(path)
+
+        Returns:
+            dict: {"job_id": str}
         """
-        Open a folder picker, ingest all .md/.markdown files inside it.
+        if not path:
+            return {"error": "No path provided."}
+        return {"job_id": get_ingest_jobs().start_directory(path, force=force)}
+
+    def retry_failed_ingest_job(self, path: str) -> dict:
+        """Re-ingest only the notes under `path` that failed last time, in the background.
+        JS: window.pywebview.api.retry_failed_ingest_job(path)
         """
+        if not path:
+            return {"error": "No path provided."}
+        return {"job_id": get_ingest_jobs().start_directory(path, retry_errors=True)}
+
+    def failed_ingest_paths(self, path: str | None = None) -> dict:
+        """Notes whose last ingest attempt failed. JS: window.pywebview.api.failed_ingest_paths(path)"""
+        vectors = get_vector_service()
+        return {"paths": vectors.manifest.failed_paths(path)}
+
+    def start_ingest_files_job(self, paths: list[str]) -> dict:
+        """Ingest specific notes in the background. JS: window.pywebview.api.start_ingest_files_job(paths)"""
+        if not paths:
+            return {"error": "No files provided."}
+        return {"job_id": get_ingest_jobs().start_files(paths)}
+
+    def select_and_start_ingest_folder(self) -> dict:
+        """Folder picker, then a background ingest job for it."""
         window = get_main_window()
         if window is None:
-            return {
-                "files_processed": 0,
-                "total_chunks": 0,
-                "errors": ["No window attached to JsApi"],
-            }
-
+            return {"error": "No window attached to JsApi"}
         folder = window.create_file_dialog(webview.FOLDER_DIALOG)
         if not folder:
-            return {
-                "files_processed": 0,
-                "total_chunks": 0,
-                "errors": ["No folder selected"],
-            }
+            return {"error": "No folder selected"}
+        return self.start_ingest_job(folder[0])
 
-        folder_path = folder[0]  # pywebview returns a list
-        vectors = get_vector_service()
-        summary = vectors.ingest_directory(folder_path)
-        return asdict(summary)
+    def select_and_start_ingest_files(self) -> dict:
+        """Multi-select file picker, then a background ingest job for the selection."""
+        window = get_main_window()
+        if window is None:
+            return {"error": "No window attached to JsApi"}
+        selected_paths = window.create_file_dialog(
+            webview.OPEN_DIALOG,
+            allow_multiple=True,
+            file_types=("Markdown files (*.md;*.markdown)", "All files (*.*)"),
+        )
+        if not selected_paths:
+            return {"error": "No files selected."}
+        return self.start_ingest_files_job(list(selected_paths))
 
-    def ingest_file(self, path: str) -> dict:
-        """JS: window.pywebview.api.ingest_file(path)"""
-        vectors = get_vector_service()
-        summary = vectors.ingest_file(path)
-        # IngestSummary is a dataclass, so asdict() makes it JSON-serializable
-        return asdict(summary)
+    def get_ingest_job(self, job_id: str) -> dict:
+        """JS: window.pywebview.api.get_ingest_job(job_id)"""
+        status = get_ingest_jobs().status(job_id)
+        if status is None:
+            return {"error": f"Unknown job: {job_id}"}
+        return status
 
-    def ingest_directory(self, path: str) -> dict:
-        """JS: window.pywebview.api.ingest_directory(path)"""
-        vectors = get_vector_service()
-        summary = vectors.ingest_directory(path)
-        return asdict(summary)
+    def list_ingest_jobs(self) -> dict:
+        """JS: window.pywebview.api.list_ingest_jobs()"""
+        return {"jobs": get_ingest_jobs().list()}
+
+    def cancel_ingest_job(self, job_id: str) -> dict:
+        """JS: window.pywebview.api.cancel_ingest_job(job_id)"""
+        return {"success": get_ingest_jobs().cancel(job_id)}
 
     # --- Query -------------------------------------------------------
 
-    def query(self, text: str, nResults: int = 5) -> dict:
-        """JS: window.pywebview.api.query(text, nResults)"""
+    def query(self, text: str, nResults: int = 5, mode: str | None = None, expandLinks: bool = False) -> dict:
+        """JS: window.pywebview.api.query(text, nResults, mode, expandLinks) — mode: "vector" | "hybrid" | "lexical"."""
+        vectors = get_vector_service()
+        result = vectors.query(query_text=text, n_results=nResults, mode=mode, expand_links=expandLinks)
+        return self._query_result(result)
+
+    def query_many(
+        self, texts: list, nResults: int = 5, mode: str | None = None, expandLinks: bool = False
+    ) -> dict:
+        """JS: window.pywebview.api.query_many(texts, nResults, mode, expandLinks) — one result per text, in order."""
+        vectors = get_vector_service()
+        results = vectors.query_many(
+            query_texts=list(texts), n_results=nResults, mode=mode, expand_links=expandLinks
+        )
+        return {"results": [self._query_result(r) for r in results]}
+
+    def note_links(self, path: str) -> dict:
+        """JS: window.pywebview.api.note_links(path) — notes it links to, and notes linking to it."""
         vectors = get_vector_service()
-        result = vectors.query(query_text=text, n_results=nResults)
+        return vectors.note_links(path)
+
+    @staticmethod
+    def _query_result(result) -> dict:
         # QueryResult has nested QueryResultChunk dataclasses :contentReference[oaicite:4]{index=4}
         return {
             "query": result.query,
+            "mode": result.mode,
             "results": [
                 {
                     "document": r.document,
                     "text": r.text,
                     "score": r.score,
                     "metadata": r.metadata,
+                    "linked_from": r.linked_from,
                 }
                 for r in result.results
             ],
@@ -287,6 +399,7 @@ def _get_web_url() -> str:
 
 
 def main():
+    startup_profile.mark("app imported")
     api = JsApi()
     web_url = _get_web_url()
 
@@ -299,8 +412,16 @@ def main():
     )
     set_main_window(window)
     #api.window = window
-
-    webview.start(debug=True)
+    startup_profile.mark("window created")
+    events = getattr(window, "events", None)
+    if events is not None and hasattr(events, "shown"):
+        events.shown += lambda: startup_profile.mark("window shown")
+
+    try:
+        # the VectorService, its warm handles and the watcher all come up after the window
+        webview.start(warm_up, debug=True)
+    finally:
+        stop_vault_watcher()
 
 
 if __name__ == "__main__":
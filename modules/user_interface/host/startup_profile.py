@@ -0,0 +1,114 @@
+# modules/ui/host/startup_profile.py — REFLECTION_PROFILE_STARTUP=1: where does start-up time go?
+#
+# `start()` has to run before the app's own imports (reflection_app.py does that).
+# From then on every import that actually loads a module is timed — self time and
+# cumulative time including its own imports, like `python -X importtime` — and
+# `mark()` records milestones such as "window created" / "window shown". `report()`
+# prints both once the window is up.
+from __future__ import annotations
+
+import builtins
+import importlib.util
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+class ImportProfiler:
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        # module -> [self seconds, cumulative seconds]
+        self.imports: Dict[str, List[float]] = {}
+        self.marks: List[Tuple[str, float]] = []
+        self._orig_import = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def install(self) -> None:
+        if self._orig_import is None:
+            self._orig_import = builtins.__import__
+            builtins.__import__ = self._import
+
+    def uninstall(self) -> None:
+        if self._orig_import is not None:
+            builtins.__import__ = self._orig_import
+            self._orig_import = None
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        # per thread: time spent in imports nested inside each import still running
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+
+        loaded_before = len(sys.modules)
+        started = time.perf_counter()
+        stack.append(0.0)
+        try:
+            return self._orig_import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - started
+            nested = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            # an import of something already in sys.modules is a dict lookup; skip it
+            if len(sys.modules) != loaded_before:
+                self._record(self._resolve(name, globals, level), elapsed - nested, elapsed)
+
+    @staticmethod
+    def _resolve(name: str, globals, level: int) -> str:
+        if level == 0:
+            return name
+        try:
+            return importlib.util.resolve_name("." * level + name, (globals or {}).get("__package__"))
+        except (ImportError, ValueError):
+            return name
+
+    def _record(self, module: str, self_s: float, cumulative_s: float) -> None:
+        with self._lock:
+            entry = self.imports.setdefault(module, [0.0, 0.0])
+            entry[0] += self_s
+            entry[1] += cumulative_s
+
+    def mark(self, label: str) -> None:
+        with self._lock:
+            self.marks.append((label, time.perf_counter() - self.started))
+
+    def report(self, top: int = 25) -> str:
+        with self._lock:
+            marks = list(self.marks)
+            imports = sorted(self.imports.items(), key=lambda kv: kv[1][1], reverse=True)[:top]
+        lines = ["[startup] milestones (s since profiling started):"]
+        lines += [f"[startup]   {t:8.3f}  {label}" for label, t in marks]
+        lines.append(f"[startup] slowest imports (top {top} by cumulative time):")
+        lines.append(f"[startup]   {'self ms':>9} {'cumul ms':>9}  module")
+        lines += [f"[startup]   {s * 1000:9.1f} {c * 1000:9.1f}  {name}" for name, (s, c) in imports]
+        return "\n".join(lines)
+
+
+_profiler: Optional[ImportProfiler] = None
+
+
+def start() -> ImportProfiler:
+    """Begin timing imports (idempotent)."""
+    global _profiler
+    if _profiler is None:
+        _profiler = ImportProfiler()
+        _profiler.install()
+    return _profiler
+
+
+def mark(label: str) -> None:
+    """Record a start-up milestone; a no-op unless profiling was started."""
+    if _profiler is not None:
+        _profiler.mark(label)
+
+
+def report(top: int = 25) -> None:
+    """Print milestones and the slowest imports, then stop profiling."""
+    global _profiler
+    if _profiler is None:
+        return
+    _profiler.uninstall()
+    print(_profiler.report(top=top))
+    _profiler = None
@@ -1,7 +1,7 @@
-import { useRef, useState } from "react";
+import { useEffect, useRef, useState } from "react";
 import type {Screen} from "../types/nav_types"
 import { getPywebviewApi } from "../pywebviewApi";
-import type { IngestSummary } from "../types/data_types";
+import type { IngestJob, IngestSummary, StartJobResult } from "../types/data_types";
 import { Header } from "../components/Header";
 import "./styles/main.css";
 
@@ -14,30 +14,95 @@ const DataViewerScreen = ({ onNavigate }: DvScreenProps) => {
     const [ingestResult, setIngestResult] = useState<IngestSummary | null>(null);
     const [error, setError] = useState<string | null>(null);
     const [loading, setLoading] = useState<boolean>(false);
+    const [job, setJob] = useState<IngestJob | null>(null);
+    const jobIdRef = useRef<string | null>(null);
+    // events for jobs whose id isn't known yet: a small job can finish before start() resolves
+    const earlyEventsRef = useRef<Map<string, IngestJob>>(new Map());
+
+    const isFinished = (update: IngestJob) => ["completed", "cancelled", "failed"].includes(update.status);
+
+    function applyJob(update: IngestJob) {
+        setJob(update);
+        if (isFinished(update)) {
+            setLoading(false);
+            setIngestResult(update.summary);
+            if (update.error) setError(update.error);
+        }
+    }
+
+    useEffect(() => {
+        // host/app.py pushes every job state change and (throttled) progress tick here
+        (window as any)._onIngestProgress = (update: IngestJob) => {
+            if (update.job_id !== jobIdRef.current) {
+                earlyEventsRef.current.set(update.job_id, update);
+                return;
+            }
+            applyJob(update);
+        };
+        return () => {
+            delete (window as any)._onIngestProgress;
+        };
+    }, []);
 
     function handleClickSelectFile() {
         fileInputRef.current?.click();
     }
 
-    async function handleIngestFiles(){
+    async function startJob(start: () => Promise<StartJobResult> | undefined) {
         const api = getPywebviewApi();
         if (!api) {
             setError("API not available. Try restarting");
+            return;
         }
 
-        setLoading(true);
         setError(null);
+        setIngestResult(null);
+        setJob(null);
         try{
-            const summary = await api?.select_and_ingest_markdown_files();
-            setIngestResult(summary || null);
+            const res = await start();
+            if (!res || res.error || !res.job_id) {
+                setError(res?.error || "Ingestion could not be started");
+                return;
+            }
+            jobIdRef.current = res.job_id;
+            setLoading(true);
+            const early = earlyEventsRef.current.get(res.job_id);
+            earlyEventsRef.current.clear();
+            if (early) applyJob(early);
+            // the terminal event may have been pushed before any of the above; ask for the state.
+            // Only a finished state is applied: a running one may be older than pushed events.
+            const current = await api.get_ingest_job(res.job_id);
+            if (jobIdRef.current === res.job_id && current?.job_id === res.job_id && isFinished(current)) {
+                applyJob(current);
+            }
         } catch (e: any){
             console.error("Error ingesting files:", e);
             setError(e.message || "Unknown error during ingestion");
-        } finally {
-            setLoading(false);
         }
     }
 
+    function handleIngestFiles() {
+        startJob(() => getPywebviewApi()?.select_and_start_ingest_files());
+    }
+
+    function handleIngestFolder() {
+        startJob(() => getPywebviewApi()?.select_and_start_ingest_folder());
+    }
+
+    function handleRetryFailed() {
+        const folder = job?.kind === "directory" ? job.targets[0] : null;
+        if (!folder) return;
+        startJob(() => getPywebviewApi()?.retry_failed_ingest_job(folder));
+    }
+
+    async function handleCancel() {
+        const jobId = jobIdRef.current;
+        if (!jobId) return;
+        await getPywebviewApi()?.cancel_ingest_job(jobId);
+    }
+
+    const progress = job?.progress;
+
     function handleFileChange(e: React.ChangeEvent<HTMLInputElement>){
         const files = e.target.files;
         if (!files || files.length === 0) return;
@@ -60,14 +125,32 @@ const DataViewerScreen = ({ onNavigate }: DvScreenProps) => {
             <Header title="Data Viewer" onNavigate={onNavigate} />
             <div className="screen-content">
                 <div className="ingest-block">
-                    {loading ? (<p>Ingesting files, please wait...</p>) : (<h2>Ingest Markdown Files</h2>)}
-                    <button type="button" onClick={handleIngestFiles}>Select Files</button>
+                    {loading ? (<p>Ingesting files ({job?.status ?? "queued"})...</p>) : (<h2>Ingest Markdown Files</h2>)}
+                    <div>
+                        <button type="button" onClick={handleIngestFiles} disabled={loading}>Select Files</button>
+                        <button type="button" onClick={handleIngestFolder} disabled={loading}>Select Folder</button>
+                        {loading && <button type="button" onClick={handleCancel}>Cancel</button>}
+                    </div>
+                    {loading && progress && (
+                        <div>
+                            <progress value={progress.files_done} max={Math.max(progress.files_total, 1)} />
+                            <p>
+                                {progress.files_done} / {progress.files_total} files
+                                {" · "}{progress.files_per_s.toFixed(1)} files/s
+                                {" · "}{progress.chunks_per_s.toFixed(1)} chunks/s
+                                {progress.eta_s != null && <>{" · "}ETA {Math.ceil(progress.eta_s)}s</>}
+                                {progress.errors > 0 && <>{" · "}{progress.errors} errors</>}
+                            </p>
+                        </div>
+                    )}
                     {error && <p className="error-message">Error: {error}</p>}
                     {ingestResult && (
                         <div style={{ marginTop: "1rem" }}>
                             <h3>Ingest summary</h3>
                             <p>Files processed: {ingestResult.files_processed}</p>
                             <p>Total chunks: {ingestResult.total_chunks}</p>
+                            {!!ingestResult.resumed && <p>Resumed: {ingestResult.resumed} files already done by the interrupted run</p>}
+                            {!!ingestResult.embeddings_reused && <p>Embeddings reused: {ingestResult.embeddings_reused}</p>}
                             {ingestResult.errors.length > 0 && (
                             <>
                                 <h4>Errors</h4>
@@ -76,6 +159,9 @@ const DataViewerScreen = ({ onNavigate }: DvScreenProps) => {
                                     <li key={i}>{err}</li>
                                 ))}
                                 </ul>
+                                {job?.kind === "directory" && (
+                                    <button type="button" onClick={handleRetryFailed}>Retry Failed</button>
+                                )}
                             </>
                             )}
                         </div>
@@ -4,6 +4,56 @@ export interface IngestSummary {
   files_processed: number;
   total_chunks: number;
   errors: string[];
+  added?: number;
+  updated?: number;
+  unchanged?: number;
+  deleted?: number;
+  embedding_requests?: number;
+  resumed?: number;
+  embeddings_reused?: number;
+  // stage ("scan" | "read" | "parse" | "chunk" | "embed" | "upsert" | "total") -> counters
+  stages?: Record<string, StageStats>;
+}
+
+export interface StageStats {
+  seconds: number;
+  items: number;
+  bytes: number;
+  tokens: number;
+}
+
+export interface IngestProgress {
+  files_total: number;
+  files_done: number;
+  chunks_done: number;
+  errors: number;
+  elapsed_s: number;
+  files_per_s: number;
+  chunks_per_s: number;
+  eta_s: number | null;
+  last_error: string | null;
+}
+
+export type IngestJobStatus = "queued" | "running" | "cancelling" | "completed" | "cancelled" | "failed";
+
+// pushed to window._onIngestProgress while a job runs, and returned by get_ingest_job
+export interface IngestJob {
+  job_id: string;
+  kind: "directory" | "files";
+  targets: string[];
+  retry_errors: boolean;
+  status: IngestJobStatus;
+  created_at: number;
+  started_at: number | null;
+  finished_at: number | null;
+  progress: IngestProgress | null;
+  summary: IngestSummary | null;
+  error: string | null;
+}
+
+export interface StartJobResult {
+  job_id?: string;
+  error?: string;
 }
 
 export interface QueryResultChunk {
@@ -11,10 +61,16 @@ export interface QueryResultChunk {
   text: string;
   score: number;
   metadata: Record<string, any>;
+  // set on chunks added by link expansion: path of the hit's note they're linked with
+  linked_from?: string | null;
 }
 
+export type QueryMode = "vector" | "hybrid" | "lexical";
+
 export interface QueryResult {
   query: string;
+  // what `score` means: cosine distance / BM25 (lower is better), or fused RRF (higher is better)
+  mode?: QueryMode;
   results: QueryResultChunk[];
 }
 
@@ -35,12 +91,19 @@ export interface GetChatsResult {
 
 // pywebview API surface that JS expects
 export interface PywebviewApi {
-  ingest_file(path: string): Promise<IngestSummary>;
-  ingest_directory(path: string): Promise<IngestSummary>;
+  // both run as background jobs, like start_ingest_files_job / start_ingest_job
+  ingest_file(path: string): Promise<StartJobResult>;
+  ingest_directory(path: string): Promise<StartJobResult>;
   query(text: string, nResults?: number): Promise<QueryResult>;
 
-  select_and_ingest_markdown_files(): Promise<IngestSummary>;
-  select_and_ingest_markdown_folder(): Promise<IngestSummary>;
+  start_ingest_job(path: string, force?: boolean): Promise<StartJobResult>;
+  start_ingest_files_job(paths: string[]): Promise<StartJobResult>;
+  retry_failed_ingest_job(path: string): Promise<StartJobResult>;
+  failed_ingest_paths(path?: string | null): Promise<{ paths: string[] }>;
+  select_and_start_ingest_folder(): Promise<StartJobResult>;
+  select_and_start_ingest_files(): Promise<StartJobResult>;
+  get_ingest_job(job_id: string): Promise<IngestJob>;
+  cancel_ingest_job(job_id: string): Promise<{ success: boolean }>;
 
   send_chat(prompt: string): Promise<ChatResponse>;
   get_chats(t_from?: string | null, t_to?: string | null): Promise<GetChatsResult>;
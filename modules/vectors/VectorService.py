@@ -1,18 +1,56 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import threading
+import time
+from dataclasses import dataclass, field, fields
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import Callable, List, Dict, Any, Optional, Tuple
 
 from modules.vectors.settings import get_settings
-from modules.vectors.index.chroma_store import ChromaVectorStore
+from modules.vectors.index.chroma_store import open_vector_store
+from modules.vectors.index.manifest import FileManifest, ManifestEntry, file_digest
 from modules.vectors.main_pipeline import pipeline, InvalidMarkdownFileError
+from modules.vectors.ingest_engine import IngestionEngine, FileResult
+from modules.vectors.ingest_context import IngestionContext
+from modules.vectors.metrics import IngestMetrics, MetricsStore, merge_stages
+from modules.vectors.components.chunker import _count_tokens
+from modules.vectors.components.cache.query_cache import QueryResultCache, QueryVectorCache, normalize_query
+from modules.vectors.components.e_model import EmbeddingModel
+from modules.vectors.utils.file_utils import IgnoreRules, ScannedNote, batched, scan_notes
 
 @dataclass
 class IngestSummary:
     files_processed: int
     total_chunks: int
     errors: List[str]
+    # incremental directory ingest breakdown (see FileManifest)
+    added: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    deleted: int = 0
+    # requests sent to the embedding server (chunks are pooled across files)
+    embedding_requests: int = 0
+    # files skipped because an interrupted earlier run had already committed them
+    resumed: int = 0
+    # chunks whose text was already stored, so their embedding was kept instead of recomputed
+    embeddings_reused: int = 0
+    # stage -> {seconds, items, bytes, tokens}; see modules.vectors.metrics.STAGES
+    stages: Dict[str, Dict[str, float]] = field(default_factory=dict)
+
+@dataclass
+class IngestProgress:
+    """Live progress of one ingest run, reported once per finished file."""
+    files_total: int
+    files_done: int = 0
+    chunks_done: int = 0
+    errors: int = 0
+    elapsed_s: float = 0.0
+    files_per_s: float = 0.0
+    chunks_per_s: float = 0.0
+    eta_s: Optional[float] = None
+    last_error: Optional[str] = None
+
+ProgressCallback = Callable[[IngestProgress], None]
 
 @dataclass
 class QueryResultChunk:
@@ -20,39 +58,147 @@ class QueryResultChunk:
     text: str
     score: float
     metadata: Dict[str, Any]
+    # set on chunks added by link expansion: the path of the hit's note they're linked with
+    linked_from: Optional[str] = None
 
 @dataclass
 class QueryResult:
     query: str
     results: List[QueryResultChunk]
+    # "vector" | "lexical" | "hybrid" — decides what QueryResultChunk.score means
+    mode: str = "vector"
+
+QUERY_MODES = ("vector", "hybrid", "lexical")
+
+# (chunk id, text, metadata, score) in rank order
+_Ranked = Tuple[str, str, Dict[str, Any], float]
+
+
+def _ranked(res: Optional[Dict[str, Any]], i: int) -> List[_Ranked]:
+    """Row `i` of a Chroma-shaped result as (id, text, metadata, score) tuples."""
+    if not res:
+        return []
+    return list(zip(res["ids"][i], res["documents"][i], res["metadatas"][i], res["distances"][i]))
+
+
+def _rrf_fuse(rankings: List[List[_Ranked]], k: int = 60) -> List[_Ranked]:
+    """Reciprocal rank fusion: score(d) = sum over rankings of 1 / (k + rank of d).
+
+    Only ranks are used, so BM25 scores and cosine distances never need to be put on
+    one scale; a chunk near the top of both lists beats one that tops only one.
+    """
+    scores: Dict[str, float] = {}
+    rows: Dict[str, _Ranked] = {}
+    for ranking in rankings:
+        for rank, row in enumerate(ranking, start=1):
+            scores[row[0]] = scores.get(row[0], 0.0) + 1.0 / (k + rank)
+            rows.setdefault(row[0], row)
+    order = sorted(scores, key=scores.get, reverse=True)
+    return [(cid, rows[cid][1], rows[cid][2], scores[cid]) for cid in order]
+
+
+def _merge_summaries(a: IngestSummary, b: IngestSummary) -> IngestSummary:
+    """Field-wise sum (counts add up, error lists concatenate, stage counters add up)."""
+    merged = {f.name: getattr(a, f.name) + getattr(b, f.name) for f in fields(IngestSummary) if f.name != "stages"}
+    return IngestSummary(**merged, stages=merge_stages(a.stages, b.stages))
+
+
+class _ProgressTracker:
+    """Turns the engine's per-file callbacks (from two threads) into IngestProgress snapshots."""
+
+    def __init__(self, files_total: int, callback: ProgressCallback):
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._progress = IngestProgress(files_total=files_total)
+        self._callback = callback
+
+    def update(self, res: FileResult) -> None:
+        with self._lock:
+            p = self._progress
+            p.files_done += 1
+            if res.error is not None:
+                p.errors += 1
+                p.last_error = res.error
+            else:
+                p.chunks_done += res.chunk_count
+            p.elapsed_s = time.monotonic() - self._started
+            if p.elapsed_s > 0:
+                p.files_per_s = p.files_done / p.elapsed_s
+                p.chunks_per_s = p.chunks_done / p.elapsed_s
+            p.eta_s = (p.files_total - p.files_done) / p.files_per_s if p.files_per_s else None
+            snapshot = IngestProgress(**{f.name: getattr(p, f.name) for f in fields(IngestProgress)})
+        self._callback(snapshot)
 
 
 class VectorService:
 
     def __init__(self) -> None:
         self.settings = get_settings()
-        self.store = ChromaVectorStore()
+        self.store = open_vector_store()
+        self.manifest = FileManifest()
+        # warm parser/embedder handles shared by every ingest entry point
+        self.ingest_context = IngestionContext(store=self.store)
+        # one writer at a time: the watcher and background jobs share the store, manifest
+        # and embedder, and two overlapping runs could interleave a note's generations
+        self._ingest_lock = threading.RLock()
+        # history of per-stage ingest timings, only kept when REFLECTION_METRICS_ENABLED
+        self.metrics = MetricsStore() if self.settings.metrics_enabled else None
+        # one long-lived query embedder (created on the first query) and its vector memo
+        self._query_embedder: Optional[EmbeddingModel] = None
+        self._query_embedder_lock = threading.Lock()
+        self.query_cache = QueryVectorCache(self.settings.query_cache_max_entries)
+        # finished QueryResults, valid until the store's version moves on
+        self.result_cache = QueryResultCache(self.settings.query_result_cache_max_entries)
+
+    def warm_up(self) -> None:
+        """Load the parser (mistune) and tokenizer (tiktoken) now instead of on the first ingest,
+        and fill the full-text index and link graph if the collection predates them.
+
+        Meant for a background thread once the UI is up. The embedder stays lazy:
+        creating it talks to the model server, which may not be running yet.
+        """
+        self.ingest_context.parser
+        _count_tokens("warm up")
+        # keyword index / link graph that predate the collection, or missed a write, are rebuilt;
+        # under the ingest lock so a job or watcher sync can't write them mid-rebuild
+        with self._ingest_lock:
+            self._rebuild_stale_indexes()
+
+    def _rebuild_stale_indexes(self) -> None:
+        rebuilt = self.store.rebuild_stale_indexes()
+        if "fts" in rebuilt:
+            print(f"Rebuilt the full-text index: {rebuilt['fts']} chunks")
+        if "links" in rebuilt:
+            print(f"Rebuilt the link graph: {rebuilt['links']} notes")
 
     # ------------------------------------------------------------------
     # Public API: ingestion
     # ------------------------------------------------------------------
 
     def ingest_file(self, file_path: str | Path) -> IngestSummary:
-        path = Path(file_path).expanduser().resolve()
+        with self._ingest_lock:
+            started = time.perf_counter()
+            summary = self._ingest_file(Path(file_path).expanduser().resolve())
+            return self._finish_summary("file", summary, started)
 
+    def _ingest_file(self, path: Path) -> IngestSummary:
         try:
-            p = pipeline(path)
-            chunks = p.process_input_file()
-            if not chunks:
+            p = pipeline(path, context=self.ingest_context)
+            chunks = p.process_input_file(keep_chunks=False)
+            if chunks is None or not p.chunk_count:
                 return IngestSummary(
                     files_processed=1,
                     total_chunks=0,
-                    errors=[f"{path}: pipeline returned no chunks"]
+                    errors=[f"{path}: pipeline returned no chunks"],
+                    stages=p.metrics.to_dict(),
                 )
+            self._record_ingested(p)
             return IngestSummary(
                 files_processed=1,
-                total_chunks=len(chunks),
-                errors=[]
+                total_chunks=p.chunk_count,
+                errors=[],
+                embeddings_reused=p.reused,
+                stages=p.metrics.to_dict(),
             )
 
         except InvalidMarkdownFileError as e:
@@ -65,73 +211,598 @@ class VectorService:
                 errors=[f"Error ingesting {path}: {e}"],
             )
 
-    def ingest_directory(self, dir_path: str | Path) -> IngestSummary:
-        root = Path(dir_path).expanduser().resolve()
+    def ingest_directory(
+        self,
+        dir_path: str | Path,
+        force: bool = False,
+        progress: Optional[ProgressCallback] = None,
+        cancel: Optional[threading.Event] = None,
+        retry_errors: bool = False,
+    ) -> IngestSummary:
+        """Ingest every .md file under `dir_path`, incrementally.
+
+        Files whose size/mtime (or, failing that, content hash) match the manifest are
+        skipped, and chunks of files that vanished since the last run are deleted.
+        `force=True` re-ingests everything regardless of the manifest.
+        `progress` is called after every finished file; setting `cancel` stops the run
+        after the files already in flight (deletions of vanished notes are then skipped).
+
+        The manifest is checkpointed after every committed Chroma batch, so rerunning
+        after a crash or cancel picks up where the previous run stopped — even with
+        `force=True`, notes that run already committed aren't redone.
+        `retry_errors=True` re-ingests only the notes that failed last time.
+
+        Ingest runs (this, `ingest_files`, `ingest_file`, `sync_paths`) and `vacuum` are
+        serialized: one started while another is going waits for it to finish.
+        """
+        with self._ingest_lock:
+            started = time.perf_counter()
+            summary = self._ingest_directory(
+                Path(dir_path).expanduser().resolve(), force=force, progress=progress, cancel=cancel,
+                retry_errors=retry_errors,
+            )
+            return self._finish_summary("directory", summary, started)
+
+    def _ingest_directory(
+        self,
+        root: Path,
+        force: bool = False,
+        progress: Optional[ProgressCallback] = None,
+        cancel: Optional[threading.Event] = None,
+        retry_errors: bool = False,
+    ) -> IngestSummary:
         if not root.exists():
             return IngestSummary(0, 0, [f"Directory does not exist: {root}"])
         if not root.is_dir():
             return IngestSummary(0, 0, [f"Path is not a directory: {root}"])
 
-        md_files = sorted(root.rglob("*.md"))
+        if retry_errors:
+            return self._retry_failed(root, progress=progress, cancel=cancel)
 
-        files_processed = 0
-        total_chunks = 0
+        scan_started = time.perf_counter()
+        # the walk is lazy and looked up against the manifest in batches; which recorded
+        # notes it never saw is worked out in SQLite afterwards (see FileManifest scans)
+        scan_id = self.manifest.begin_scan()
+        try:
+            return self._sync_directory(root, scan_id, scan_started, force, progress, cancel)
+        finally:
+            self.manifest.end_scan(scan_id)
+
+    def _sync_directory(
+        self,
+        root: Path,
+        scan_id: int,
+        scan_started: float,
+        force: bool,
+        progress: Optional[ProgressCallback],
+        cancel: Optional[threading.Event],
+    ) -> IngestSummary:
+        # an unfinished previous run: whatever it committed since it started is done
+        last_run = self.manifest.last_run(root)
+        resume_since = (
+            last_run.started_at
+            if last_run is not None and last_run.status in ("running", "cancelled", "failed")
+            else None
+        )
+
+        seen = 0
+        unchanged = 0
+        resumed = 0
         errors: List[str] = []
+        failures: List[tuple[str, str]] = []
+        # only the changed notes are listed (the engine needs a total for progress/ETA)
+        to_ingest: List[Path] = []
+        previously_known: set[str] = set()
+
+        for batch in batched(self._scan(root), 512):
+            keys = [str(n.path) for n in batch]
+            self.manifest.mark_seen(scan_id, keys)
+            known = self.manifest.get_many(keys)
+            seen += len(batch)
+
+            for note, key in zip(batch, keys):
+                md_file = note.path
+                prev = known.get(key)
+
+                committed_by_last_run = (
+                    resume_since is not None and prev is not None and prev.ingested_at >= resume_since
+                )
+                try:
+                    if (not force or committed_by_last_run) and self._is_unchanged(md_file, prev, note):
+                        unchanged += 1
+                        resumed += committed_by_last_run
+                        continue
+                except OSError as e:
+                    errors.append(f"{md_file}: {e}")
+                    failures.append((key, str(e)))
+                    continue
+
+                if prev is not None:
+                    previously_known.add(key)
+                to_ingest.append(md_file)
+
+        self.manifest.record_failures(failures)
+        scan = IngestMetrics()
+        scan.add("scan", time.perf_counter() - scan_started, items=seen)
+
+        summary = self._run_engine(
+            to_ingest, previously_known, progress=progress, cancel=cancel, root=root, force=force
+        )
+        summary.stages = merge_stages(scan.to_dict(), summary.stages)
+        summary.errors[:0] = errors
+        summary.unchanged = unchanged
+        summary.resumed = resumed
+        if cancel is not None and cancel.is_set():
+            return summary
 
-        for md_file in md_files:
+        # recorded notes the walk never saw were deleted or renamed away since the last ingest
+        for stale in self.manifest.iter_unseen_under(scan_id, root):
+            for stale_path in stale:
+                self.store.delete_document(stale_path)
+            self.manifest.remove_many(stale)
+            summary.deleted += len(stale)
+
+        return summary
+
+    def sync_paths(self, paths: List[str | Path]) -> IngestSummary:
+        """Bring the index in line with a set of changed paths (used by the vault watcher).
+
+        Existing notes are ingested if their content changed, existing directories are
+        synced like `ingest_directory`, and paths that no longer exist have their chunks
+        (and, for a vanished directory, every note under it) removed.
+        """
+        with self._ingest_lock:
+            return self._sync_paths(paths)
+
+    def _sync_paths(self, paths: List[str | Path]) -> IngestSummary:
+        started = time.perf_counter()
+        summary = IngestSummary(files_processed=0, total_chunks=0, errors=[])
+        to_ingest: List[Path] = []
+        previously_known: set[str] = set()
+        gone: set[str] = set()
+
+        for raw in dict.fromkeys(Path(p).expanduser().resolve() for p in paths):
+            if raw.is_dir():
+                sub = self._ingest_directory(raw)
+                summary = _merge_summaries(summary, sub)
+                continue
+            if not raw.exists():
+                gone.update(self.manifest.entries_under(raw))
+                if self.manifest.get(raw) is not None:
+                    gone.add(str(raw))
+                continue
+            if raw.suffix != ".md":
+                continue
+            prev = self.manifest.get(raw)
             try:
-                p = pipeline(md_file)
-                chunks = p.process_input_file()
-                files_processed += 1
+                if self._is_unchanged(raw, prev):
+                    summary.unchanged += 1
+                    continue
+            except OSError as e:
+                summary.errors.append(f"{raw}: {e}")
+                continue
+            if prev is not None:
+                previously_known.add(str(raw))
+            to_ingest.append(raw)
+
+        summary = _merge_summaries(summary, self._run_engine(to_ingest, previously_known))
+
+        for stale_path in gone:
+            self.store.delete_document(stale_path)
+        self.manifest.remove_many(gone)
+        summary.deleted += len(gone)
+        return self._finish_summary("sync", summary, started)
+
+    def ingest_files(
+        self,
+        file_paths: List[str | Path],
+        progress: Optional[ProgressCallback] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> IngestSummary:
+        """Ingest an explicit set of notes through the batched engine (no manifest skipping)."""
+        with self._ingest_lock:
+            return self._ingest_files(file_paths, progress=progress, cancel=cancel)
+
+    def _ingest_files(
+        self,
+        file_paths: List[str | Path],
+        progress: Optional[ProgressCallback] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> IngestSummary:
+        started = time.perf_counter()
+        paths: List[Path] = []
+        errors: List[str] = []
+        for fp in file_paths:
+            path = Path(fp).expanduser().resolve()
+            if not path.is_file():
+                errors.append(f"Path is not a file: {path}")
+            elif path.suffix != ".md":
+                errors.append(f"Only .md files are supported: {path.name}")
+            else:
+                paths.append(path)
+
+        known = {str(p) for p in paths if self.manifest.get(p) is not None}
+        summary = self._run_engine(paths, known, progress=progress, cancel=cancel)
+        summary.errors[:0] = errors
+        return self._finish_summary("files", summary, started)
 
-                if chunks:
-                    total_chunks += len(chunks)
-                else:
-                    errors.append(f"{md_file}: returned no chunks")
+    def _retry_failed(
+        self,
+        root: Path,
+        progress: Optional[ProgressCallback] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> IngestSummary:
+        """Re-ingest only the notes under `root` whose last attempt failed."""
+        to_ingest: List[Path] = []
+        gone: List[str] = []
+        for key in self.manifest.failed_paths(root):
+            path = Path(key)
+            if path.is_file():
+                to_ingest.append(path)
+            else:
+                gone.append(key)
+        # failed notes that have since been deleted: nothing left to retry
+        self.manifest.remove_many(gone)
+
+        previously_known = {str(p) for p in to_ingest if self.manifest.get(p) is not None}
+        return self._run_engine(to_ingest, previously_known, progress=progress, cancel=cancel, root=root)
+
+    def _run_engine(
+        self,
+        paths: List[Path],
+        previously_known: set[str],
+        progress: Optional[ProgressCallback] = None,
+        cancel: Optional[threading.Event] = None,
+        root: Optional[Path] = None,
+        force: bool = False,
+    ) -> IngestSummary:
+        summary = IngestSummary(files_processed=0, total_chunks=0, errors=[])
+        if not paths:
+            return summary
 
-            except InvalidMarkdownFileError as e:
-                errors.append(str(e))
+        # checkpointed by _record_results after every committed batch
+        run_id = self.manifest.begin_run(root or "", len(paths))
 
+        ctx = self.ingest_context
+        engine: Optional[IngestionEngine] = None
+        requests_before = 0
+        status = "completed"
+        try:
+            # the embedder is created lazily here, and raises if its backend is unreachable
+            engine = IngestionEngine(
+                ctx.store,
+                embedder=ctx.embedder,
+                parser=ctx.parser,
+                on_committed=lambda committed: self._record_results(committed, run_id),
+                on_progress=_ProgressTracker(len(paths), progress).update if progress else None,
+                cancel=cancel,
+                # a forced run re-embeds everything (e.g. after switching embedding models)
+                reuse_embeddings=not force,
+                pool_provider=ctx.parse_pool,
+            )
+            requests_before = getattr(engine.embedder, "request_count", 0)
+            results = engine.run(paths)
+        except Exception as e:
+            results = []
+            status = "failed"
+            summary.errors.append(f"Ingestion aborted: {e}")
+        if engine is not None:
+            summary.embedding_requests = getattr(engine.embedder, "request_count", 0) - requests_before
+            summary.stages = engine.metrics.to_dict()
+
+        failures: List[tuple[str, str]] = []
+        for res in results:
+            if res.cancelled:
+                status = "cancelled"
+                continue
+            if res.error is not None:
+                summary.errors.append(res.error)
+                failures.append((str(res.path), res.error))
+                # read but failed later (empty, no chunks, embed/upsert error) still counts as processed
+                if res.content_hash:
+                    summary.files_processed += 1
+                continue
+            summary.files_processed += 1
+            summary.total_chunks += res.chunk_count
+            summary.embeddings_reused += res.reused
+            if str(res.path) in previously_known:
+                summary.updated += 1
+            else:
+                summary.added += 1
+
+        self.manifest.record_failures(failures, run_id=run_id)
+        self.manifest.finish_run(run_id, status)
+        return summary
+
+    def _finish_summary(self, entry_point: str, summary: IngestSummary, started: float) -> IngestSummary:
+        """Add the wall-clock "total" stage and, if enabled, append the run to the metrics history."""
+        stages = summary.stages
+        stages["total"] = {
+            "seconds": time.perf_counter() - started,
+            "items": summary.files_processed,
+            "bytes": stages.get("read", {}).get("bytes", 0),
+            "tokens": stages.get("embed", {}).get("tokens", 0),
+        }
+        if self.metrics is not None:
+            try:
+                self.metrics.record(entry_point, summary.files_processed, stages)
             except Exception as e:
-                errors.append(f"{md_file}: {e}")
+                print(f"Failed to record ingest metrics: {e}")
+        return summary
+
+    def _scan(self, root: Path):
+        """The vault walk: notes under `root` with their stat, minus ignored paths.
+
+        Ignore patterns are relative to the configured vault when `root` lies inside it,
+        so syncing a subfolder applies the same rules as syncing the whole vault.
+        """
+        base = root
+        vault = self.settings.vault_path
+        if vault is not None:
+            vault = vault.expanduser().resolve()
+            if root == vault or vault in root.parents:
+                base = vault
+        rules = IgnoreRules.for_root(base, self.settings.scan_ignore, self.settings.scan_gitignore)
+        return scan_notes(root, ignore=rules, workers=self.settings.scan_workers, base=base)
 
-        return IngestSummary(
-            files_processed=files_processed,
-            total_chunks=total_chunks,
-            errors=errors,
+    def _is_unchanged(self, path: Path, prev: Optional[ManifestEntry], scanned: Optional[ScannedNote] = None) -> bool:
+        """True if `path` still matches its manifest entry. Raises OSError if it can't be read.
+
+        Pass the `ScannedNote` from the directory walk to reuse its stat.
+        """
+        if prev is None:
+            return False
+        if scanned is not None:
+            size, mtime = scanned.size, scanned.mtime
+        else:
+            st = path.stat()
+            size, mtime = st.st_size, st.st_mtime
+        if prev.size == size and prev.mtime == mtime:
+            return True
+        digest = file_digest(path)
+        if digest == prev.content_hash:
+            # touched but not edited — refresh the stat so the fast path hits next time
+            self.manifest.record(ManifestEntry(str(path), size, mtime, digest, prev.ingested_at))
+            return True
+        return False
+
+    def _record_ingested(self, p: pipeline) -> None:
+        # the pipeline already read and stat'ed the file; record exactly that version
+        self.manifest.record(ManifestEntry(str(p.path), p.size, p.last_mod, p.content_hash))
+
+    def _record_results(self, results: List[FileResult], run_id: Optional[int] = None) -> None:
+        """Engine callback: runs on the writer thread after each committed Chroma batch.
+
+        Recording the batch and advancing the run's checkpoint is one transaction.
+        """
+        self.manifest.record_many(
+            (ManifestEntry(str(r.path), r.size, r.mtime, r.content_hash) for r in results),
+            run_id=run_id,
         )
 
+    def vacuum(self) -> int:
+        """Delete orphaned chunks (vanished notes, leftovers of shrunk notes). Returns how many.
+
+        Side indexes that fell behind the collection are rebuilt afterwards.
+        """
+        with self._ingest_lock:
+            removed = self.store.vacuum()
+            self._rebuild_stale_indexes()
+            return removed
+
+    def embedding_stats(self) -> Optional[Dict[str, Any]]:
+        """Batch sizes / latency of the ingest embedder, or None if nothing was embedded yet."""
+        if self.ingest_context.lifetimes()["embedder"] is None:
+            return None
+        embedder = self.ingest_context.embedder
+        return embedder.stats() if hasattr(embedder, "stats") else None
+
+    def ingest_metrics(self, since: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Per-stage histograms over the recorded ingest runs, or None if metrics are disabled."""
+        if self.metrics is None:
+            return None
+        return self.metrics.histograms(since=since)
+
+    def query_cache_stats(self) -> Dict[str, Any]:
+        """Hits / misses / hit rate of the query-vector and query-result caches."""
+        return {"vectors": self.query_cache.stats(), "results": self.result_cache.stats()}
+
     # ------------------------------------------------------------------
     # Public API: querying
     # ------------------------------------------------------------------
 
+    @property
+    def query_embedder(self) -> EmbeddingModel:
+        """The embedder every query goes through, built once (settings + model handle lookup)."""
+        with self._query_embedder_lock:
+            if self._query_embedder is None:
+                self._query_embedder = EmbeddingModel(batch_size=32)
+            return self._query_embedder
+
+    def embed_query(self, query_text: str) -> List[float]:
+        """Query vector for `query_text`; a repeat of a recent query skips the model entirely."""
+        return self.embed_queries([query_text])[0]
+
+    def embed_queries(self, query_texts: List[str]) -> List[List[float]]:
+        """Query vectors for many texts; whatever the memo doesn't have is one embedding request."""
+        embedder = self.query_embedder
+        model = embedder.model_name
+        vectors: List[Optional[List[float]]] = [self.query_cache.get(model, t) for t in query_texts]
+
+        # the same query twice in one batch is embedded once
+        misses: Dict[str, List[int]] = {}
+        for i, vec in enumerate(vectors):
+            if vec is None:
+                misses.setdefault(normalize_query(query_texts[i]), []).append(i)
+        if misses:
+            fresh = embedder.embed_queries(list(misses))
+            for (text, idxs), vec in zip(misses.items(), fresh):
+                self.query_cache.put(model, text, vec)
+                for i in idxs:
+                    vectors[i] = vec
+        return vectors
+
     def query(
         self,
         query_text: str,
         n_results: int = 5,
         where: Optional[Dict[str, Any]] = None,
+        mode: Optional[str] = None,
+        expand_links: bool = False,
     ) -> QueryResult:
+        """Top `n_results` chunks for `query_text`.
 
-        res = self.store.query(
-            query_texts=[query_text],
-            n_results=n_results,
-            where=where,
-        )
+        `mode` (default REFLECTION_QUERY_MODE) is "vector" (embedding similarity),
+        "lexical" (BM25 over the full-text index, no embedding call) or "hybrid" (both
+        rankings fused with reciprocal rank fusion). Scores follow the mode: cosine
+        distance and BM25 are lower-is-better, the fused RRF score is higher-is-better.
+
+        `expand_links=True` appends, after the hits, the leading chunks
+        (REFLECTION_LINK_EXPAND_CHUNKS_PER_NOTE) of up to `n_results` notes one
+        [[link]] away from the hits' notes, in either direction — looked up in the link
+        graph, not searched for. Those carry `linked_from` and the linking hit's score.
+
+        Results are cached until the next write or delete through the store, so a
+        repeat is a dict lookup. The returned object may be shared — don't mutate it.
+        """
+        return self.query_many(
+            [query_text], n_results=n_results, where=where, mode=mode, expand_links=expand_links
+        )[0]
+
+    def query_many(
+        self,
+        query_texts: List[str],
+        n_results: int = 5,
+        where: Optional[Dict[str, Any]] = None,
+        mode: Optional[str] = None,
+        expand_links: bool = False,
+    ) -> List[QueryResult]:
+        """One QueryResult per input, in order, for the cost of one embedding request and one
+        Chroma query (query expansion, evaluation runs, multi-turn retrieval).
+
+        Each text goes through the same result and vector caches as `query`; only the
+        texts missing from both are embedded, and only the uncached ones are searched.
+        On failure the affected results come back empty; a hybrid query whose embedding
+        fails falls back to its keyword ranking.
+        """
+        mode = (mode or self.settings.query_mode).lower()
+        if mode not in QUERY_MODES:
+            raise ValueError(f"Unknown query mode {mode!r}; expected one of {', '.join(QUERY_MODES)}")
+
+        # expanded and plain results are different answers to the same query
+        cache_mode = f"{mode}+links" if expand_links else mode
+
+        # read the version before querying: a write landing mid-query must not be masked
+        version = self.store.version
+        out: List[Optional[QueryResult]] = [
+            self.result_cache.get(version, text, n_results, where, cache_mode) for text in query_texts
+        ]
+        todo = list(dict.fromkeys(text for text, r in zip(query_texts, out) if r is None))
+        if not todo:
+            return out
+
+        # hybrid fuses deeper candidate lists from both sides, then keeps the top n
+        depth = max(n_results * 4, 20) if mode == "hybrid" else n_results
+
+        vec_res = None
+        if mode != "lexical":
+            try:
+                vectors = self.embed_queries(todo)
+            except Exception as e:
+                print(f"Error during query embedding: {e}")
+                vectors = None
+            if vectors is not None:
+                vec_res = self.store.query(
+                    query_texts=todo,
+                    n_results=depth,
+                    where=where,
+                    query_embeddings=vectors,
+                )
+
+        lex_res = None
+        if mode != "vector":
+            try:
+                lex_res = self.store.search_text(todo, n_results=depth, where=where)
+            except Exception as e:
+                print(f"Error during keyword search: {e}")
+
+        complete = {"vector": bool(vec_res), "lexical": lex_res is not None}
+        complete["hybrid"] = complete["vector"] and complete["lexical"]
+
+        fresh: Dict[str, QueryResult] = {}
+        for i, text in enumerate(todo):
+            if mode == "vector":
+                ranked = _ranked(vec_res, i)
+            elif mode == "lexical":
+                ranked = _ranked(lex_res, i)
+            else:
+                ranked = _rrf_fuse([_ranked(vec_res, i), _ranked(lex_res, i)], k=self.settings.query_rrf_k)
+            fresh[text] = self._to_query_result(text, ranked[:n_results], mode)
+
+        if expand_links:
+            self._expand_links(list(fresh.values()), max_notes=n_results)
+        if complete[mode]:
+            for text, result in fresh.items():
+                self.result_cache.put(version, text, n_results, where, result, cache_mode)
+
+        return [r if r is not None else fresh[text] for text, r in zip(query_texts, out)]
+
+    def _expand_links(self, results: List[QueryResult], max_notes: int) -> None:
+        """Append chunks of 1-hop linked notes to each result (graph and chunk lookups only)."""
+        graph = getattr(self.store, "links", None)
+        if graph is None:
+            return
+
+        # per result: (linked note, hit it's linked with), most-connected notes first
+        picks: List[List[Tuple[str, QueryResultChunk]]] = []
+        for result in results:
+            best_hit: Dict[str, QueryResultChunk] = {}
+            for r in result.results:
+                best_hit.setdefault(str(r.metadata.get("document_path", "")), r)
+            found = graph.neighbors([p for p in best_hit if p])
+            ranked = sorted(found, key=lambda other: (-len(found[other]), other))[:max_notes]
+            picks.append([(other, best_hit[found[other][0]]) for other in ranked])
+
+        wanted = sorted({other for chosen in picks for other, _ in chosen})
+        if not wanted:
+            return
+        chunks = self.store.chunks_for_documents(wanted, self.settings.link_expand_chunks_per_note)
+
+        for result, chosen in zip(results, picks):
+            for other, hit in chosen:
+                for _cid, doc, meta in chunks.get(other, []):
+                    result.results.append(
+                        QueryResultChunk(
+                            document=meta.get("document_name", "unknown"),
+                            text=doc,
+                            score=hit.score,
+                            metadata=meta,
+                            linked_from=str(hit.metadata.get("document_path")),
+                        )
+                    )
 
-        if not res:
-            return QueryResult(query=query_text, results=[])
+    def note_links(self, document_path: str | Path) -> Dict[str, List[str]]:
+        """Notes `document_path` links to and notes linking to it (empty if the graph is off)."""
+        graph = getattr(self.store, "links", None)
+        if graph is None:
+            return {"outlinks": [], "backlinks": []}
+        path = str(Path(document_path).expanduser().resolve())
+        return {"outlinks": graph.outlinks(path), "backlinks": graph.backlinks(path)}
 
-        docs = res["documents"][0]
-        metas = res["metadatas"][0]
-        dists = res["distances"][0]
+    def rebuild_lexical_index(self) -> int:
+        """Refill the full-text index from Chroma. Returns the number of chunks indexed."""
+        return self.store.rebuild_fts()
 
+    @staticmethod
+    def _to_query_result(query_text: str, ranked: List[_Ranked], mode: str) -> QueryResult:
         results: List[QueryResultChunk] = []
-        for doc, meta, dist in zip(docs, metas, dists):
+        for _cid, doc, meta, score in ranked:
+            meta = meta or {}
             results.append(
                 QueryResultChunk(
                     document=meta.get("document_name", "unknown"),
                     text=doc,
-                    score=float(dist),
+                    score=float(score),
                     metadata=meta,
                 )
             )
@@ -139,4 +810,5 @@ class VectorService:
         return QueryResult(
             query=query_text,
             results=results,
+            mode=mode,
         )
@@ -0,0 +1,171 @@
+# vectors/benchmarks/bench_chunker.py — chunk_elements vs. the old re-encoding chunker
+#
+#   python -m modules.vectors.benchmarks.bench_chunker [--elements 2000 4000 8000] [--repeat 3]
+#
+# Builds large synthetic notes (headings, paragraphs, lists, code) and times the
+# single-pass chunker against a copy of the previous implementation, which encoded
+# every element, every overlap-tail element on each emit, and every joined chunk.
+from __future__ import annotations
+
+import argparse
+import hashlib
+import random
+import time
+from typing import Any, Dict, List
+
+from modules.vectors.components import chunker
+from modules.vectors.components.chunker import (
+    _count_tokens,
+    _format_elem,
+    _tags_links_from_text,
+    _update_heading_path,
+    chunk_elements,
+)
+
+_WORDS = (
+    "vector note link idea memory graph retrieval token window chunk reflection "
+    "obsidian vault embed query index batch latency store parse heading overlap"
+).split()
+
+
+def synthetic_elements(n: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Parser-shaped elements for one large note, `n` elements long."""
+    rng = random.Random(seed)
+
+    def sentence(k: int) -> str:
+        return " ".join(rng.choice(_WORDS) for _ in range(k)).capitalize() + "."
+
+    out: List[Dict[str, Any]] = []
+    for i in range(n):
+        r = rng.random()
+        if i % 25 == 0 or r < 0.05:
+            out.append({"type": "heading", "level": rng.randint(1, 3), "text": sentence(4)})
+        elif r < 0.20:
+            out.append({"type": "list", "ordered": rng.random() < 0.3,
+                        "items": [sentence(rng.randint(4, 12)) for _ in range(rng.randint(2, 6))]})
+        elif r < 0.28:
+            out.append({"type": "code", "text": "\n".join(f"x_{j} = {j} * {rng.randint(1, 99)}" for j in range(8))})
+        else:
+            text = " ".join(sentence(rng.randint(8, 20)) for _ in range(rng.randint(1, 5)))
+            if rng.random() < 0.2:
+                text += f" See [[{rng.choice(_WORDS)}]] #{rng.choice(_WORDS)}"
+            out.append({"type": "paragraph", "text": text})
+    return out
+
+
+def legacy_chunk_elements(
+    elements: List[Dict[str, Any]],
+    *,
+    doc_name: str,
+    doc_path: str,
+    max_tokens: int = 800,
+    overlap: int = 100,
+) -> List[Dict[str, Any]]:
+    """The chunker as it was before single-pass tokenization (kept for comparison only)."""
+    chunks: List[Dict[str, Any]] = []
+    heading_path: List[str] = []
+    window: List[Dict[str, Any]] = []
+    window_tokens = 0
+    chunk_idx = 0
+
+    def emit(chunk_elems: List[Dict[str, Any]], idx: int):
+        if not chunk_elems:
+            return
+        text = "\n\n".join(_format_elem(e) for e in chunk_elems).strip()
+        tokens = _count_tokens(text)
+        tags, links = _tags_links_from_text(text)
+        digest = hashlib.md5(f"{doc_path}:{idx}".encode("utf-8")).hexdigest()[:12]
+        chunks.append({
+            "chunk_id": digest,
+            "text": text,
+            "tokens": tokens,
+            "heading_path": heading_path.copy(),
+            "element_types": [e["type"] for e in chunk_elems],
+            "document_name": doc_name,
+            "document_path": doc_path,
+            "metadata": {"chunk_index": idx, "tags": sorted(tags), "links": sorted(links)},
+        })
+
+    for e in elements:
+        if e["type"] == "heading":
+            heading_path = _update_heading_path(heading_path, int(e.get("level", 1)), e.get("text", "").strip())
+        etoks = _count_tokens(_format_elem(e))
+        if window and window_tokens + etoks > max_tokens:
+            emit(window, chunk_idx)
+            chunk_idx += 1
+            tail: List[Dict[str, Any]] = []
+            tail_tokens = 0
+            for prev in reversed(window):
+                tail.insert(0, prev)
+                tail_tokens += _count_tokens(_format_elem(prev))
+                if tail_tokens >= overlap:
+                    break
+            window = tail
+            window_tokens = tail_tokens
+        window.append(e)
+        window_tokens += etoks
+
+    if window:
+        emit(window, chunk_idx)
+    return chunks
+
+
+class _CountingEncoder:
+    """Wraps the tokenizer to count how many texts get encoded."""
+
+    def __init__(self, enc):
+        self.enc = enc
+        self.calls = 0
+
+    def encode(self, text, **kw):
+        self.calls += 1
+        return self.enc.encode(text, **kw)
+
+    def encode_ordinary_batch(self, texts, **kw):
+        self.calls += len(texts)
+        return self.enc.encode_ordinary_batch(texts, **kw)
+
+
+def _time(fn, elements, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(elements, doc_name="bench.md", doc_path="/bench/bench.md")
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="chunk_elements micro-benchmark")
+    ap.add_argument("--elements", type=int, nargs="+", default=[2000, 4000, 8000])
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    print(f"{'elements':>9} {'chunks':>7} {'legacy s':>9} {'single s':>9} {'speedup':>8} "
+          f"{'legacy enc':>11} {'single enc':>11} {'max tok diff':>13}")
+    for n in args.elements:
+        elements = synthetic_elements(n)
+
+        enc = chunker._encoder()
+        chunker._sep_tokens()
+        counting = _CountingEncoder(enc)
+        chunker._ENC = counting
+        try:
+            old = legacy_chunk_elements(elements, doc_name="bench.md", doc_path="/bench/bench.md")
+            legacy_calls, counting.calls = counting.calls, 0
+            new = chunk_elements(elements, doc_name="bench.md", doc_path="/bench/bench.md")
+            single_calls = counting.calls
+        finally:
+            chunker._ENC = enc
+
+        assert [c["text"] for c in old] == [c["text"] for c in new], "chunk boundaries differ"
+        tok_diff = max((abs(a["tokens"] - b["tokens"]) for a, b in zip(old, new)), default=0)
+
+        t_old = _time(legacy_chunk_elements, elements, args.repeat)
+        t_new = _time(chunk_elements, elements, args.repeat)
+        print(f"{n:>9} {len(new):>7} {t_old:>9.3f} {t_new:>9.3f} {t_old / t_new:>7.1f}x "
+              f"{legacy_calls:>11} {single_calls:>11} {tok_diff:>13}")
+
+
+if __name__ == "__main__":
+    main()
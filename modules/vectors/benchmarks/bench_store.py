@@ -0,0 +1,183 @@
+# vectors/benchmarks/bench_store.py — Chroma vs the flat NumPy index on the same vectors
+#
+#   python -m modules.vectors.benchmarks.bench_store --chunks 10000 100000 --out bench_store.json
+#
+# For every collection size: generate clustered random embeddings (the store is what's
+# measured, so there is no model or vault in the loop), write the identical chunks into a
+# `ChromaVectorStore` and a `FlatVectorStore`, then time
+#   - writes (replace_documents, in batches of notes),
+#   - a cold open plus first query, in a fresh interpreter so nothing is already loaded,
+#   - query latency p50/p99, unfiltered and filtered to one note,
+# and report Chroma's recall@k against the flat index's exact results.
+#
+# Results are appended to `--out` as JSON, tagged with the git commit.
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from modules.vectors.benchmarks.bench_vault import _percentile, git_commit, peak_rss_mb, scoped_settings
+
+BACKENDS = ("chroma", "flat")
+_REPO_ROOT = Path(__file__).resolve().parents[3]
+
+# run by `_cold_open` in a fresh interpreter: open the store, answer one query
+_OPEN_SNIPPET = """
+import sys, time
+t0 = time.perf_counter()
+from modules.vectors.index.chroma_store import open_vector_store
+store = open_vector_store("bench_store")
+opened = time.perf_counter()
+store.query(["q"], n_results=5, query_embeddings=[[1.0] * int(sys.argv[1])])
+print(opened - t0, time.perf_counter() - t0)
+"""
+
+
+def make_docs(chunks: int, dim: int, chunks_per_note: int, seed: int) -> Dict[str, List[Dict[str, Any]]]:
+    """Chunks with embeddings drawn around a few hundred centres, grouped into notes."""
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(max(1, chunks // 200), dim)).astype(np.float32)
+    vectors = centres[rng.integers(0, len(centres), chunks)] + 0.3 * rng.normal(size=(chunks, dim)).astype(np.float32)
+    docs: Dict[str, List[Dict[str, Any]]] = {}
+    for i, vec in enumerate(vectors):
+        path = f"/bench/note_{i // chunks_per_note:06d}.md"
+        docs.setdefault(path, []).append({
+            "chunk_id": f"c{i:08d}",
+            "text": f"chunk {i}",
+            "embeddings": vec.tolist(),
+            "document_name": Path(path).name,
+            "document_path": path,
+            "metadata": {"chunk_index": i % chunks_per_note},
+        })
+    return docs
+
+
+def _cold_open(data_dir: Path, backend: str, dim: int) -> Dict[str, float]:
+    env = dict(os.environ, REFLECTION_DATA_DIR=str(data_dir), REFLECTION_VECTOR_STORE=backend,
+               REFLECTION_FTS_ENABLED="false", REFLECTION_LINK_GRAPH_ENABLED="false")
+    out = subprocess.run(
+        [sys.executable, "-c", _OPEN_SNIPPET, str(dim)],
+        capture_output=True, text=True, check=True, cwd=_REPO_ROOT, env=env,
+    )
+    opened, first = (float(x) for x in out.stdout.split()[-2:])
+    return {"open_s": opened, "first_query_s": first}
+
+
+def _latencies(store, queries: np.ndarray, n_results: int, where=None) -> Dict[str, Any]:
+    ms: List[float] = []
+    ids: List[List[str]] = []
+    for q in queries:
+        started = time.perf_counter()
+        res = store.query(["q"], n_results=n_results, where=where, query_embeddings=[q.tolist()])
+        ms.append((time.perf_counter() - started) * 1000)
+        ids.append(res["ids"][0])
+    return {"p50_ms": _percentile(ms, 50), "p99_ms": _percentile(ms, 99), "ids": ids}
+
+
+def run_size(chunks: int, work_dir: Path, args: argparse.Namespace) -> Dict[str, Any]:
+    """Benchmark one collection size; each backend gets its own data dir under `work_dir`."""
+    from modules.vectors.index.chroma_store import open_vector_store
+
+    docs = make_docs(chunks, args.dim, args.chunks_per_note, args.seed)
+    paths = list(docs)
+    rng = np.random.default_rng(args.seed + 1)
+    queries = rng.normal(size=(args.queries, args.dim)).astype(np.float32)
+    one_note = {"document_path": paths[len(paths) // 2]}
+
+    result: Dict[str, Any] = {"chunks": chunks, "dim": args.dim, "notes": len(paths)}
+    found: Dict[str, List[List[str]]] = {}
+    for backend in BACKENDS:
+        data_dir = work_dir / backend
+        # the side indexes cost the same for both backends; leave them out of the comparison
+        with scoped_settings(data_dir=str(data_dir), vector_store=backend,
+                             fts_enabled="false", link_graph_enabled="false"):
+            store = open_vector_store("bench_store")
+            started = time.perf_counter()
+            for start in range(0, len(paths), args.batch_notes):
+                store.replace_documents({p: docs[p] for p in paths[start:start + args.batch_notes]})
+            write_s = time.perf_counter() - started
+
+            unfiltered = _latencies(store, queries, args.n_results)
+            filtered = _latencies(store, queries, args.n_results, where=one_note)
+            found[backend] = unfiltered.pop("ids")
+            filtered.pop("ids")
+            del store
+
+        result[backend] = {
+            "write_s": write_s,
+            "chunks_per_s": chunks / write_s if write_s > 0 else None,
+            "query": unfiltered,
+            "query_one_note": filtered,
+            **_cold_open(data_dir, backend, args.dim),
+        }
+
+    # the flat index is exact, so it is the ground truth for Chroma's approximate search
+    hits = sum(len(set(a) & set(b)) for a, b in zip(found["chroma"], found["flat"]))
+    total = sum(len(b) for b in found["flat"])
+    result["chroma_recall"] = hits / total if total else None
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    ap = argparse.ArgumentParser(description="Chroma vs flat vector store benchmark")
+    ap.add_argument("--chunks", type=int, nargs="+", default=[10000, 100000])
+    ap.add_argument("--dim", type=int, default=768)
+    ap.add_argument("--chunks-per-note", type=int, default=8)
+    ap.add_argument("--batch-notes", type=int, default=256, help="notes per replace_documents call")
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--n-results", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--work-dir", type=Path, default=None, help="keep the data dirs here instead of a temp dir")
+    ap.add_argument("--out", type=Path, default=Path("bench_store.json"))
+    args = ap.parse_args(argv)
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "args": {k: (str(v) if isinstance(v, Path) else v) for k, v in vars(args).items()},
+        "runs": [],
+    }
+
+    for n in args.chunks:
+        base = args.work_dir / f"chunks_{n}" if args.work_dir else Path(tempfile.mkdtemp(prefix=f"reflection_store_{n}_"))
+        base.mkdir(parents=True, exist_ok=True)
+        try:
+            run = run_size(n, base, args)
+        finally:
+            if args.work_dir is None:
+                shutil.rmtree(base, ignore_errors=True)
+        report["runs"].append(run)
+        for backend in BACKENDS:
+            r = run[backend]
+            print(
+                f"{n:>7} chunks  {backend:<6}  write {r['chunks_per_s'] or 0:>8.0f} c/s  "
+                f"open {r['open_s'] * 1000:>7.1f} ms  first query {r['first_query_s'] * 1000:>7.1f} ms  "
+                f"query p50 {r['query']['p50_ms'] or 0:.2f} ms p99 {r['query']['p99_ms'] or 0:.2f} ms  "
+                f"one note p50 {r['query_one_note']['p50_ms'] or 0:.2f} ms"
+            )
+        print(f"{n:>7} chunks  chroma recall@{args.n_results} vs exact: {run['chroma_recall'] or 0:.3f}")
+
+    # one JSON document per line, so runs from different commits accumulate in one file
+    with args.out.open("a", encoding="utf-8") as f:
+        f.write(json.dumps(report) + "\n")
+    print(f"results appended to {args.out}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
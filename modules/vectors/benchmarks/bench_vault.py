@@ -0,0 +1,236 @@
+# vectors/benchmarks/bench_vault.py — end-to-end ingest + query benchmark on synthetic vaults
+#
+#   python -m modules.vectors.benchmarks.bench_vault --notes 1000 10000 --out bench.json
+#
+# For every vault size: generate a vault, ingest it with `VectorService.ingest_directory`
+# (the real engine: worker pool, bounded queues, cross-file embedding batches, manifest,
+# batch tuning) and report the run's per-stage breakdown. Then run `VectorService.query`
+# against the resulting collection for p50/p99 latency. Everything lives in a
+# throwaway data dir, and settings overrides only last for the run; the embedding backend defaults to the deterministic local
+# stand-in so runs are comparable across machines (`--backend lmstudio` for real).
+#
+# Results are appended to `--out` as JSON, tagged with the git commit.
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process so far, in MB (None where unsupported)."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        try:
+            import psutil
+        except ImportError:
+            return None
+        return psutil.Process().memory_info().peak_wset / 1e6
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / 1e6 if sys.platform == "darwin" else peak * 1024 / 1e6
+
+
+def git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, timeout=5, cwd=Path(__file__).resolve().parent,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def _percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[int(pct) - 1]
+
+
+def _rate(count: float, seconds: float) -> Optional[float]:
+    return count / seconds if seconds > 0 else None
+
+
+@contextmanager
+def scoped_settings(**overrides: Optional[str]) -> Iterator[None]:
+    """Set REFLECTION_<KEY> env vars (None = unset) for the block, then put them back.
+
+    Settings are read lazily and cached, so the cache is cleared on the way in and out.
+    """
+    from modules.vectors.settings import get_settings
+
+    keys = {f"REFLECTION_{k.upper()}": v for k, v in overrides.items()}
+    saved = {k: os.environ.get(k) for k in keys}
+    for k, v in keys.items():
+        if v is None:
+            os.environ.pop(k, None)
+        else:
+            os.environ[k] = v
+    get_settings.cache_clear()
+    try:
+        yield
+    finally:
+        for k, v in saved.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+        get_settings.cache_clear()
+
+
+def _stage_report(stages: Dict[str, Dict[str, float]], notes: int, chunks: int, vault_bytes: int,
+                  embedding_requests: int) -> Dict[str, Dict[str, Any]]:
+    """Throughput per stage from `IngestSummary.stages` (busy seconds, summed over workers)."""
+    def secs(stage: str) -> float:
+        return stages.get(stage, {}).get("seconds", 0.0)
+
+    tokens = stages.get("chunk", {}).get("tokens", 0)
+    return {
+        "scan": {"seconds": secs("scan"), "notes_per_s": _rate(notes, secs("scan"))},
+        "read": {"seconds": secs("read"), "mb_per_s": _rate(vault_bytes / 1e6, secs("read"))},
+        "parse": {"seconds": secs("parse"), "notes_per_s": _rate(notes, secs("parse")),
+                  "mb_per_s": _rate(vault_bytes / 1e6, secs("parse"))},
+        "chunk": {"seconds": secs("chunk"), "notes_per_s": _rate(notes, secs("chunk")),
+                  "chunks_per_s": _rate(chunks, secs("chunk"))},
+        "embed": {"seconds": secs("embed"), "chunks_per_s": _rate(stages.get("embed", {}).get("items", 0), secs("embed")),
+                  "tokens_per_s": _rate(tokens, secs("embed")), "requests": embedding_requests},
+        "upsert": {"seconds": secs("upsert"), "chunks_per_s": _rate(chunks, secs("upsert"))},
+    }
+
+
+def run_size(notes: int, work_dir: Path, args: argparse.Namespace) -> Dict[str, Any]:
+    """Benchmark one vault size inside `work_dir` (vault + data dir).
+
+    The vault goes through `VectorService.ingest_directory` — scan, manifest, the
+    parse worker pool, cross-file embedding batches, the writer thread — exactly as
+    the app ingests it; the per-stage breakdown is the run's own `IngestSummary.stages`.
+    """
+    from modules.vectors.benchmarks.vault_gen import generate_vault, sample_queries
+
+    vault_dir = work_dir / "vault"
+    t0 = time.perf_counter()
+    vault = generate_vault(vault_dir, notes, seed=args.seed)
+    gen_s = time.perf_counter() - t0
+
+    overrides = {
+        "data_dir": str(work_dir / "data"),
+        "embedding_backend": args.backend,
+        "embedding_cache_enabled": "true" if args.cache else "false",
+        # the warm-up repeats timed queries; cached answers would make p50/p99 dict lookups
+        "query_cache_max_entries": "0",
+        "query_result_cache_max_entries": "0",
+    }
+    if args.workers is not None:
+        overrides["ingest_workers"] = str(args.workers)
+    with scoped_settings(**overrides):
+        from modules.vectors.VectorService import VectorService
+
+        service = VectorService()
+        try:
+            summary = service.ingest_directory(vault_dir, force=True)
+            ingest_rss = peak_rss_mb()
+
+            queries = sample_queries(args.queries, seed=args.seed + 1)
+            # warm-up: first query pays for loading the index and the query embedder
+            for q in queries[: min(5, len(queries))]:
+                service.query(q, n_results=args.n_results)
+            latencies: List[float] = []
+            for q in queries:
+                started = time.perf_counter()
+                service.query(q, n_results=args.n_results)
+                latencies.append((time.perf_counter() - started) * 1000)
+            embedding = service.embedding_stats()
+        finally:
+            service.manifest.close()
+
+    stages = summary.stages
+    return {
+        "notes": notes,
+        "vault_bytes": vault.bytes,
+        "links": vault.links,
+        "chunks": summary.total_chunks,
+        "tokens": stages.get("chunk", {}).get("tokens", 0),
+        "errors": len(summary.errors),
+        "generate_s": gen_s,
+        "stages": _stage_report(stages, notes, summary.total_chunks, vault.bytes, summary.embedding_requests),
+        # wall clock; stage seconds overlap (and parse sums over workers), so they add up to more
+        "ingest_s": stages.get("total", {}).get("seconds"),
+        "peak_rss_mb_ingest": ingest_rss,
+        "peak_rss_mb": peak_rss_mb(),
+        "query": {
+            "n": len(latencies),
+            "n_results": args.n_results,
+            "p50_ms": _percentile(latencies, 50),
+            "p99_ms": _percentile(latencies, 99),
+            "mean_ms": statistics.fmean(latencies) if latencies else None,
+        },
+        "embedding": embedding,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    ap = argparse.ArgumentParser(description="Synthetic-vault ingest/query benchmark")
+    ap.add_argument("--notes", type=int, nargs="+", default=[1000, 10000])
+    ap.add_argument("--backend", choices=("local", "lmstudio"), default="local")
+    ap.add_argument("--workers", type=int, default=None, help="parse worker processes (default: REFLECTION_INGEST_WORKERS)")
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--n-results", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--cache", action="store_true", help="keep the embedding cache on (off by default)")
+    ap.add_argument("--work-dir", type=Path, default=None, help="keep vaults/data here instead of a temp dir")
+    ap.add_argument("--out", type=Path, default=Path("bench_results.json"))
+    args = ap.parse_args(argv)
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "args": {k: (str(v) if isinstance(v, Path) else v) for k, v in vars(args).items()},
+        "runs": [],
+    }
+
+    for n in args.notes:
+        base = args.work_dir / f"notes_{n}" if args.work_dir else Path(tempfile.mkdtemp(prefix=f"reflection_bench_{n}_"))
+        base.mkdir(parents=True, exist_ok=True)
+        try:
+            run = run_size(n, base, args)
+        finally:
+            if args.work_dir is None:
+                shutil.rmtree(base, ignore_errors=True)
+        report["runs"].append(run)
+        st = run["stages"]
+        print(
+            f"{n:>7} notes  {run['chunks']:>8} chunks  {run['errors']} errors  "
+            f"parse {st['parse']['notes_per_s'] or 0:>8.0f} n/s  "
+            f"chunk {st['chunk']['chunks_per_s'] or 0:>8.0f} c/s  "
+            f"embed {st['embed']['chunks_per_s'] or 0:>8.0f} c/s  "
+            f"upsert {st['upsert']['chunks_per_s'] or 0:>7.0f} c/s  "
+            f"rss {run['peak_rss_mb'] or 0:>7.0f} MB  "
+            f"query p50 {run['query']['p50_ms'] or 0:.1f} ms p99 {run['query']['p99_ms'] or 0:.1f} ms"
+        )
+
+    # one JSON document per line, so runs from different commits accumulate in one file
+    with args.out.open("a", encoding="utf-8") as f:
+        f.write(json.dumps(report) + "\n")
+    print(f"results appended to {args.out}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# vectors/benchmarks/vault_gen.py — synthetic Obsidian vaults for benchmarks
+#
+#   python -m modules.vectors.benchmarks.vault_gen /tmp/vault_10k --notes 10000
+#
+# Notes get frontmatter, nested headings, paragraphs with #tags and [[links]] to
+# other notes in the vault, bullet/numbered lists, code blocks and quotes, spread
+# over a few levels of folders. Same seed and size -> byte-identical vault.
+from __future__ import annotations
+
+import argparse
+import random
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List
+
+_WORDS = (
+    "memory graph retrieval token window chunk reflection vault embed query index batch "
+    "latency store parse heading overlap journal idea project habit sleep focus reading "
+    "garden system review weekly daily goal energy attention archive draft outline summary "
+    "insight pattern question answer context signal noise model network learning practice "
+    "light prism colour wave particle energy field orbit gravity ocean forest river stone"
+).split()
+
+_TAGS = ["idea", "project", "journal", "reading", "todo", "review", "research", "people", "meeting", "archive"]
+_FOLDERS = ["Inbox", "Projects", "Areas", "Resources", "Archive", "Daily", "People", "Reading"]
+_LANGS = ["python", "bash", "sql", "js", ""]
+
+
+@dataclass
+class VaultStats:
+    root: Path
+    notes: int
+    bytes: int
+    links: int
+    tags: int
+
+
+class _NoteWriter:
+    def __init__(self, rng: random.Random, titles: List[str]):
+        self.rng = rng
+        self.titles = titles
+        self.links = 0
+        self.tags = 0
+
+    def words(self, k: int) -> str:
+        return " ".join(self.rng.choice(_WORDS) for _ in range(k))
+
+    def sentence(self) -> str:
+        s = self.words(self.rng.randint(6, 18)).capitalize()
+        r = self.rng.random()
+        if r < 0.12:
+            self.links += 1
+            s += f" (see [[{self.rng.choice(self.titles)}]])"
+        elif r < 0.2:
+            self.tags += 1
+            s += f" #{self.rng.choice(_TAGS)}"
+        return s + "."
+
+    def paragraph(self) -> str:
+        return " ".join(self.sentence() for _ in range(self.rng.randint(1, 6)))
+
+    def block(self) -> str:
+        r = self.rng.random()
+        if r < 0.55:
+            return self.paragraph()
+        if r < 0.75:
+            ordered = self.rng.random() < 0.3
+            items = [self.sentence() for _ in range(self.rng.randint(2, 7))]
+            return "\n".join((f"{i}. " if ordered else "- ") + item for i, item in enumerate(items, 1))
+        if r < 0.87:
+            lang = self.rng.choice(_LANGS)
+            body = "\n".join(f"{self.words(1)}_{j} = {self.rng.randint(0, 999)}" for j in range(self.rng.randint(3, 12)))
+            return f"```{lang}\n{body}\n```"
+        return "> " + self.sentence()
+
+    def note(self, title: str, target_blocks: int) -> str:
+        tags = self.rng.sample(_TAGS, self.rng.randint(0, 3))
+        self.tags += len(tags)
+        parts = [f"---\ntags: [{', '.join(tags)}]\n---", f"# {title}"]
+        level = 1
+        for _ in range(target_blocks):
+            if self.rng.random() < 0.2:
+                level = max(2, min(4, level + self.rng.choice((-1, 0, 1))))
+                parts.append(f"{'#' * level} {self.words(self.rng.randint(2, 5)).title()}")
+            parts.append(self.block())
+        return "\n\n".join(parts) + "\n"
+
+
+def generate_vault(root: str | Path, notes: int, seed: int = 0, mean_blocks: int = 12) -> VaultStats:
+    """Write `notes` markdown notes under `root` (created if needed) and return what was written.
+
+    Note length varies (long-tailed around `mean_blocks` blocks), like a real vault
+    where most notes are short and a few are long.
+    """
+    rng = random.Random(seed)
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+
+    titles = [f"{rng.choice(_WORDS).title()} {rng.choice(_WORDS).title()} {i}" for i in range(notes)]
+    writer = _NoteWriter(rng, titles)
+    total = 0
+
+    for i, title in enumerate(titles):
+        folder = root / rng.choice(_FOLDERS)
+        if rng.random() < 0.3:
+            folder = folder / f"sub{rng.randint(0, 9)}"
+        folder.mkdir(parents=True, exist_ok=True)
+
+        blocks = max(1, int(rng.expovariate(1 / mean_blocks)))
+        data = writer.note(title, blocks).encode("utf-8")
+        (folder / f"{title}.md").write_bytes(data)
+        total += len(data)
+
+    return VaultStats(root=root, notes=notes, bytes=total, links=writer.links, tags=writer.tags)
+
+
+def sample_queries(n: int, seed: int = 1) -> List[str]:
+    """Query strings drawn from the same vocabulary as the generated notes."""
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(_WORDS) for _ in range(rng.randint(2, 8))) for _ in range(n)]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Generate a synthetic Obsidian vault")
+    ap.add_argument("root", type=Path)
+    ap.add_argument("--notes", type=int, default=1000)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    stats = generate_vault(args.root, args.notes, seed=args.seed)
+    print(f"{stats.notes} notes, {stats.bytes / 1e6:.1f} MB, {stats.links} links, {stats.tags} tags -> {stats.root}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# vectors/components/batch_tuner.py — latency-adaptive embedding batch size
+from __future__ import annotations
+
+import threading
+from collections import Counter
+from typing import Any, Dict, Optional
+
+
+class BatchTuner:
+    """AIMD-style controller for how many texts go into one embedding request.
+
+    After every request that was limited by the batch size (not by the token budget
+    or by running out of texts) the measured embeddings/s is compared with the
+    previous such request:
+
+      - as fast or faster  -> probe a bigger batch (+1/8, at least +1)
+      - clearly slower     -> back off by a quarter
+      - slower than `max_latency_s`, or the server rejected it -> halve
+
+    so the size drifts toward the server's throughput peak and stays inside
+    `[min_size, max_size]`. With `adaptive=False` the size never changes and the
+    tuner only keeps stats.
+    """
+
+    def __init__(
+        self,
+        initial_size: int,
+        min_size: int = 1,
+        max_size: int = 256,
+        max_latency_s: float = 30.0,
+        adaptive: bool = True,
+        tolerance: float = 0.1,
+    ):
+        self.min_size = max(1, min_size)
+        self.max_size = max(self.min_size, max_size)
+        self.max_latency_s = max_latency_s
+        self.adaptive = adaptive
+        self.tolerance = tolerance
+
+        self._lock = threading.Lock()
+        self._size = min(max(initial_size, self.min_size), self.max_size)
+        self._last_rate: Optional[float] = None
+
+        self.requests = 0
+        self.embeddings = 0
+        self.tokens = 0
+        self.errors = 0
+        self.total_latency_s = 0.0
+        self.last_rate: Optional[float] = None
+        self.batch_sizes: Counter[int] = Counter()
+
+    @property
+    def batch_size(self) -> int:
+        return self._size
+
+    def record(self, n: int, tokens: int, latency_s: float, full: bool) -> None:
+        """One successful request of `n` texts / `tokens` tokens that took `latency_s`.
+
+        `full` is True when the batch was cut at the current size, i.e. the size is
+        what limited it — only those say anything about whether to grow or shrink.
+        """
+        with self._lock:
+            self.requests += 1
+            self.embeddings += n
+            self.tokens += tokens
+            self.total_latency_s += latency_s
+            self.batch_sizes[n] += 1
+            rate = n / latency_s if latency_s > 0 else None
+            self.last_rate = rate
+
+            if not self.adaptive:
+                return
+            if latency_s > self.max_latency_s:
+                self._resize(self._size // 2)
+                self._last_rate = None
+                return
+            if not full or rate is None:
+                return
+            # hill-climb: compare against the rate measured at the previous size
+            if self._last_rate is None or rate >= self._last_rate * (1 - self.tolerance):
+                self._resize(self._size + max(1, self._size // 8))
+            else:
+                self._resize(self._size - max(1, self._size // 4))
+            self._last_rate = rate
+
+    def record_error(self, n: int) -> None:
+        """The server failed a request of `n` texts; retry with at most half of that."""
+        with self._lock:
+            self.errors += 1
+            self._resize(min(self._size, max(1, n // 2)))
+            self._last_rate = None
+
+    def _resize(self, size: int) -> None:
+        self._size = min(max(size, self.min_size), self.max_size)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "batch_size": self._size,
+                "min_batch_size": self.min_size,
+                "max_batch_size": self.max_size,
+                "adaptive": self.adaptive,
+                "requests": self.requests,
+                "embeddings": self.embeddings,
+                "tokens": self.tokens,
+                "errors": self.errors,
+                "avg_latency_s": self.total_latency_s / self.requests if self.requests else None,
+                "embeddings_per_s": self.embeddings / self.total_latency_s if self.total_latency_s else None,
+                "last_embeddings_per_s": self.last_rate,
+                # chosen size -> number of requests sent with it
+                "batch_sizes": dict(sorted(self.batch_sizes.items())),
+            }
@@ -0,0 +1,164 @@
+# vectors/components/cache/query_cache.py — in-memory LRUs of query vectors and query results
+from __future__ import annotations
+
+import json
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+
+def normalize_query(text: str) -> str:
+    """NFC, trimmed, inner whitespace collapsed to single spaces.
+
+    Case is kept: "Rust" the language and "rust" the corrosion may well embed apart.
+    """
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class QueryVectorCache:
+    """Size-bounded LRU of query embeddings keyed by (model name, normalized query).
+
+    Unlike the on-disk `EmbeddingCache` this lives in process memory: a repeated RAG
+    turn or search costs a dict lookup instead of a sqlite read plus a model call.
+    `max_entries <= 0` disables it (every lookup misses, nothing is stored).
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, model: str, query: str) -> Optional[List[float]]:
+        key = (model, normalize_query(query))
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vector
+
+    def put(self, model: str, query: str, vector: Sequence[float]) -> None:
+        if self.max_entries <= 0:
+            return
+        key = (model, normalize_query(query))
+        with self._lock:
+            self._entries[key] = list(vector)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, float | int]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            }
+
+
+class QueryResultCache:
+    """Size-bounded LRU of whole query results, valid for one collection version.
+
+    Keys are (query text, n_results, `where` filter, mode); every entry belongs to the store
+    `version` it was computed at, and the first lookup at a newer version empties the
+    cache — any write or delete may have changed any result. Cached values are shared,
+    not copied: callers must treat them as read-only.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, int, str, str], Any]" = OrderedDict()
+        self._version: Optional[int] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _key(query: str, n_results: int, where: Optional[Dict[str, Any]], mode: str) -> Tuple[str, int, str, str]:
+        return (query, n_results, json.dumps(where, sort_keys=True, default=str) if where else "", mode)
+
+    def _sync_version(self, version: int) -> None:
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._version = version
+
+    def get(
+        self, version: int, query: str, n_results: int, where: Optional[Dict[str, Any]] = None, mode: str = "vector"
+    ) -> Any:
+        key = self._key(query, n_results, where, mode)
+        with self._lock:
+            self._sync_version(version)
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(
+        self,
+        version: int,
+        query: str,
+        n_results: int,
+        where: Optional[Dict[str, Any]],
+        result: Any,
+        mode: str = "vector",
+    ) -> None:
+        """Store `result`, computed while the store was at `version` (read it *before* querying)."""
+        if self.max_entries <= 0:
+            return
+        key = self._key(query, n_results, where, mode)
+        with self._lock:
+            if version != self._version:
+                # the index changed while this query ran; the result may already be stale
+                if self._version is not None and version < self._version:
+                    return
+                self._sync_version(version)
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, float | int]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            }
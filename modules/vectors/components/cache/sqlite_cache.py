@@ -1,4 +1,220 @@
-from tabnanny import check
-import os, time, sqlite3
+# vectors/components/cache/sqlite_cache.py — content-addressed embedding cache
+from __future__ import annotations
 
-conn = sqlite3.connect(r"C:\Reflection\cache\embed_cache.sqlite", check_same_thread=False)
\ No newline at end of file
+import hashlib
+import sqlite3
+import threading
+import time
+from array import array
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from modules.vectors.settings import get_settings
+
+
+def text_hash(text: str) -> str:
+    """Stable content hash used as part of the cache key."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _pack(vector: Sequence[float]) -> bytes:
+    # float32 halves the footprint of a float64 blob and is what the vector store keeps anyway
+    return array("f", vector).tobytes()
+
+
+def _unpack(blob: bytes) -> List[float]:
+    vec = array("f")
+    vec.frombytes(blob)
+    return vec.tolist()
+
+
+class EmbeddingCache:
+    """Persistent embedding cache keyed by (model name, task prefix, sha256(text)).
+
+    Entries are evicted least-recently-used once the table grows past `max_entries`.
+    Safe to share across threads; sqlite serialises the writes.
+    """
+
+    def __init__(
+        self,
+        db_path: str | Path | None = None,
+        max_entries: int | None = None,
+    ):
+        config = get_settings()
+        self.db_path = Path(db_path) if db_path else config.embedding_cache_path
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = config.embedding_cache_max_entries if max_entries is None else max_entries
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._last_stamp = 0.0
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=5)
+        self.conn.execute("PRAGMA journal_mode=WAL;")
+        self.conn.execute("PRAGMA busy_timeout=5000;")
+        self.conn.execute("PRAGMA synchronous=NORMAL;")
+
+        self._init_schema()
+        self._count = self.conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def _init_schema(self) -> None:
+        with self.conn:
+            self.conn.execute("""
+                    CREATE TABLE IF NOT EXISTS embeddings (
+                        model TEXT NOT NULL,
+                        prefix TEXT NOT NULL,
+                        text_hash TEXT NOT NULL,
+                        vector BLOB NOT NULL,
+                        last_used REAL NOT NULL,
+                        PRIMARY KEY (model, prefix, text_hash)
+                    ) WITHOUT ROWID;
+            """)
+
+            # Serves the "ORDER BY last_used" scan in _evict().
+            self.conn.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_embeddings_last_used
+                    ON embeddings (last_used);
+            """)
+
+    def _stamp(self) -> float:
+        # strictly increasing, so entries touched in the same clock tick still evict in order
+        self._last_stamp = max(time.time(), self._last_stamp + 1e-6)
+        return self._last_stamp
+
+    def close(self) -> None:
+        try:
+            self.conn.close()
+        except Exception:
+            pass
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def get_many(self, model: str, prefix: str, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """Return a cached vector (or None) for every text, in input order."""
+        if not texts:
+            return []
+
+        hashes = [text_hash(t) for t in texts]
+        found: Dict[str, List[float]] = {}
+
+        with self._lock:
+            unique = list(dict.fromkeys(hashes))
+            # stay well below SQLITE_MAX_VARIABLE_NUMBER
+            for start in range(0, len(unique), 500):
+                part = unique[start:start + 500]
+                placeholders = ",".join("?" * len(part))
+                rows = self.conn.execute(
+                    f"""
+                    SELECT text_hash, vector FROM embeddings
+                    WHERE model = ? AND prefix = ? AND text_hash IN ({placeholders})
+                    """,
+                    (model, prefix, *part),
+                ).fetchall()
+                for h, blob in rows:
+                    found[h] = _unpack(blob)
+
+            if found:
+                now = self._stamp()
+                with self.conn:
+                    self.conn.executemany(
+                        "UPDATE embeddings SET last_used = ? WHERE model = ? AND prefix = ? AND text_hash = ?",
+                        [(now, model, prefix, h) for h in found],
+                    )
+
+            out = [found.get(h) for h in hashes]
+            hit_count = sum(1 for v in out if v is not None)
+            self.hits += hit_count
+            self.misses += len(out) - hit_count
+            return out
+
+    def get(self, model: str, prefix: str, text: str) -> Optional[List[float]]:
+        return self.get_many(model, prefix, [text])[0]
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def put_many(
+        self,
+        model: str,
+        prefix: str,
+        texts: Sequence[str],
+        vectors: Sequence[Sequence[float]],
+    ) -> None:
+        if len(texts) != len(vectors):
+            raise ValueError(f"Cache write mismatch: {len(vectors)} vectors for {len(texts)} texts")
+        if not texts:
+            return
+
+        rows = {text_hash(t): _pack(v) for t, v in zip(texts, vectors)}
+
+        with self._lock:
+            now = self._stamp()
+            with self.conn:
+                before = self.conn.total_changes
+                self.conn.executemany(
+                    """
+                    INSERT OR IGNORE INTO embeddings (model, prefix, text_hash, vector, last_used)
+                    VALUES (?, ?, ?, ?, ?)
+                    """,
+                    [(model, prefix, h, blob, now) for h, blob in rows.items()],
+                )
+                self._count += self.conn.total_changes - before
+            self._evict()
+
+    def put(self, model: str, prefix: str, text: str, vector: Sequence[float]) -> None:
+        self.put_many(model, prefix, [text], [vector])
+
+    def _evict(self) -> None:
+        """Drop the least-recently-used rows once the table exceeds `max_entries`. Caller holds the lock."""
+        if self.max_entries <= 0 or self._count <= self.max_entries:
+            return
+
+        overflow = self._count - self.max_entries
+        with self.conn:
+            # WITHOUT ROWID table, so match on the full primary key
+            cur = self.conn.execute(
+                """
+                DELETE FROM embeddings WHERE (model, prefix, text_hash) IN (
+                    SELECT model, prefix, text_hash FROM embeddings ORDER BY last_used ASC LIMIT ?
+                )
+                """,
+                (overflow,),
+            )
+        self._count -= cur.rowcount
+        self.evictions += cur.rowcount
+
+    def clear(self) -> None:
+        with self._lock:
+            with self.conn:
+                self.conn.execute("DELETE FROM embeddings")
+            self._count = 0
+
+    # ------------------------------------------------------------------
+    # Stats
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return self._count
+
+    def stats(self) -> Dict[str, float | int]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": self._count,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+        }
+
+
+@lru_cache()
+def get_embedding_cache() -> EmbeddingCache:
+    """Process-wide cache instance so every EmbeddingModel shares one connection and one set of counters."""
+    return EmbeddingCache()
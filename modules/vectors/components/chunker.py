@@ -1,17 +1,50 @@
 # chunker.py — structure-aware sliding window chunker
 from __future__ import annotations
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Iterable, Iterator, Tuple
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
 import hashlib
 import re
-import tiktoken
 
 # Use the same tokenizer family as OpenAI embeddings (cl100k_base)
 # so your "800 tokens" is the same 800 the embedder sees.
-_ENC = tiktoken.get_encoding("cl100k_base")
+# Loaded on first use: importing tiktoken and building the BPE ranks takes a
+# noticeable part of app start-up, and nothing needs it until the first ingest.
+_ENC = None
+
+# Chunks join elements with a blank line; its tokens are added once per join
+_SEP = "\n\n"
+
+def _encoder():
+    global _ENC
+    if _ENC is None:
+        import tiktoken
+        _ENC = tiktoken.get_encoding("cl100k_base")
+    return _ENC
 
 def _count_tokens(text: str) -> int:
-    return len(_ENC.encode(text))
+    return len(_encoder().encode(text))
+
+def _count_tokens_many(texts: List[str]) -> List[int]:
+    # one batched call per note instead of one encode per element
+    return [len(toks) for toks in _encoder().encode_ordinary_batch(texts)]
+
+@lru_cache(maxsize=1)
+def _sep_tokens() -> int:
+    return _count_tokens(_SEP)
+
+def chunk_id(doc_path: str, heading_path: List[str], text: str, occurrence: int = 0) -> str:
+    """Content-addressed chunk id: same note + heading path + text => same id.
+
+    Position isn't part of it, so inserting a paragraph near the top of a note
+    leaves the ids of every untouched chunk below it unchanged. `occurrence`
+    tells apart identical chunks repeated under the same heading.
+    """
+    key = "\x1f".join([str(doc_path), " > ".join(heading_path), text])
+    if occurrence:
+        key += f"\x1f{occurrence}"
+    return hashlib.md5(key.encode("utf-8")).hexdigest()[:16]
 
 def _update_heading_path(path: List[str], level: int, title: str) -> List[str]:
     # Keep H1..Hlevel; replace current level with new title
@@ -33,7 +66,8 @@ def _format_elem(e: Dict[str, Any]) -> str:
     return e.get("text", "")
 
 _TAG_RE   = re.compile(r"(?<!\w)#(\w+)")
-_LINK_RE  = re.compile(r"\[\[([^\]]+)\]\]")
+# `![[...]]` embeds an image/attachment/note; only plain `[[...]]` is a link
+_LINK_RE  = re.compile(r"(?<!!)\[\[([^\]]+)\]\]")
 
 def _tags_links_from_text(text: str) -> Tuple[List[str], List[str]]:
     return list(set(_TAG_RE.findall(text))), list(set(_LINK_RE.findall(text)))
@@ -52,31 +86,56 @@ def chunk_elements(
       - track a live heading_path (H1..Hn) for context
       - preserve basic markdown formatting for readability
       - maintain a token budget with an overlap “tail”
+
+    Every element is formatted and tokenized exactly once; window budgeting, the
+    overlap tail and each chunk's `tokens` all reuse those counts, so chunking is
+    linear in note size. A chunk's `tokens` is the sum of its elements plus one
+    separator per join — BPE merges across the join can make it differ from
+    re-encoding the joined text by a token or so.
+    """
+    return list(iter_chunks(elements, doc_name=doc_name, doc_path=doc_path, max_tokens=max_tokens, overlap=overlap))
+
+def iter_chunks(
+    elements: Iterable[Dict[str, Any]],
+    *,
+    doc_name: str,
+    doc_path: str,
+    max_tokens: int = 800,
+    overlap: int = 100,
+    block_size: int = 256,
+) -> Iterator[Dict[str, Any]]:
+    """Streaming `chunk_elements`: same chunks, yielded as soon as each one closes.
+
+    Elements are pulled (and tokenized in one batch) `block_size` at a time, and
+    only the current window is kept, so memory stays flat however long the note is.
     """
-    chunks: List[Dict[str, Any]] = []
     heading_path: List[str] = []
 
-    window: List[Dict[str, Any]] = []
+    # window holds (type, text, tokens) per element; window_tokens counts elements only
+    # (no separators), which is what the budget has always been measured in
+    window: List[Tuple[str, str, int]] = []
     window_tokens = 0
     chunk_idx = 0
+    seen_ids: Dict[str, int] = {}
 
-    def emit(chunk_elems: List[Dict[str, Any]], idx: int):
-        if not chunk_elems:
-            return
+    def emit(chunk_elems: List[Tuple[str, str, int]], idx: int) -> Dict[str, Any]:
         # Join with double newlines to mimic paragraph breaks
-        text = "\n\n".join(_format_elem(e) for e in chunk_elems).strip()
-        tokens = _count_tokens(text)
+        text = _SEP.join(t for _, t, _ in chunk_elems).strip()
+        tokens = sum(n for _, _, n in chunk_elems) + _sep_tokens() * (len(chunk_elems) - 1)
         tags, links = _tags_links_from_text(text)
 
-        # deterministic id from path + index
-        digest = hashlib.md5(f"{doc_path}:{idx}".encode("utf-8")).hexdigest()[:12]
+        # deterministic id from path + heading path + content (not position)
+        base = chunk_id(doc_path, heading_path, text)
+        occurrence = seen_ids.get(base, 0)
+        seen_ids[base] = occurrence + 1
+        digest = chunk_id(doc_path, heading_path, text, occurrence) if occurrence else base
 
-        chunks.append({
+        return {
             "chunk_id": digest,
             "text": text,
             "tokens": tokens,
             "heading_path": heading_path.copy(),
-            "element_types": [e["type"] for e in chunk_elems],
+            "element_types": [t for t, _, _ in chunk_elems],
             "document_name": doc_name,
             "document_path": doc_path,
             "metadata": {
@@ -84,39 +143,40 @@ def chunk_elements(
                 "tags": sorted(tags),
                 "links": sorted(links),
             },
-        })
-
-    for e in elements:
-        if e["type"] == "heading":
-            lvl = int(e.get("level", 1))
-            heading_path = _update_heading_path(heading_path, lvl, e.get("text","").strip())
-
-        etext = _format_elem(e)
-        etoks = _count_tokens(etext)
-
-        # If this element would overflow, emit current window and carry an overlap tail
-        if window and window_tokens + etoks > max_tokens:
-            emit(window, chunk_idx)
-            chunk_idx += 1
-
-            # Build overlap tail in element units (no mid-element slicing)
-            tail: List[Dict[str, Any]] = []
-            tail_tokens = 0
-            for prev in reversed(window):
-                ptxt = _format_elem(prev)
-                ptok = _count_tokens(ptxt)
-                tail.insert(0, prev)
-                tail_tokens += ptok
-                if tail_tokens >= overlap:
-                    break
-
-            window = tail
-            window_tokens = tail_tokens
-
-        window.append(e)
-        window_tokens += etoks
+        }
+
+    it = iter(elements)
+    while True:
+        block = list(islice(it, block_size))
+        if not block:
+            break
+        texts = [_format_elem(e) for e in block]
+        counts = _count_tokens_many(texts)
+
+        for e, text, etoks in zip(block, texts, counts):
+            if e["type"] == "heading":
+                lvl = int(e.get("level", 1))
+                heading_path = _update_heading_path(heading_path, lvl, e.get("text","").strip())
+
+            # If this element would overflow, emit current window and carry an overlap tail
+            if window and window_tokens + etoks > max_tokens:
+                yield emit(window, chunk_idx)
+                chunk_idx += 1
+
+                # Build overlap tail in element units (no mid-element slicing)
+                start = len(window)
+                tail_tokens = 0
+                while start > 0:
+                    start -= 1
+                    tail_tokens += window[start][2]
+                    if tail_tokens >= overlap:
+                        break
+
+                window = window[start:]
+                window_tokens = tail_tokens
+
+            window.append((e["type"], text, etoks))
+            window_tokens += etoks
 
     if window:
-        emit(window, chunk_idx)
-
-    return chunks
+        yield emit(window, chunk_idx)
@@ -1,8 +1,17 @@
 # vectors/components/e_model.py
 
-from typing import List
-import lmstudio as lms
+import time
+from typing import Any, Dict, List, Optional
+from modules.backends import get_embedding_backend
 from modules.vectors.settings import get_settings
+from modules.vectors.components.batch_tuner import BatchTuner
+from modules.vectors.components.cache.sqlite_cache import EmbeddingCache, get_embedding_cache
+from modules.vectors.components.chunker import _count_tokens_many
+
+# Nomic task prefixes — part of the cache key too, since the same text embeds
+# differently as a document and as a query.
+DOCUMENT_PREFIX = "search_document: "
+QUERY_PREFIX = "search_query: "
 
 
 class EmbeddingModel:
@@ -11,52 +20,166 @@ class EmbeddingModel:
         model_name: str | None = None,
         batch_size: int | None = None,
         max_tokens_per_batch: int | None = None,
+        cache: EmbeddingCache | None = None,
+        adaptive: bool | None = None,
     ):
         config = get_settings()
         self.model_name = model_name or config.embedding_model
-        self.batch_size = config.embedding_batch_size if batch_size is None else batch_size
-        self.max_tokens_per_batch = max_tokens_per_batch
+        # per-request token budget (real token counts); 0 disables it
+        self.max_tokens_per_batch = (
+            config.embedding_max_batch_tokens if max_tokens_per_batch is None else max_tokens_per_batch
+        )
+        # texts per request: starts at `batch_size`, then follows measured latency
+        self.tuner = BatchTuner(
+            initial_size=config.embedding_batch_size if batch_size is None else batch_size,
+            min_size=config.embedding_min_batch_size,
+            max_size=config.embedding_max_batch_size,
+            max_latency_s=config.embedding_max_batch_latency_s,
+            adaptive=config.embedding_adaptive_batching if adaptive is None else adaptive,
+        )
+        # number of embedding requests actually sent to LM Studio
+        self.request_count = 0
+
+        # None falls back to the shared on-disk cache (if enabled in settings)
+        if cache is None and config.embedding_cache_enabled:
+            cache = get_embedding_cache()
+        self.cache: Optional[EmbeddingCache] = cache
+
+        # LM Studio (lazily loads the model if it isn't resident) or the local stand-in
+        self.backend = config.embedding_backend
+        self.model = get_embedding_backend(self.model_name, self.backend)
+        if self.backend != "lmstudio":
+            # the cache is keyed by model name: keep stand-in vectors apart from real ones
+            self.model_name = f"{self.backend}-{config.local_embedding_dim}:{self.model_name}"
 
-        # lazily loads the model in LM Studio if it isn't already resident
-        self.model = lms.embedding_model(self.model_name)
+    @property
+    def batch_size(self) -> int:
+        """Current texts-per-request target (the ingest engine pools chunks to this size)."""
+        return self.tuner.batch_size
+
+    def stats(self) -> Dict[str, Any]:
+        """Batching stats: chosen batch sizes, latency, embeddings/s, token budget."""
+        out = self.tuner.stats()
+        out["max_tokens_per_batch"] = self.max_tokens_per_batch
+        out["request_count"] = self.request_count
+        return out
 
     def embed(self, texts: List[str]) -> List[List[float]]:
         """Embed a batch of document chunks for storage.
 
         Nomic embedding models are trained with asymmetric task prefixes —
         documents and queries must be embedded differently or retrieval quality drops.
+
+        Texts already in the embedding cache are served from it; only misses reach LM Studio.
         """
-        prefixed = [f"search_document: {t}" for t in texts]
-        all_vectors: List[List[float]] = []
+        if not texts:
+            return []
 
-        batch: list[str] = []
-        cur_tokens = 0
+        cached: List[Optional[List[float]]] = (
+            self.cache.get_many(self.model_name, DOCUMENT_PREFIX, texts)
+            if self.cache is not None
+            else [None] * len(texts)
+        )
+        miss_idx = [i for i, v in enumerate(cached) if v is None]
+        if not miss_idx:
+            return cached
 
-        def empty_batch():
-            nonlocal batch, cur_tokens, all_vectors
-            if not batch:
-                return
+        miss_texts = [texts[i] for i in miss_idx]
+        fresh = self._embed_uncached([f"{DOCUMENT_PREFIX}{t}" for t in miss_texts])
 
-            batch_vectors = self.model.embed(batch)
-            all_vectors.extend(batch_vectors)
-            batch = []
-            cur_tokens = 0
+        if len(fresh) != len(miss_texts):
+            raise ValueError(
+                f"Embedding count mismatch: {len(fresh)} vectors for {len(miss_texts)} texts"
+            )
+
+        if self.cache is not None:
+            self.cache.put_many(self.model_name, DOCUMENT_PREFIX, miss_texts, fresh)
 
-        for t in prefixed:
-            batch.append(t)
+        for i, vec in zip(miss_idx, fresh):
+            cached[i] = vec
+        return cached
 
-            if self.max_tokens_per_batch is not None:
-                cur_tokens += max(1, len(t) // 4)
+    def _embed_uncached(self, prefixed: List[str]) -> List[List[float]]:
+        """Send `prefixed` to LM Studio in batches bounded by the tuner's size and the token budget.
+
+        A text larger than the whole budget still goes out, alone. If the server fails a
+        batch it is retried in halves; only a failing single text raises.
+        """
+        all_vectors: List[List[float]] = []
+        counts = _count_tokens_many(prefixed)
+        budget = self.max_tokens_per_batch
+        cap: Optional[int] = None   # set after a failure until that batch has gone through
 
-            if len(batch) >= self.batch_size:
-                empty_batch()
-            elif self.max_tokens_per_batch is not None and cur_tokens >= self.max_tokens_per_batch:
-                empty_batch()
+        i = 0
+        while i < len(prefixed):
+            size = self.tuner.batch_size if cap is None else min(cap, self.tuner.batch_size)
+            j = i
+            tokens = 0
+            while j < len(prefixed) and j - i < size:
+                if budget and j > i and tokens + counts[j] > budget:
+                    break
+                tokens += counts[j]
+                j += 1
 
-        empty_batch()
+            batch = prefixed[i:j]
+            started = time.perf_counter()
+            try:
+                batch_vectors = self.model.embed(batch)
+            except Exception:
+                if len(batch) == 1:
+                    raise
+                self.tuner.record_error(len(batch))
+                cap = len(batch) // 2
+                continue
+            self.request_count += 1
+            self.tuner.record(len(batch), tokens, time.perf_counter() - started, full=len(batch) == size)
+            all_vectors.extend(batch_vectors)
+            cap = None
+            i = j
 
         return all_vectors
 
     def embed_query(self, text: str) -> List[float]:
         """Embed a single query string for retrieval (see note on prefixes in `embed`)."""
-        return self.model.embed(f"search_query: {text}")
+        if self.cache is not None:
+            hit = self.cache.get(self.model_name, QUERY_PREFIX, text)
+            if hit is not None:
+                return hit
+
+        vector = self.model.embed(f"{QUERY_PREFIX}{text}")
+        self.request_count += 1
+
+        if self.cache is not None:
+            self.cache.put(self.model_name, QUERY_PREFIX, text, vector)
+        return vector
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """`embed_query` for many queries: cache misses go out as one embedding request.
+
+        Queries are short, so unlike `embed` there is no splitting into tuned batches.
+        """
+        if not texts:
+            return []
+
+        vectors: List[Optional[List[float]]] = (
+            self.cache.get_many(self.model_name, QUERY_PREFIX, texts)
+            if self.cache is not None
+            else [None] * len(texts)
+        )
+        miss_idx = [i for i, v in enumerate(vectors) if v is None]
+        if not miss_idx:
+            return vectors
+
+        miss_texts = [texts[i] for i in miss_idx]
+        fresh = self.model.embed([f"{QUERY_PREFIX}{t}" for t in miss_texts])
+        self.request_count += 1
+        if len(fresh) != len(miss_texts):
+            raise ValueError(
+                f"Embedding count mismatch: {len(fresh)} vectors for {len(miss_texts)} queries"
+            )
+
+        if self.cache is not None:
+            self.cache.put_many(self.model_name, QUERY_PREFIX, miss_texts, fresh)
+        for i, vec in zip(miss_idx, fresh):
+            vectors[i] = vec
+        return vectors
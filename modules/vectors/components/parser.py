@@ -1,7 +1,13 @@
 # parser.py — Mistune AST → flat elements
+import re
 from pathlib import Path
-from typing import List, Dict, Any
-import mistune
+from typing import List, Dict, Any, Iterable, Iterator
+
+# A section that grows past this without reaching a heading is also cut at a blank line
+_MAX_SECTION_CHARS = 256 * 1024
+
+_ATX_HEADING_RE = re.compile(r"#{1,6}(?:[ \t]|\r?\n|$)")
+_FENCE_RE = re.compile(r" {0,3}(`{3,}|~{3,})")
 
 def _extract_text(node) -> str:
     # Flatten inline content (strong/emphasis/link/code_inline, etc.)
@@ -34,7 +40,6 @@ def _to_elements(ast) -> List[Dict[str, Any]]:
         if t == "heading":
             txt = _extract_text(n.get("children", []))
             level = int(n.get("attrs", {}).get("level", 1))
-            print(f"Current heading level: {level}")
             out.append({"type": "heading", "text": txt.strip(), "level": level})
 
         elif t in ("paragraph", "block_quote"):
@@ -60,11 +65,53 @@ def _to_elements(ast) -> List[Dict[str, Any]]:
     walk(ast)
     return out
 
+def iter_markdown_sections(lines: Iterable[str], max_chars: int = _MAX_SECTION_CHARS) -> Iterator[str]:
+    """Group markdown lines into independently parseable sections.
+
+    A new section starts at every top-level ATX heading outside a fenced code
+    block. Headings always start a new block in CommonMark, so parsing section by
+    section yields the same elements as parsing the whole note — only holding one
+    section's text and AST at a time. A section with no heading for `max_chars` is
+    also cut at the next blank line outside a fence (a loose list running across
+    that line then comes out as two lists).
+    """
+    buf: List[str] = []
+    size = 0
+    fence = None  # the opening fence run ("```", "~~~~", ...) while inside a code block
+
+    for line in lines:
+        if fence is None:
+            if buf and (_ATX_HEADING_RE.match(line) or (size >= max_chars and not line.strip())):
+                yield "".join(buf)
+                buf, size = [], 0
+            m = _FENCE_RE.match(line)
+            if m:
+                fence = m.group(1)
+        else:
+            stripped = line.strip()
+            if stripped.startswith(fence) and stripped == fence[0] * len(stripped):
+                fence = None
+        buf.append(line)
+        size += len(line)
+
+    if buf:
+        yield "".join(buf)
+
 class MarkdownNoteParser:
     def __init__(self):
+        # imported here so importing the vectors package doesn't pay for mistune
+        import mistune
         self._md = mistune.create_markdown(renderer="ast")
 
     def parse_markdown_file(self, path: Path) -> List[Dict[str, Any]]:
         raw = Path(path).read_text(encoding="utf-8")
+        return self.parse_markdown_text(raw)
+
+    def parse_markdown_text(self, raw: str) -> List[Dict[str, Any]]:
         ast = self._md(raw)
         return _to_elements(ast)
+
+    def iter_markdown_elements(self, lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        """Streaming `parse_markdown_text`: elements come out section by section (see iter_markdown_sections)."""
+        for section in iter_markdown_sections(lines):
+            yield from _to_elements(self._md(section))
@@ -1,11 +1,15 @@
 from pathlib import Path
+import json
 import re
-from typing import List, Dict, Any, Optional
-import chromadb
-from chromadb.config import Settings
+import sqlite3
+import threading
+import time
+from typing import List, Dict, Any, Iterable, Optional, Set, Tuple
 from modules.vectors.settings import get_settings
 
 from modules.vectors.components.e_model import EmbeddingModel
+from modules.vectors.index.fts_store import FullTextIndex
+from modules.vectors.index.link_graph import LinkGraph
 
 class ChromaVectorStore:
     def __init__(
@@ -23,6 +27,36 @@ class ChromaVectorStore:
         
         
         
+        self.collection = self._open_collection()
+
+        # bumped after every write or delete through this store; result caches key on it
+        self.version = 0
+        self._version_lock = threading.Lock()
+
+        # keyword index over the same chunks; every write/delete below is mirrored into it
+        self.fts: Optional[FullTextIndex] = None
+        if config.fts_enabled:
+            try:
+                self.fts = FullTextIndex(collection_name=self.collection_name)
+            except sqlite3.Error as e:
+                print(f"Full-text index disabled: {e}")
+
+        # note -> note [[link]] adjacency (with backlinks), kept per note like the chunks
+        self.links: Optional[LinkGraph] = None
+        if config.link_graph_enabled:
+            try:
+                self.links = LinkGraph(collection_name=self.collection_name)
+            except sqlite3.Error as e:
+                print(f"Link graph disabled: {e}")
+        
+        
+        
+    def _open_collection(self):
+        """The collection every read and write below goes through (FlatVectorStore swaps it out)."""
+        # chromadb pulls in onnxruntime, numpy, pydantic... — only pay for that once a store is opened
+        import chromadb
+        from chromadb.config import Settings
+
         self.client = chromadb.PersistentClient(
             path=self.persist_directory,
             settings=Settings(
@@ -30,19 +64,95 @@ class ChromaVectorStore:
             )
         )
         
-        self.collection = self.client.get_or_create_collection(
+        return self.client.get_or_create_collection(
             name=self.collection_name,
             metadata={"hnsw:space": "cosine"}
         )
-        
-        
-        
+
+    def _bump_version(self) -> None:
+        with self._version_lock:
+            self.version += 1
+
+    def _mirror(self, index: Optional[Any], action: str, *args) -> None:
+        """Mirror a write into a side index (full-text, link graph); Chroma stays the source of truth.
+
+        A failed mirror write leaves the index behind the collection, so the index is
+        marked stale (see `stale_indexes`) and rebuilt by `rebuild_stale_indexes`.
+        """
+        if index is None:
+            return
+        try:
+            getattr(index, action)(*args)
+        except Exception as e:
+            print(f"Error updating {type(index).__name__} ({action}), marking it for rebuild: {e}")
+            self._mark_stale(index)
+
+    @staticmethod
+    def _stale_marker(index: Any) -> Path:
+        # a plain file next to the index's database: still writable if that database isn't
+        return Path(index.db_path).with_suffix(".stale")
+
+    def _mark_stale(self, index: Any) -> None:
+        try:
+            self._stale_marker(index).touch()
+        except OSError as e:
+            print(f"Could not mark {type(index).__name__} stale: {e}")
+
+    def stale_indexes(self) -> List[str]:
+        """Side indexes that are behind the collection: "fts" and/or "links".
+
+        An index is stale if a mirror write into it failed (in this or an earlier
+        process), if it is empty while the collection isn't (it predates the
+        collection), or — for the full-text index — if its row count differs.
+        """
+        stale: List[str] = []
+        count = self.collection.count()
+        if self.fts is not None and (self._stale_marker(self.fts).exists() or len(self.fts) != count):
+            stale.append("fts")
+        if self.links is not None and (
+            self._stale_marker(self.links).exists() or (len(self.links) == 0 and count)
+        ):
+            stale.append("links")
+        return stale
+
+    def rebuild_stale_indexes(self) -> Dict[str, int]:
+        """Rebuild every index `stale_indexes` reports. Returns {index: rows or notes indexed}."""
+        rebuilt: Dict[str, int] = {}
+        for name in self.stale_indexes():
+            rebuilt[name] = self.rebuild_fts() if name == "fts" else self.rebuild_links()
+        return rebuilt
+
+    def set_document_links(self, document_path: str | Path, links: Iterable[str]) -> None:
+        """Record the [[links]] going out of `document_path` (all of them, replacing the old set)."""
+        self._mirror(self.links, "set_links", str(document_path), list(links))
+
     def upsert_chunks(self, chunks: List[Dict[str, Any]]) -> None:
         
         if not chunks:
             print("No chunks provided to upsert.")
             return
         
+        ids, documents, embeddings, metadatas = self._build_records(chunks)
+            
+        if not ids:
+            print("No valid chunks to upsert after processing; exiting. (Missing ID's)")
+            return
+        
+        try:
+            self.collection.upsert(
+                ids=ids,
+                documents=documents,
+                embeddings=embeddings,
+                metadatas=metadatas
+            )
+            self._mirror(self.fts, "upsert", ids, documents, metadatas)
+        except Exception as e:
+            print(f"Error during upsert: {e}")
+        finally:
+            self._bump_version()
+
+    def _build_records(self, chunks: List[Dict[str, Any]], ingested_at: Optional[float] = None):
+        """Split chunk dicts into the parallel id/document/embedding/metadata lists Chroma wants."""
         ids = []
         documents = []
         embeddings = []
@@ -56,51 +166,277 @@ class ChromaVectorStore:
             ids.append(c['chunk_id'])
             documents.append(c['text'])
             embeddings.append(c['embeddings'])
-            
-            raw_hp = c.get("heading_path", [])
-            heading_path = _flatten_heading_path(raw_hp)
-            
-            meta = {
-                "document_name": c.get("document_name", ""),
-                "document_path": c.get("document_path", ""),
-                "heading_path": heading_path,
-                "tokens": c.get("tokens")
-            }
-            
-            m = c.get("metadata", {}) or {}
-            meta["chunk_index"] = m.get("chunk_index")
-            meta["tags"] = m.get("tags", "")
-            meta["links"] = m.get("links", "")
-            meta = {k: _clean_meta_value(v) for k, v in meta.items()} #sanatize the meta (fixes Path and other issues)
-            print("METAS: \n\n")
-            print(meta)
-            metadatas.append(meta)
-            
+            metadatas.append(self._build_metadata(c, ingested_at))
+
+        return ids, documents, embeddings, metadatas
+
+    def _build_metadata(self, c: Dict[str, Any], ingested_at: Optional[float] = None) -> Dict[str, Any]:
+        raw_hp = c.get("heading_path", [])
+        heading_path = _flatten_heading_path(raw_hp)
+        
+        meta = {
+            "document_name": c.get("document_name", ""),
+            "document_path": c.get("document_path", ""),
+            "heading_path": heading_path,
+            "tokens": c.get("tokens")
+        }
+        
+        m = c.get("metadata", {}) or {}
+        meta["chunk_index"] = m.get("chunk_index")
+        meta["tags"] = m.get("tags", "")
+        # JSON, not _clean_meta_value's ", " join: a link target may itself contain ", "
+        links = m.get("links") or []
+        meta["links"] = json.dumps(list(links)) if links else None
+        if ingested_at is not None:
+            meta["ingested_at"] = ingested_at
+        return {k: _clean_meta_value(v) for k, v in meta.items()} #sanatize the meta (fixes Path and other issues)
+
+    def existing_ids(self, ids: List[str]) -> Set[str]:
+        """The subset of `ids` already stored (chunk ids are content-addressed, see chunker.chunk_id)."""
+        if not ids:
+            return set()
+        return set(self.collection.get(ids=list(ids), include=[]).get("ids") or [])
+
+    def document_chunk_ids(self, document_path: str | Path) -> List[str]:
+        """Ids of every chunk currently stored for `document_path`."""
+        res = self.collection.get(where={"document_path": str(document_path)}, include=[])
+        return list(res.get("ids") or [])
+
+    def replace_document(self, document_path: str | Path, chunks: List[Dict[str, Any]]) -> int:
+        """Make `chunks` the complete set of chunks stored for `document_path`.
+
+        The new set is written as one upsert and only then are the note's leftover
+        chunks (ids not in the new set) deleted, so the note never drops out of
+        query results mid-replace. Every written chunk carries an `ingested_at`
+        stamp, which is what `vacuum` uses to spot leftovers if the delete is lost.
+
+        Chunks marked `reused` (their id, and so their text, is already stored) carry
+        no embedding; only their metadata — position and stamp — is updated.
+
+        Returns:
+            int: number of stale chunks removed.
+        """
+        return self.replace_documents({str(document_path): chunks})
+
+    def replace_documents(self, docs: Dict[str, List[Dict[str, Any]]]) -> int:
+        """Batched `replace_document`: one lookup, one upsert and one delete for many notes."""
+        if not docs:
+            return 0
+
+        doc_paths = [str(p) for p in docs]
+        where = (
+            {"document_path": doc_paths[0]}
+            if len(doc_paths) == 1
+            else {"document_path": {"$in": doc_paths}}
+        )
+        previous = set(self.collection.get(where=where, include=[]).get("ids") or [])
+
+        # before the write, so the version bump that follows also covers the new links
+        self._mirror(self.links, "set_many", {
+            str(path): {link for c in chunks for link in (c.get("metadata") or {}).get("links", [])}
+            for path, chunks in docs.items()
+        })
+        written = self.write_chunks([c for chunks in docs.values() for c in chunks], ingested_at=time.time())
+
+        stale = sorted(previous - written)
+        self.delete_ids(stale)
+        return len(stale)
+
+    def write_chunks(self, chunks: List[Dict[str, Any]], ingested_at: float) -> Set[str]:
+        """Upsert fresh chunks and re-stamp reused ones; no stale cleanup. Returns the ids written.
+
+        The building block of `replace_documents`, and of streaming a huge note in
+        batches (see note_stream), where every batch shares one `ingested_at`.
+        """
+        reused = [c for c in chunks if c.get("reused") and "embeddings" not in c]
+        fresh = [c for c in chunks if not (c.get("reused") and "embeddings" not in c)]
+
+        ids, documents, embeddings, metadatas = self._build_records(fresh, ingested_at=ingested_at)
+        try:
+            if ids:
+                self.collection.upsert(
+                    ids=ids,
+                    documents=documents,
+                    embeddings=embeddings,
+                    metadatas=metadatas,
+                )
+                self._mirror(self.fts, "upsert", ids, documents, metadatas)
+            if reused:
+                reused_ids = [c["chunk_id"] for c in reused]
+                reused_metas = [self._build_metadata(c, ingested_at=ingested_at) for c in reused]
+                self.collection.update(ids=reused_ids, metadatas=reused_metas)
+                self._mirror(self.fts, "upsert", reused_ids, [c["text"] for c in reused], reused_metas)
+        finally:
+            self._bump_version()
+        return set(ids) | {c["chunk_id"] for c in reused}
+
+    def delete_ids(self, ids: List[str], page_size: int = 5000) -> None:
         if not ids:
-            print("No valid chunks to upsert after processing; exiting. (Missing ID's)")
             return
-        
         try:
-            self.collection.upsert(
-                ids=ids,
-                documents=documents,
-                embeddings=embeddings,
-                metadatas=metadatas
-            )
+            for start in range(0, len(ids), page_size):
+                self.collection.delete(ids=ids[start:start + page_size])
+            self._mirror(self.fts, "delete_ids", ids)
+        finally:
+            self._bump_version()
+
+    def vacuum(self, valid_paths: Optional[Set[str]] = None, page_size: int = 5000) -> int:
+        """Find and delete orphaned chunks across the whole collection.
+
+        A chunk is orphaned if its note no longer exists (on disk, or in `valid_paths`
+        when given) or if a newer `replace_document` generation exists for the same
+        note and this chunk wasn't part of it.
+
+        Returns:
+            int: number of chunks deleted.
+        """
+        by_doc: Dict[str, List[Tuple[str, float]]] = {}
+        offset = 0
+        while True:
+            page = self.collection.get(include=["metadatas"], limit=page_size, offset=offset)
+            page_ids = page.get("ids") or []
+            if not page_ids:
+                break
+            for cid, meta in zip(page_ids, page.get("metadatas") or []):
+                meta = meta or {}
+                stamp = meta.get("ingested_at")
+                by_doc.setdefault(str(meta.get("document_path", "")), []).append(
+                    (cid, float(stamp) if stamp is not None else -1.0)
+                )
+            offset += len(page_ids)
+
+        orphans: List[str] = []
+        for doc_path, entries in by_doc.items():
+            exists = (doc_path in valid_paths) if valid_paths is not None else (bool(doc_path) and Path(doc_path).exists())
+            if not exists:
+                orphans.extend(cid for cid, _ in entries)
+                continue
+            newest = max(stamp for _, stamp in entries)
+            orphans.extend(cid for cid, stamp in entries if stamp < newest)
+
+        self.delete_ids(orphans, page_size=page_size)
+        return len(orphans)
+
+    def rebuild_fts(self, page_size: int = 5000) -> int:
+        """Refill the full-text index from the collection (e.g. one ingested before it existed).
+
+        Returns:
+            int: number of chunks indexed.
+        """
+        if self.fts is None:
+            return 0
+        # cleared first: a mirror write failing during the rebuild marks it stale again
+        self._stale_marker(self.fts).unlink(missing_ok=True)
+        self.fts.clear()
+        indexed = 0
+        offset = 0
+        while True:
+            page = self.collection.get(include=["documents", "metadatas"], limit=page_size, offset=offset)
+            page_ids = page.get("ids") or []
+            if not page_ids:
+                break
+            self.fts.upsert(page_ids, page.get("documents") or [], page.get("metadatas") or [])
+            indexed += len(page_ids)
+            offset += len(page_ids)
+        self._bump_version()
+        return indexed
+
+    def rebuild_links(self, page_size: int = 5000) -> int:
+        """Refill the link graph from the `links` metadata of the stored chunks.
+
+        Returns:
+            int: number of notes indexed.
+        """
+        if self.links is None:
+            return 0
+        self._stale_marker(self.links).unlink(missing_ok=True)
+        by_doc: Dict[str, Set[str]] = {}
+        offset = 0
+        while True:
+            page = self.collection.get(include=["metadatas"], limit=page_size, offset=offset)
+            page_ids = page.get("ids") or []
+            if not page_ids:
+                break
+            for meta in page.get("metadatas") or []:
+                meta = meta or {}
+                doc = str(meta.get("document_path") or "")
+                if doc:
+                    by_doc.setdefault(doc, set()).update(_stored_links(meta.get("links")))
+            offset += len(page_ids)
+        self.links.clear()
+        self.links.set_many(by_doc)
+        self._bump_version()
+        return len(by_doc)
+
+    def chunks_for_documents(
+        self, document_paths: List[str], per_document: int = 1
+    ) -> Dict[str, List[Tuple[str, str, Dict[str, Any]]]]:
+        """The first `per_document` chunks (by chunk_index) of each note: (id, text, metadata).
+
+        A metadata lookup, not a similarity search.
+        """
+        if not document_paths or per_document <= 0:
+            return {}
+        where: Dict[str, Any] = (
+            {"document_path": document_paths[0]}
+            if len(document_paths) == 1
+            else {"document_path": {"$in": list(document_paths)}}
+        )
+        where = {"$and": [where, {"chunk_index": {"$lt": per_document}}]}
+        res = self.collection.get(where=where, include=["documents", "metadatas"])
+        out: Dict[str, List[Tuple[str, str, Dict[str, Any]]]] = {}
+        for cid, doc, meta in zip(res.get("ids") or [], res.get("documents") or [], res.get("metadatas") or []):
+            meta = meta or {}
+            out.setdefault(str(meta.get("document_path", "")), []).append((cid, doc, meta))
+        for rows in out.values():
+            rows.sort(key=lambda r: r[2].get("chunk_index") or 0)
+        return out
+
+    def search_text(
+        self, query_texts: List[str], n_results: int = 5, where: Optional[Dict[str, Any]] = None
+    ):
+        """Keyword (BM25) search, shaped like `query`'s result (scores in place of distances).
+
+        No embedding call. Returns None if the full-text index is disabled.
+        """
+        if self.fts is None:
+            return None
+        out: Dict[str, List[List[Any]]] = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        for text in query_texts:
+            hits = self.fts.search(text, limit=n_results, where=where)
+            out["ids"].append([h.chunk_id for h in hits])
+            out["documents"].append([h.text for h in hits])
+            out["metadatas"].append([h.metadata for h in hits])
+            out["distances"].append([h.score for h in hits])
+        return out
+
+    def delete_document(self, document_path: str | Path) -> None:
+        """Remove every chunk that was ingested from `document_path`."""
+        try:
+            self.collection.delete(where={"document_path": str(document_path)})
+            self._mirror(self.fts, "delete_document", document_path)
+            self._mirror(self.links, "remove", document_path)
         except Exception as e:
-            print(f"Error during upsert: {e}")
-    
+            print(f"Error during delete: {e}")
+        finally:
+            self._bump_version()
+
     def query(
         self,
         query_texts: List[str],
         n_results: int = 5,
         where: Optional[Dict[str, Any]] = None,
         embedder: EmbeddingModel = None,
+        query_embeddings: Optional[List[List[float]]] = None,
     ):
-        if not embedder:
-            embedder = EmbeddingModel(batch_size=32)
+        """Nearest chunks to each query. Pass `query_embeddings` (one per text) to skip embedding."""
         try:
-            query_vecs = [embedder.embed_query(t) for t in query_texts]
+            if query_embeddings is not None:
+                query_vecs = query_embeddings
+            else:
+                if not embedder:
+                    embedder = EmbeddingModel(batch_size=32)
+                query_vecs = embedder.embed_queries(list(query_texts))
             if query_vecs is None or len(query_vecs) == 0:
                 print("Failed to generate embeddings for query texts.")
                 return None
@@ -117,6 +453,14 @@ class ChromaVectorStore:
         
         
         
+def open_vector_store(collection_name: Optional[str] = None) -> ChromaVectorStore:
+    """The store backend REFLECTION_VECTOR_STORE selects: "chroma" (default) or "flat"."""
+    if get_settings().vector_store == "flat":
+        from modules.vectors.index.flat_store import FlatVectorStore
+        return FlatVectorStore(collection_name=collection_name)
+    return ChromaVectorStore(collection_name=collection_name)
+
+
 def _clean_meta_value(v):
     if isinstance(v, Path):
         return str(v)
@@ -129,6 +473,19 @@ def _clean_meta_value(v):
         return v
     return str(v)  # last resort
 
+def _stored_links(raw: Any) -> List[str]:
+    """The link targets of a chunk's `links` metadata, as written by `_build_metadata`."""
+    if not raw:
+        return []
+    raw = str(raw)
+    if raw.startswith("["):
+        try:
+            return [str(l) for l in json.loads(raw)]
+        except ValueError:
+            pass
+    # chunks stored before links were JSON-encoded hold the ", "-joined display string
+    return [l.strip() for l in raw.split(", ") if l.strip()]
+
 def _flatten_heading_path(heading_path: Any) -> str | None:
     if heading_path is None:
         return None
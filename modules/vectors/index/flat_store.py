@@ -0,0 +1,404 @@
+# vectors/index/flat_store.py — exact cosine search over a memory-mapped float32 matrix
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from modules.vectors.index.chroma_store import ChromaVectorStore
+from modules.vectors.settings import get_settings
+
+# stay well under SQLite's bound-parameter limit
+_LOOKUP_BATCH = 500
+# rows the matrix file grows by at least, so small upserts don't remap it every time
+_MIN_GROWTH = 1024
+# a filter keeping fewer rows than this fraction gathers them; otherwise the whole matrix is scored
+_GATHER_FRACTION = 0.125
+
+
+def _normalized(vectors: np.ndarray) -> np.ndarray:
+    """Rows scaled to unit length, so a dot product is the cosine similarity (zero rows stay zero)."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+_COMPARISONS = {"$eq": "=", "$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}
+
+
+def _where_sql(where: Optional[Dict[str, Any]]) -> Tuple[str, List[Any]]:
+    """Chroma-style filter -> SQL condition over `chunks`, evaluated inside SQLite.
+
+    Same semantics as `fts_store.where_matches`: a missing key matches $ne / $nin and
+    nothing else. `document_path` is its own indexed column; any other key is read
+    from the metadata JSON with `json_extract`.
+    """
+    if not where:
+        return "1", []
+    parts: List[str] = []
+    params: List[Any] = []
+    for key, cond in where.items():
+        if key in ("$and", "$or"):
+            subs = [_where_sql(c) for c in cond]
+            if not subs:
+                parts.append("1" if key == "$and" else "0")
+                continue
+            parts.append("(" + (" AND " if key == "$and" else " OR ").join(sql for sql, _ in subs) + ")")
+            params.extend(p for _, sub_params in subs for p in sub_params)
+            continue
+
+        if key == "document_path":
+            field, field_params = "document_path", []
+        else:
+            field, field_params = "json_extract(metadata, ?)", ['$."' + key.replace('"', '\\"') + '"']
+        ops = cond if isinstance(cond, dict) else {"$eq": cond}
+        for op, arg in ops.items():
+            if op in _COMPARISONS:
+                parts.append(f"{field} {_COMPARISONS[op]} ?")
+                params.extend([*field_params, arg])
+            elif op == "$ne":
+                parts.append(f"({field} IS NULL OR {field} != ?)")
+                params.extend([*field_params, *field_params, arg])
+            elif op in ("$in", "$nin") and not arg:
+                parts.append("0" if op == "$in" else "1")
+            elif op == "$in":
+                parts.append(f"{field} IN ({','.join('?' * len(arg))})")
+                params.extend([*field_params, *arg])
+            elif op == "$nin":
+                parts.append(f"({field} IS NULL OR {field} NOT IN ({','.join('?' * len(arg))}))")
+                params.extend([*field_params, *field_params, *arg])
+            else:
+                # unknown operator: matches nothing, as in where_matches
+                parts.append("0")
+    return " AND ".join(parts) or "1", params
+
+
+class FlatCollection:
+    """The part of the chromadb `Collection` API the store uses, as a brute-force index.
+
+    Embeddings live in `vectors.f32`, one contiguous memory-mapped float32 matrix of
+    unit-length rows; ids, texts and metadata live in a sidecar SQLite table keyed by
+    matrix row. A query is one matrix product plus `argpartition`, so results are exact
+    (no HNSW recall loss) and opening the index is an mmap and one small SELECT.
+
+    Deleted rows are left in the matrix and handed out again by later upserts, so the
+    file never needs compacting. Metadata filters run inside SQLite (`_where_sql`), so
+    only the rows a call returns have their metadata JSON parsed in Python.
+    """
+
+    def __init__(self, directory: str | Path):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.vectors_path = self.directory / "vectors.f32"
+
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(self.directory / "meta.sqlite", check_same_thread=False, timeout=5)
+        self.conn.execute("PRAGMA journal_mode=WAL;")
+        self.conn.execute("PRAGMA busy_timeout=5000;")
+        self.conn.execute("PRAGMA synchronous=NORMAL;")
+
+        self._init_schema()
+
+        row = self.conn.execute("SELECT value FROM info WHERE key = 'dim'").fetchone()
+        self.dim: Optional[int] = int(row[0]) if row else None
+        self._matrix: Optional[np.memmap] = None
+        self._live = np.zeros(0, dtype=bool)
+        if self.dim is not None:
+            self._map(self.vectors_path.stat().st_size // (4 * self.dim) if self.vectors_path.exists() else 0)
+        rows = np.fromiter((r for (r,) in self.conn.execute("SELECT row FROM chunks")), dtype=np.int64)
+        self._live[rows] = True
+        # rows past the last live one were never written or were freed; either way they're free
+        self._end = int(rows.max()) + 1 if len(rows) else 0
+        self._free: List[int] = sorted(np.flatnonzero(~self._live[:self._end]).tolist(), reverse=True)
+
+    def _init_schema(self) -> None:
+        with self.conn:
+            self.conn.execute("""
+                    CREATE TABLE IF NOT EXISTS chunks (
+                        row INTEGER PRIMARY KEY,
+                        chunk_id TEXT UNIQUE NOT NULL,
+                        document_path TEXT NOT NULL,
+                        metadata TEXT NOT NULL,
+                        document TEXT NOT NULL
+                    );
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_chunks_doc ON chunks(document_path);")
+            self.conn.execute("""
+                    CREATE TABLE IF NOT EXISTS info (
+                        key TEXT PRIMARY KEY NOT NULL,
+                        value TEXT NOT NULL
+                    );
+            """)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._matrix is not None:
+                self._matrix.flush()
+                self._matrix = None
+            self.conn.close()
+
+    # ------------------------------------------------------------------
+    # Matrix
+    # ------------------------------------------------------------------
+
+    def _map(self, capacity: int) -> None:
+        """(Re)map the matrix file at `capacity` rows, growing the file if it is shorter."""
+        if self._matrix is not None:
+            self._matrix.flush()
+            self._matrix = None
+        with self.vectors_path.open("ab") as f:
+            if f.tell() < capacity * self.dim * 4:
+                f.truncate(capacity * self.dim * 4)
+        self._matrix = (
+            np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+            if capacity else None
+        )
+        live = np.zeros(capacity, dtype=bool)
+        n = min(capacity, len(self._live))
+        live[:n] = self._live[:n]
+        self._live = live
+
+    def _allocate(self, n: int) -> List[int]:
+        """`n` rows to write new chunks into: freed ones first, then fresh ones past the end."""
+        rows = [self._free.pop() for _ in range(min(n, len(self._free)))]
+        fresh = n - len(rows)
+        if fresh:
+            rows.extend(range(self._end, self._end + fresh))
+            self._end += fresh
+        capacity = len(self._live)
+        if self._end > capacity:
+            self._map(max(self._end, 2 * capacity, _MIN_GROWTH))
+        return rows
+
+    # ------------------------------------------------------------------
+    # Sidecar lookups
+    # ------------------------------------------------------------------
+
+    def _rows_of(self, ids: Sequence[str]) -> Dict[str, int]:
+        found: Dict[str, int] = {}
+        for start in range(0, len(ids), _LOOKUP_BATCH):
+            page = list(ids[start:start + _LOOKUP_BATCH])
+            found.update(self.conn.execute(
+                f"SELECT chunk_id, row FROM chunks WHERE chunk_id IN ({','.join('?' * len(page))})", page
+            ).fetchall())
+        return found
+
+    def _select(
+        self,
+        columns: Sequence[str],
+        ids: Optional[Sequence[str]] = None,
+        where: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+    ) -> List[tuple]:
+        """`SELECT row, <columns>` for `ids` and/or `where`, in row order."""
+        cond, params = _where_sql(where)
+        cols = ", ".join(("row", *columns))
+        if ids is None:
+            return self.conn.execute(
+                f"SELECT {cols} FROM chunks WHERE {cond} ORDER BY row LIMIT ? OFFSET ?",
+                [*params, -1 if limit is None else limit, offset or 0],
+            ).fetchall()
+        keys = list(dict.fromkeys(ids))
+        rows: List[tuple] = []
+        for start in range(0, len(keys), _LOOKUP_BATCH):
+            page = keys[start:start + _LOOKUP_BATCH]
+            rows.extend(self.conn.execute(
+                f"SELECT {cols} FROM chunks WHERE chunk_id IN ({','.join('?' * len(page))}) AND {cond}",
+                [*page, *params],
+            ).fetchall())
+        rows.sort()
+        return rows[offset or 0:][:limit]
+
+    # ------------------------------------------------------------------
+    # Collection API
+    # ------------------------------------------------------------------
+
+    def count(self) -> int:
+        with self._lock:
+            return int(np.count_nonzero(self._live))
+
+    def upsert(
+        self,
+        ids: Sequence[str],
+        documents: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        metadatas: Sequence[Dict[str, Any]],
+    ) -> None:
+        if not ids:
+            return
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if vectors.ndim != 2 or len(vectors) != len(ids):
+            raise ValueError(f"Expected {len(ids)} embeddings of one dimension, got shape {vectors.shape}")
+        with self._lock:
+            if self.dim is None:
+                self.dim = int(vectors.shape[1])
+                with self.conn:
+                    self.conn.execute("INSERT INTO info(key, value) VALUES ('dim', ?)", (str(self.dim),))
+                self._map(0)
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match the index ({self.dim})")
+
+            # a repeated id keeps its last occurrence, as in Chroma
+            last = {cid: i for i, cid in enumerate(ids)}
+            order = list(last.values())
+            rows_of = self._rows_of(list(last))
+            new = [cid for cid in last if cid not in rows_of]
+            rows_of.update(zip(new, self._allocate(len(new))))
+            rows = [rows_of[ids[i]] for i in order]
+
+            # vectors first: a crash before the commit leaves unreferenced rows, which are free
+            self._matrix[rows] = _normalized(vectors[order])
+            self._matrix.flush()
+            with self.conn:
+                self.conn.executemany(
+                    """
+                    INSERT INTO chunks(row, chunk_id, document_path, metadata, document) VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(chunk_id) DO UPDATE SET
+                        document_path = excluded.document_path,
+                        metadata = excluded.metadata,
+                        document = excluded.document
+                    """,
+                    [
+                        (row, ids[i], str(_meta(metadatas[i]).get("document_path", "")),
+                         json.dumps(_meta(metadatas[i]), default=str), documents[i] or "")
+                        for row, i in zip(rows, order)
+                    ],
+                )
+            self._live[rows] = True
+
+    def update(self, ids: Sequence[str], metadatas: Sequence[Dict[str, Any]]) -> None:
+        """Merge `metadatas` into the stored metadata of `ids` (a None value drops the key)."""
+        with self._lock:
+            current = {cid: json.loads(meta) for _, cid, meta in self._select(("chunk_id", "metadata"), ids)}
+            changes = []
+            for cid, new in zip(ids, metadatas):
+                if cid not in current:
+                    continue
+                meta = current[cid]
+                meta.update(new or {})
+                meta = _meta(meta)
+                changes.append((str(meta.get("document_path", "")), json.dumps(meta, default=str), cid))
+            with self.conn:
+                self.conn.executemany(
+                    "UPDATE chunks SET document_path = ?, metadata = ? WHERE chunk_id = ?", changes
+                )
+
+    def get(
+        self,
+        ids: Optional[Sequence[str]] = None,
+        where: Optional[Dict[str, Any]] = None,
+        include: Sequence[str] = ("documents", "metadatas"),
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        with_docs, with_metas = "documents" in include, "metadatas" in include
+        columns = ["chunk_id"] + (["document"] if with_docs else []) + (["metadata"] if with_metas else [])
+        with self._lock:
+            rows = self._select(columns, ids, where, limit=limit, offset=offset)
+        return {
+            "ids": [r[1] for r in rows],
+            "documents": [r[2] for r in rows] if with_docs else None,
+            "metadatas": [json.loads(r[-1]) for r in rows] if with_metas else None,
+        }
+
+    def delete(self, ids: Optional[Sequence[str]] = None, where: Optional[Dict[str, Any]] = None) -> None:
+        with self._lock:
+            if ids is not None and not where:
+                rows = list(self._rows_of(list(ids)).values())
+            else:
+                rows = [r[0] for r in self._select((), ids, where)]
+            if not rows:
+                return
+            with self.conn:
+                for start in range(0, len(rows), _LOOKUP_BATCH):
+                    page = rows[start:start + _LOOKUP_BATCH]
+                    self.conn.execute(f"DELETE FROM chunks WHERE row IN ({','.join('?' * len(page))})", page)
+            self._live[rows] = False
+            self._free.extend(rows)
+            self._free.sort(reverse=True)
+
+    def query(
+        self,
+        query_embeddings: Sequence[Sequence[float]],
+        n_results: int = 10,
+        where: Optional[Dict[str, Any]] = None,
+        include: Sequence[str] = ("documents", "metadatas", "distances"),
+    ) -> Dict[str, Any]:
+        """Exact top-`n_results` by cosine distance (1 - cosine similarity, as Chroma's cosine space)."""
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        if queries.ndim == 1:
+            queries = queries[None, :]
+        out: Dict[str, List[List[Any]]] = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        with self._lock:
+            if self.dim is not None and queries.shape[1] != self.dim:
+                raise ValueError(f"Query dimension {queries.shape[1]} does not match the index ({self.dim})")
+            if where:
+                candidates = np.fromiter((r[0] for r in self._select((), where=where)), dtype=np.int64)
+            else:
+                candidates = np.flatnonzero(self._live[:self._end])
+            k = min(n_results, len(candidates))
+            if k <= 0:
+                for key in out:
+                    out[key] = [[] for _ in queries]
+                return out
+
+            # one (rows x queries) product for the whole batch
+            if len(candidates) < _GATHER_FRACTION * self._end:
+                # a selective filter: copying its few rows is cheaper than scoring them all
+                scores = self._matrix[candidates] @ _normalized(queries).T
+            else:
+                # score the mapped matrix in place; freed and filtered-out rows can never win
+                scores = self._matrix[:self._end] @ _normalized(queries).T
+                keep = np.zeros(self._end, dtype=bool)
+                keep[candidates] = True
+                scores[~keep] = -np.inf
+                candidates = np.arange(self._end)
+            top = np.argpartition(-scores, k - 1, axis=0)[:k] if k < len(candidates) else np.tile(
+                np.arange(len(candidates))[:, None], (1, len(queries))
+            )
+            hits = []
+            for q in range(len(queries)):
+                best = top[np.argsort(-scores[top[:, q], q], kind="stable"), q]
+                hits.append([(int(candidates[i]), float(1.0 - scores[i, q])) for i in best])
+
+            wanted = sorted({row for per_query in hits for row, _ in per_query})
+            by_row: Dict[int, tuple] = {}
+            for start in range(0, len(wanted), _LOOKUP_BATCH):
+                page = wanted[start:start + _LOOKUP_BATCH]
+                for row, cid, doc, meta in self.conn.execute(
+                    f"SELECT row, chunk_id, document, metadata FROM chunks WHERE row IN ({','.join('?' * len(page))})",
+                    page,
+                ):
+                    by_row[row] = (cid, doc, json.loads(meta))
+
+        for per_query in hits:
+            out["ids"].append([by_row[row][0] for row, _ in per_query])
+            out["documents"].append([by_row[row][1] for row, _ in per_query])
+            out["metadatas"].append([by_row[row][2] for row, _ in per_query])
+            out["distances"].append([dist for _, dist in per_query])
+        return out
+
+
+def _meta(meta: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    # Chroma drops None-valued keys rather than storing them
+    return {k: v for k, v in (meta or {}).items() if v is not None}
+
+
+class FlatVectorStore(ChromaVectorStore):
+    """`ChromaVectorStore` on a `FlatCollection` instead of a chromadb collection.
+
+    Everything above the collection — replace/vacuum, the version counter, the
+    full-text and link-graph mirrors — is shared, so the two backends are drop-in
+    replacements. Exact search costs O(chunks) per query; meant for vaults up to
+    ~100k chunks, where it opens and answers faster than HNSW. One directory per
+    collection under REFLECTION_FLAT_INDEX_DIR; select it with REFLECTION_VECTOR_STORE=flat.
+    """
+
+    def _open_collection(self) -> FlatCollection:
+        self.persist_directory = get_settings().flat_index_dir
+        return FlatCollection(self.persist_directory / self.collection_name)
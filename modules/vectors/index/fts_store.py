@@ -0,0 +1,207 @@
+# vectors/index/fts_store.py — SQLite FTS5 full-text index over the stored chunks
+from __future__ import annotations
+
+import json
+import re
+import sqlite3
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from modules.vectors.settings import get_settings
+
+# stay well under SQLite's bound-parameter limit
+_DELETE_BATCH = 500
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+
+@dataclass
+class LexicalHit:
+    chunk_id: str
+    text: str
+    metadata: Dict[str, Any]
+    # SQLite's bm25(): lower (more negative) is a better match
+    score: float
+
+
+def fts_query(text: str) -> str:
+    """Free text -> FTS5 query: every word quoted (so no FTS syntax can leak in), OR-ed.
+
+    `parse_markdown_text` stays one quoted term, which FTS5 matches as the phrase
+    "parse markdown text"; BM25 then ranks chunks matching more / rarer terms first.
+    """
+    return " OR ".join(f'"{t}"' for t in dict.fromkeys(_TERM_RE.findall(text)))
+
+
+def where_matches(meta: Dict[str, Any], where: Optional[Dict[str, Any]]) -> bool:
+    """Evaluate a Chroma-style metadata filter ($eq/$ne/$gt/$gte/$lt/$lte/$in/$nin, $and/$or)."""
+    if not where:
+        return True
+    for key, cond in where.items():
+        if key == "$and":
+            if not all(where_matches(meta, c) for c in cond):
+                return False
+            continue
+        if key == "$or":
+            if not any(where_matches(meta, c) for c in cond):
+                return False
+            continue
+        value = meta.get(key)
+        ops = cond if isinstance(cond, dict) else {"$eq": cond}
+        for op, arg in ops.items():
+            try:
+                ok = {
+                    "$eq": lambda: value == arg,
+                    "$ne": lambda: value != arg,
+                    "$gt": lambda: value is not None and value > arg,
+                    "$gte": lambda: value is not None and value >= arg,
+                    "$lt": lambda: value is not None and value < arg,
+                    "$lte": lambda: value is not None and value <= arg,
+                    "$in": lambda: value in arg,
+                    "$nin": lambda: value not in arg,
+                }[op]()
+            except (KeyError, TypeError):
+                ok = False
+            if not ok:
+                return False
+    return True
+
+
+class FullTextIndex:
+    """BM25 keyword search over the same chunk ids (and texts) the vector store holds.
+
+    Exact terms — identifiers, formulas, course codes — that embeddings blur are found
+    here without a model call. `ChromaVectorStore` mirrors every write and delete into
+    it; one database per collection, under REFLECTION_FTS_DIR.
+
+    `chunks` holds id, path, metadata and text; `chunks_fts` is an external-content
+    FTS5 table over `chunks.text`, kept in step by triggers.
+    """
+
+    def __init__(self, db_path: str | Path | None = None, collection_name: Optional[str] = None):
+        config = get_settings()
+        name = collection_name or config.default_collection_name
+        self.db_path = Path(db_path) if db_path else config.fts_dir / f"{name}.sqlite"
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=5)
+        self.conn.execute("PRAGMA journal_mode=WAL;")
+        self.conn.execute("PRAGMA busy_timeout=5000;")
+        self.conn.execute("PRAGMA synchronous=NORMAL;")
+
+        self._init_schema()
+
+    def _init_schema(self) -> None:
+        with self.conn:
+            self.conn.execute("""
+                    CREATE TABLE IF NOT EXISTS chunks (
+                        rowid INTEGER PRIMARY KEY,
+                        chunk_id TEXT UNIQUE NOT NULL,
+                        document_path TEXT NOT NULL,
+                        metadata TEXT NOT NULL,
+                        text TEXT NOT NULL
+                    );
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_chunks_doc ON chunks(document_path);")
+            # raises sqlite3.OperationalError on a build without FTS5
+            self.conn.execute("""
+                    CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(
+                        text, content='chunks', content_rowid='rowid'
+                    );
+            """)
+            self.conn.execute("""
+                    CREATE TRIGGER IF NOT EXISTS chunks_ai AFTER INSERT ON chunks BEGIN
+                        INSERT INTO chunks_fts(rowid, text) VALUES (new.rowid, new.text);
+                    END;
+            """)
+            self.conn.execute("""
+                    CREATE TRIGGER IF NOT EXISTS chunks_ad AFTER DELETE ON chunks BEGIN
+                        INSERT INTO chunks_fts(chunks_fts, rowid, text) VALUES ('delete', old.rowid, old.text);
+                    END;
+            """)
+            self.conn.execute("""
+                    CREATE TRIGGER IF NOT EXISTS chunks_au AFTER UPDATE OF text ON chunks BEGIN
+                        INSERT INTO chunks_fts(chunks_fts, rowid, text) VALUES ('delete', old.rowid, old.text);
+                        INSERT INTO chunks_fts(rowid, text) VALUES (new.rowid, new.text);
+                    END;
+            """)
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def upsert(self, ids: Sequence[str], texts: Sequence[str], metadatas: Sequence[Dict[str, Any]]) -> None:
+        """Insert or replace chunks, given the same parallel lists Chroma gets."""
+        rows = [
+            (cid, str((meta or {}).get("document_path", "")), json.dumps(meta or {}, default=str), text or "")
+            for cid, text, meta in zip(ids, texts, metadatas)
+        ]
+        if not rows:
+            return
+        with self._lock, self.conn:
+            self.conn.executemany(
+                """
+                INSERT INTO chunks(chunk_id, document_path, metadata, text) VALUES (?, ?, ?, ?)
+                ON CONFLICT(chunk_id) DO UPDATE SET
+                    document_path = excluded.document_path,
+                    metadata = excluded.metadata,
+                    text = excluded.text
+                """,
+                rows,
+            )
+
+    def delete_ids(self, ids: Iterable[str]) -> None:
+        ids = list(ids)
+        with self._lock, self.conn:
+            for start in range(0, len(ids), _DELETE_BATCH):
+                page = ids[start:start + _DELETE_BATCH]
+                self.conn.execute(
+                    f"DELETE FROM chunks WHERE chunk_id IN ({','.join('?' * len(page))})", page
+                )
+
+    def delete_document(self, document_path: str | Path) -> None:
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM chunks WHERE document_path = ?", (str(document_path),))
+
+    def clear(self) -> None:
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM chunks")
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def search(self, query: str, limit: int = 10, where: Optional[Dict[str, Any]] = None) -> List[LexicalHit]:
+        """Best `limit` BM25 matches for the words in `query` (optionally filtered by `where`)."""
+        match = fts_query(query)
+        if not match or limit <= 0:
+            return []
+        sql = """
+            SELECT c.chunk_id, c.text, c.metadata, bm25(chunks_fts) AS score
+            FROM chunks_fts JOIN chunks c ON c.rowid = chunks_fts.rowid
+            WHERE chunks_fts MATCH ?
+            ORDER BY score
+        """
+        hits: List[LexicalHit] = []
+        with self._lock:
+            if not where:
+                rows = self.conn.execute(sql + " LIMIT ?", (match, limit)).fetchall()
+                return [LexicalHit(cid, text, json.loads(meta), score) for cid, text, meta, score in rows]
+            # filters are applied in rank order, so the cursor is only read as far as needed
+            for cid, text, meta, score in self.conn.execute(sql, (match,)):
+                meta = json.loads(meta)
+                if where_matches(meta, where):
+                    hits.append(LexicalHit(cid, text, meta, score))
+                    if len(hits) >= limit:
+                        break
+        return hits
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
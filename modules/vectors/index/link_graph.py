@@ -0,0 +1,169 @@
+# vectors/index/link_graph.py — note-to-note [[wikilink]] adjacency, with backlinks
+from __future__ import annotations
+
+import sqlite3
+import threading
+from pathlib import Path, PurePosixPath
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from modules.vectors.settings import get_settings
+
+# stay well under SQLite's bound-parameter limit
+_LOOKUP_BATCH = 500
+
+
+def link_key(target: str) -> str:
+    """`[[Folder/Note Name#Heading|alias]]` target -> "note name" (what links are matched on).
+
+    Obsidian resolves a bare name to a note with that file name anywhere in the vault;
+    matching on the lower-cased stem does the same. Two notes with the same name both
+    count as the target — there is no shortest-path disambiguation.
+    """
+    target = target.split("|", 1)[0].split("#", 1)[0].strip().replace("\\", "/")
+    name = PurePosixPath(target).name
+    if name.lower().endswith(".md"):
+        name = name[:-3]
+    return name.strip().lower()
+
+
+class LinkGraph:
+    """Persistent adjacency index of note links, maintained incrementally by the store.
+
+    `notes` maps each indexed note to its link key; `links` holds every note's
+    outgoing link keys, unresolved. Resolution is a join at lookup time, so a link to
+    a note that doesn't exist yet starts resolving the moment that note is ingested,
+    without rewriting anyone's links. Both directions are indexed:
+    `outlinks` / `backlinks` / `neighbors` are index lookups, never similarity searches.
+    """
+
+    def __init__(self, db_path: str | Path | None = None, collection_name: Optional[str] = None):
+        config = get_settings()
+        name = collection_name or config.default_collection_name
+        self.db_path = Path(db_path) if db_path else config.link_graph_dir / f"{name}.sqlite"
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=5)
+        self.conn.execute("PRAGMA journal_mode=WAL;")
+        self.conn.execute("PRAGMA busy_timeout=5000;")
+
+        self._init_schema()
+
+    def _init_schema(self) -> None:
+        with self.conn:
+            self.conn.execute("""
+                    CREATE TABLE IF NOT EXISTS notes (
+                        path TEXT PRIMARY KEY NOT NULL,
+                        key TEXT NOT NULL
+                    );
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_notes_key ON notes(key);")
+            self.conn.execute("""
+                    CREATE TABLE IF NOT EXISTS links (
+                        src TEXT NOT NULL,
+                        target_key TEXT NOT NULL,
+                        PRIMARY KEY (src, target_key)
+                    ) WITHOUT ROWID;
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_links_target ON links(target_key, src);")
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def set_links(self, path: str | Path, targets: Iterable[str]) -> None:
+        """Make `targets` (raw [[link]] texts) the complete set of links out of `path`."""
+        self.set_many({str(path): targets})
+
+    def set_many(self, docs: Dict[str, Iterable[str]]) -> None:
+        """`set_links` for many notes in one transaction."""
+        with self._lock, self.conn:
+            for path, targets in docs.items():
+                path = str(path)
+                keys = {link_key(t) for t in targets} - {""}
+                self.conn.execute(
+                    "INSERT INTO notes(path, key) VALUES (?, ?) ON CONFLICT(path) DO UPDATE SET key = excluded.key",
+                    (path, link_key(Path(path).name)),
+                )
+                self.conn.execute("DELETE FROM links WHERE src = ?", (path,))
+                self.conn.executemany(
+                    "INSERT INTO links(src, target_key) VALUES (?, ?)", ((path, k) for k in sorted(keys))
+                )
+
+    def remove(self, path: str | Path) -> None:
+        """Forget `path` and its outgoing links; links *to* it stay, unresolved."""
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM notes WHERE path = ?", (str(path),))
+            self.conn.execute("DELETE FROM links WHERE src = ?", (str(path),))
+
+    def clear(self) -> None:
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM notes")
+            self.conn.execute("DELETE FROM links")
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def outlinks(self, path: str | Path) -> List[str]:
+        """Indexed notes that `path` links to."""
+        with self._lock:
+            rows = self.conn.execute(
+                """
+                SELECT DISTINCT n.path FROM links l JOIN notes n ON n.key = l.target_key
+                WHERE l.src = ? AND n.path != l.src ORDER BY n.path
+                """,
+                (str(path),),
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def backlinks(self, path: str | Path) -> List[str]:
+        """Indexed notes that link to `path`."""
+        with self._lock:
+            rows = self.conn.execute(
+                """
+                SELECT DISTINCT l.src FROM notes n JOIN links l ON l.target_key = n.key
+                WHERE n.path = ? AND l.src != n.path ORDER BY l.src
+                """,
+                (str(path),),
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def neighbors(self, paths: Sequence[str | Path]) -> Dict[str, List[str]]:
+        """1-hop neighbourhood (both directions) of `paths`, excluding `paths` themselves.
+
+        Maps each neighbour to the notes of `paths` it is linked with, in `paths` order —
+        the more of them, the better an expansion candidate it is.
+        """
+        sources = list(dict.fromkeys(str(p) for p in paths))
+        order = {p: i for i, p in enumerate(sources)}
+        found: Dict[str, set] = {}
+        with self._lock:
+            for start in range(0, len(sources), _LOOKUP_BATCH):
+                page = sources[start:start + _LOOKUP_BATCH]
+                marks = ",".join("?" * len(page))
+                rows = self.conn.execute(
+                    f"""
+                    SELECT l.src AS origin, n.path AS other FROM links l JOIN notes n ON n.key = l.target_key
+                    WHERE l.src IN ({marks})
+                    UNION
+                    SELECT n.path AS origin, l.src AS other FROM notes n JOIN links l ON l.target_key = n.key
+                    WHERE n.path IN ({marks})
+                    """,
+                    page + page,
+                ).fetchall()
+                for origin, other in rows:
+                    found.setdefault(other, set()).add(origin)
+        return {
+            other: sorted(origins, key=order.__getitem__)
+            for other, origins in found.items()
+            if other not in order
+        }
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM notes").fetchone()[0]
@@ -0,0 +1,327 @@
+# vectors/index/manifest.py — what has been ingested, and from which version of each file
+from __future__ import annotations
+
+import hashlib
+import itertools
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from modules.vectors.settings import get_settings
+
+_RUN_HISTORY = 200
+# stay well under SQLite's bound-parameter limit
+_LOOKUP_BATCH = 500
+
+
+@dataclass
+class ManifestEntry:
+    path: str
+    size: int
+    mtime: float
+    content_hash: str
+    ingested_at: float = 0.0
+
+
+@dataclass
+class IngestRun:
+    """One engine run, checkpointed after every committed Chroma batch."""
+    id: int
+    root: str
+    status: str             # running | completed | cancelled | failed (a crash leaves "running")
+    started_at: float
+    files_total: int
+    files_done: int = 0
+    checkpoint_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+
+def file_digest(path: str | Path) -> str:
+    """sha256 of the raw file bytes."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class FileManifest:
+    """Persisted path -> (size, mtime, content hash) record of every ingested note.
+
+    A directory ingest compares the vault against this to decide which files are new,
+    changed, unchanged or gone, so only the difference goes through the pipeline.
+
+    Entries are written in the same transaction that checkpoints the current run, right
+    after each Chroma batch commits — so an interrupted ingest resumes from the last
+    committed batch instead of from file zero. Files that failed are kept in a separate
+    table until they ingest cleanly, which is what "retry errors" runs work from.
+
+    Scans (`begin_scan` / `mark_seen` / `iter_unseen_under`) keep the set of paths a
+    directory walk has seen in a temp table rather than in Python, so finding the
+    notes that vanished costs no memory per vault file.
+    """
+
+    def __init__(self, db_path: str | Path | None = None):
+        self.db_path = Path(db_path) if db_path else get_settings().manifest_path
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=5)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL;")
+        self.conn.execute("PRAGMA busy_timeout=5000;")
+        self._scan_ids = itertools.count(1)
+
+        self._init_schema()
+
+    def _init_schema(self) -> None:
+        with self.conn:
+            self.conn.execute("""
+                    CREATE TABLE IF NOT EXISTS files (
+                        path TEXT PRIMARY KEY NOT NULL,
+                        size INTEGER NOT NULL,
+                        mtime REAL NOT NULL,
+                        content_hash TEXT NOT NULL,
+                        ingested_at REAL NOT NULL
+                    );
+            """)
+            self.conn.execute("""
+                    CREATE TABLE IF NOT EXISTS runs (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        root TEXT NOT NULL,
+                        status TEXT NOT NULL,
+                        started_at REAL NOT NULL,
+                        files_total INTEGER NOT NULL,
+                        files_done INTEGER NOT NULL DEFAULT 0,
+                        checkpoint_at REAL,
+                        finished_at REAL
+                    );
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_runs_root ON runs(root, id);")
+            self.conn.execute("""
+                    CREATE TABLE IF NOT EXISTS failures (
+                        path TEXT PRIMARY KEY NOT NULL,
+                        run_id INTEGER,
+                        error TEXT NOT NULL,
+                        failed_at REAL NOT NULL
+                    );
+            """)
+            # per connection, never persisted
+            self.conn.execute("""
+                    CREATE TEMP TABLE IF NOT EXISTS scan_seen (
+                        scan_id INTEGER NOT NULL,
+                        path TEXT NOT NULL,
+                        PRIMARY KEY (scan_id, path)
+                    ) WITHOUT ROWID;
+            """)
+
+    def close(self) -> None:
+        try:
+            self.conn.close()
+        except Exception:
+            pass
+
+    @staticmethod
+    def _row_to_entry(row: sqlite3.Row) -> ManifestEntry:
+        return ManifestEntry(
+            path=row["path"],
+            size=row["size"],
+            mtime=row["mtime"],
+            content_hash=row["content_hash"],
+            ingested_at=row["ingested_at"],
+        )
+
+    def get(self, path: str | Path) -> Optional[ManifestEntry]:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT * FROM files WHERE path = ? LIMIT 1;", (str(path),)
+            ).fetchone()
+        return self._row_to_entry(row) if row is not None else None
+
+    def get_many(self, paths: Sequence[str | Path]) -> Dict[str, ManifestEntry]:
+        """Entries for whichever of `paths` are recorded, keyed by path."""
+        keys = [str(p) for p in paths]
+        out: Dict[str, ManifestEntry] = {}
+        for start in range(0, len(keys), _LOOKUP_BATCH):
+            part = keys[start:start + _LOOKUP_BATCH]
+            with self._lock:
+                rows = self.conn.execute(
+                    f"SELECT * FROM files WHERE path IN ({','.join('?' * len(part))})", part
+                ).fetchall()
+            out.update((row["path"], self._row_to_entry(row)) for row in rows)
+        return out
+
+    def entries_under(self, root: str | Path) -> Dict[str, ManifestEntry]:
+        """All entries whose path lives inside `root` (recursively), keyed by path."""
+        root_str = str(root).rstrip("/\\")
+        # substr() instead of LIKE so '%' / '_' in folder names aren't treated as wildcards
+        with self._lock:
+            rows = self.conn.execute(
+                """
+                SELECT * FROM files
+                WHERE substr(path, 1, ?) = ? AND substr(path, ? + 1, 1) IN ('/', '\\')
+                """,
+                (len(root_str), root_str, len(root_str)),
+            ).fetchall()
+        return {row["path"]: self._row_to_entry(row) for row in rows}
+
+    def record(self, entry: ManifestEntry) -> None:
+        self.record_many([entry])
+
+    def record_many(self, entries: Iterable[ManifestEntry], run_id: Optional[int] = None) -> None:
+        """Upsert entries; with `run_id`, also advance that run's checkpoint atomically."""
+        now = time.time()
+        rows = [
+            (e.path, e.size, e.mtime, e.content_hash, e.ingested_at or now)
+            for e in entries
+        ]
+        if not rows:
+            return
+        with self._lock, self.conn:
+            # a clean ingest clears any earlier failure for the same note
+            self.conn.executemany("DELETE FROM failures WHERE path = ?", [(r[0],) for r in rows])
+            if run_id is not None:
+                self.conn.execute(
+                    "UPDATE runs SET files_done = files_done + ?, checkpoint_at = ? WHERE id = ?",
+                    (len(rows), now, run_id),
+                )
+            self.conn.executemany(
+                """
+                INSERT INTO files (path, size, mtime, content_hash, ingested_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(path) DO UPDATE SET
+                    size = excluded.size,
+                    mtime = excluded.mtime,
+                    content_hash = excluded.content_hash,
+                    ingested_at = excluded.ingested_at
+                """,
+                rows,
+            )
+
+    def remove_many(self, paths: Iterable[str | Path]) -> int:
+        keys = [(str(p),) for p in paths]
+        if not keys:
+            return 0
+        with self._lock, self.conn:
+            cur = self.conn.executemany("DELETE FROM files WHERE path = ?", keys)
+            removed = cur.rowcount
+            self.conn.executemany("DELETE FROM failures WHERE path = ?", keys)
+        return removed
+
+    # ------------------------------------------------------------------
+    # Scans: which recorded notes did a directory walk not see?
+    # ------------------------------------------------------------------
+
+    def begin_scan(self) -> int:
+        return next(self._scan_ids)
+
+    def mark_seen(self, scan_id: int, paths: Iterable[str | Path]) -> None:
+        rows = [(scan_id, str(p)) for p in paths]
+        if not rows:
+            return
+        with self._lock, self.conn:
+            self.conn.executemany("INSERT OR IGNORE INTO scan_seen (scan_id, path) VALUES (?, ?)", rows)
+
+    def iter_unseen_under(self, scan_id: int, root: str | Path, page_size: int = 1000) -> Iterator[List[str]]:
+        """Pages of recorded paths inside `root` that scan `scan_id` never marked as seen.
+
+        Keyset-paged, so the caller may remove each page from the manifest before
+        asking for the next one.
+        """
+        root_str = str(root).rstrip("/\\")
+        after = ""
+        while True:
+            with self._lock:
+                rows = self.conn.execute(
+                    """
+                    SELECT path FROM files
+                    WHERE substr(path, 1, ?) = ? AND substr(path, ? + 1, 1) IN ('/', '\\')
+                      AND path > ?
+                      AND NOT EXISTS (SELECT 1 FROM scan_seen s WHERE s.scan_id = ? AND s.path = files.path)
+                    ORDER BY path
+                    LIMIT ?
+                    """,
+                    (len(root_str), root_str, len(root_str), after, scan_id, page_size),
+                ).fetchall()
+            if not rows:
+                return
+            page = [row["path"] for row in rows]
+            after = page[-1]
+            yield page
+
+    def end_scan(self, scan_id: int) -> None:
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM scan_seen WHERE scan_id = ?", (scan_id,))
+
+    # ------------------------------------------------------------------
+    # Runs (checkpoints) and failures
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _row_to_run(row: sqlite3.Row) -> IngestRun:
+        return IngestRun(**{k: row[k] for k in row.keys()})
+
+    def begin_run(self, root: str | Path, files_total: int) -> int:
+        with self._lock, self.conn:
+            cur = self.conn.execute(
+                "INSERT INTO runs (root, status, started_at, files_total) VALUES (?, 'running', ?, ?)",
+                (str(root), time.time(), files_total),
+            )
+            # only the latest run per root matters; keep a short history and drop the rest
+            self.conn.execute("DELETE FROM runs WHERE id <= ?", (cur.lastrowid - _RUN_HISTORY,))
+        return cur.lastrowid
+
+    def finish_run(self, run_id: int, status: str) -> None:
+        with self._lock, self.conn:
+            self.conn.execute(
+                "UPDATE runs SET status = ?, finished_at = ? WHERE id = ?",
+                (status, time.time(), run_id),
+            )
+
+    def last_run(self, root: str | Path) -> Optional[IngestRun]:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT * FROM runs WHERE root = ? ORDER BY id DESC LIMIT 1;", (str(root),)
+            ).fetchone()
+        return self._row_to_run(row) if row is not None else None
+
+    def record_failures(self, failures: Iterable[Tuple[str | Path, str]], run_id: Optional[int] = None) -> None:
+        now = time.time()
+        rows = [(str(p), run_id, err, now) for p, err in failures]
+        if not rows:
+            return
+        with self._lock, self.conn:
+            self.conn.executemany(
+                """
+                INSERT INTO failures (path, run_id, error, failed_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT(path) DO UPDATE SET
+                    run_id = excluded.run_id,
+                    error = excluded.error,
+                    failed_at = excluded.failed_at
+                """,
+                rows,
+            )
+
+    def failed_paths(self, root: str | Path | None = None) -> List[str]:
+        """Notes whose last ingest attempt failed (optionally only those inside `root`)."""
+        with self._lock:
+            if root is None:
+                rows = self.conn.execute("SELECT path FROM failures ORDER BY path").fetchall()
+            else:
+                root_str = str(root).rstrip("/\\")
+                rows = self.conn.execute(
+                    """
+                    SELECT path FROM failures
+                    WHERE substr(path, 1, ?) = ? AND substr(path, ? + 1, 1) IN ('/', '\\')
+                    ORDER BY path
+                    """,
+                    (len(root_str), root_str, len(root_str)),
+                ).fetchall()
+        return [row["path"] for row in rows]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
@@ -0,0 +1,121 @@
+# vectors/ingest_context.py — long-lived parser / embedder / store handles for ingestion
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from modules.vectors.components.e_model import EmbeddingModel
+from modules.vectors.components.parser import MarkdownNoteParser
+from modules.vectors.index.chroma_store import ChromaVectorStore, open_vector_store
+from modules.vectors.ingest_engine import start_parse_pool
+
+
+class IngestionContext:
+    """Warm handles shared by every ingest that goes through one VectorService.
+
+    Building an `EmbeddingModel` means an `lms.embedding_model` lookup and building a
+    store opens a `PersistentClient` (or maps the flat index); doing that per file is pure
+    overhead. Handles are created on first use and kept until `close()`.
+    """
+
+    _HANDLES = ("parser", "embedder", "store")
+
+    def __init__(self, store: Optional[ChromaVectorStore] = None):
+        self._lock = threading.Lock()
+        self._handles: Dict[str, Any] = {}
+        self._created_at: Dict[str, float] = {}
+        self._last_used: Dict[str, float] = {}
+        self._uses: Dict[str, int] = {}
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_workers = 0
+        # a store passed in belongs to the caller; close() leaves it alone
+        self._owns_store = store is None
+        if store is not None:
+            self._adopt("store", store)
+
+    def _adopt(self, name: str, handle: Any) -> None:
+        self._handles[name] = handle
+        self._created_at[name] = time.time()
+        self._uses[name] = 0
+
+    def _get(self, name: str, factory: Callable[[], Any]) -> Any:
+        with self._lock:
+            if name not in self._handles:
+                self._adopt(name, factory())
+            self._uses[name] += 1
+            self._last_used[name] = time.time()
+            return self._handles[name]
+
+    @property
+    def parser(self) -> MarkdownNoteParser:
+        return self._get("parser", MarkdownNoteParser)
+
+    @property
+    def embedder(self) -> EmbeddingModel:
+        return self._get("embedder", EmbeddingModel)
+
+    @property
+    def store(self) -> ChromaVectorStore:
+        return self._get("store", open_vector_store)
+
+    def parse_pool(self, workers: int) -> ProcessPoolExecutor:
+        """The parse/chunk worker processes, started on first use and kept until `close()`.
+
+        Starting a worker means a fresh interpreter importing mistune and tiktoken, so
+        paying that once per process instead of once per watcher batch or job matters.
+        """
+        with self._lock:
+            pool = self._pool
+            # a worker that died (e.g. killed for memory) breaks the whole pool for good
+            if pool is not None and (self._pool_workers != workers or getattr(pool, "_broken", False)):
+                pool.shutdown(wait=False, cancel_futures=True)
+                pool = None
+            if pool is None:
+                pool = self._pool = start_parse_pool(workers)
+                self._pool_workers = workers
+            return pool
+
+    def warm(self) -> None:
+        """Create every handle now (e.g. from a background thread) instead of on first ingest."""
+        for name in self._HANDLES:
+            getattr(self, name)
+
+    def close(self) -> None:
+        """Drop the handles (the store only if this context created it) and stop the parse workers."""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+                self._pool = None
+            for name in list(self._handles):
+                if name == "store" and not self._owns_store:
+                    continue
+                self._handles.pop(name, None)
+                self._created_at.pop(name, None)
+                self._last_used.pop(name, None)
+                self._uses.pop(name, None)
+
+    def __enter__(self) -> "IngestionContext":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def lifetimes(self) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Per-handle created/last-used timestamps, age and use count (None if not created yet)."""
+        now = time.time()
+        with self._lock:
+            out: Dict[str, Optional[Dict[str, Any]]] = {}
+            for name in self._HANDLES:
+                if name not in self._handles:
+                    out[name] = None
+                    continue
+                created = self._created_at[name]
+                out[name] = {
+                    "created_at": created,
+                    "last_used": self._last_used.get(name),
+                    "age_s": now - created,
+                    "uses": self._uses[name],
+                }
+            return out
@@ -0,0 +1,461 @@
+# vectors/ingest_engine.py — staged, parallel directory ingestion
+from __future__ import annotations
+
+import hashlib
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import traceback
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from modules.vectors.settings import get_settings
+from modules.vectors.components.chunker import chunk_elements
+from modules.vectors.components.e_model import EmbeddingModel
+from modules.vectors.components.parser import MarkdownNoteParser
+from modules.vectors.index.chroma_store import ChromaVectorStore
+from modules.vectors.metrics import IngestMetrics
+from modules.vectors.note_stream import stream_note
+
+# Below this many files the process pool's start-up cost outweighs what it saves.
+_MIN_FILES_FOR_POOL = 8
+
+_DONE = object()
+
+
+def start_parse_pool(workers: int) -> ProcessPoolExecutor:
+    """A process pool for the parse/chunk stage.
+
+    Spawn, never fork: the host process already runs the webview, watcher and job
+    threads, and a forked child could inherit a lock one of them was holding.
+    """
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+@dataclass
+class FileResult:
+    """Outcome of one file going through the engine.
+
+    size/mtime/content_hash describe the exact bytes that were parsed, so the
+    manifest records the version that actually made it into the store.
+    """
+    path: Path
+    chunks: List[Dict[str, Any]] = field(default_factory=list, repr=False)
+    chunk_count: int = 0
+    size: int = 0
+    mtime: float = 0.0
+    content_hash: str = ""
+    error: Optional[str] = None
+    cancelled: bool = False
+    # chunks already stored with the same id (same text), so not re-embedded
+    reused: int = 0
+    # too big to parse whole in a worker; streamed by the engine after the pipelined run
+    deferred: bool = False
+    # time spent in each stage-1 step, measured inside the worker
+    read_s: float = 0.0
+    parse_s: float = 0.0
+    chunk_s: float = 0.0
+
+
+# ----------------------------------------------------------------------
+# Stage 1: parse + chunk (runs in worker processes)
+# ----------------------------------------------------------------------
+
+_worker_parser: Optional[MarkdownNoteParser] = None
+
+
+def _parse_and_chunk(
+    path_str: str,
+    parser: Optional[MarkdownNoteParser] = None,
+    stream_threshold: Optional[int] = None,
+) -> FileResult:
+    """Read, parse and chunk one note. Top-level so it pickles into pool workers.
+
+    Pool workers keep one parser per process; inline callers can pass their own.
+    Notes over `stream_threshold` bytes come back unread with `deferred=True`.
+    """
+    global _worker_parser
+    path = Path(path_str)
+    result = FileResult(path=path)
+    try:
+        started = time.perf_counter()
+        with open(path, "rb") as f:
+            st = os.fstat(f.fileno())
+            if stream_threshold is not None and st.st_size > stream_threshold:
+                result.deferred = True
+                return result
+            raw = f.read()
+        result.size = st.st_size
+        result.mtime = st.st_mtime
+        result.content_hash = hashlib.sha256(raw).hexdigest()
+        result.read_s = time.perf_counter() - started
+
+        text = raw.decode("utf-8")
+        if not text.strip():
+            result.error = f"{path}: file is empty"
+            return result
+
+        if parser is None:
+            if _worker_parser is None:
+                _worker_parser = MarkdownNoteParser()
+            parser = _worker_parser
+        started = time.perf_counter()
+        elements = parser.parse_markdown_text(text)
+        result.parse_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        result.chunks = chunk_elements(elements=elements, doc_name=path.name, doc_path=path_str)
+        result.chunk_count = len(result.chunks)
+        result.chunk_s = time.perf_counter() - started
+        if not result.chunks:
+            result.error = f"{path}: returned no chunks"
+    except Exception as e:
+        result.error = f"{path}: {e}"
+    return result
+
+
+class IngestionEngine:
+    """Three-stage pipeline for ingesting many notes at once.
+
+    parse/chunk  — process pool (`workers` processes), results flow into a bounded queue
+    embed        — the calling thread, chunks pooled across files into full batches
+    write        — a single writer thread that batches `replace_documents` calls
+
+    Only the writer thread writes to the store; the embed thread just reads from it
+    (`existing_ids`, to skip chunks already stored verbatim). The bounded queues keep
+    a fast parser from piling up an entire vault's worth of chunks in memory ahead of the embedder.
+    Notes over `stream_threshold` bytes skip the pipeline: once it has drained they
+    are streamed one at a time (`note_stream.stream_note`) in bounded batches.
+    Per-stage time and counts accumulate in `metrics` across `run` calls.
+    """
+
+    def __init__(
+        self,
+        store: ChromaVectorStore,
+        embedder: Optional[EmbeddingModel] = None,
+        parser: Optional[MarkdownNoteParser] = None,
+        workers: Optional[int] = None,
+        parse_queue_depth: Optional[int] = None,
+        write_queue_depth: Optional[int] = None,
+        upsert_batch_size: Optional[int] = None,
+        stream_threshold: Optional[int] = None,
+        on_committed: Optional[Callable[[List[FileResult]], None]] = None,
+        on_progress: Optional[Callable[[FileResult], None]] = None,
+        cancel: Optional[threading.Event] = None,
+        reuse_embeddings: bool = True,
+        pool_provider: Optional[Callable[[int], Executor]] = None,
+    ):
+        config = get_settings()
+        self.store = store
+        self.embedder = embedder
+        self.parser = parser
+        self.workers = config.ingest_workers if workers is None else workers
+        self.parse_queue_depth = max(1, config.ingest_parse_queue_depth if parse_queue_depth is None else parse_queue_depth)
+        self.write_queue_depth = max(1, config.ingest_write_queue_depth if write_queue_depth is None else write_queue_depth)
+        self.upsert_batch_size = max(1, config.ingest_upsert_batch_size if upsert_batch_size is None else upsert_batch_size)
+        self.stream_threshold = config.ingest_stream_threshold_bytes if stream_threshold is None else stream_threshold
+        self.on_committed = on_committed
+        # called once per file as soon as its outcome is final (from the embed or writer thread)
+        self.on_progress = on_progress
+        # set by the caller to stop feeding new files; anything already parsed still lands
+        self.cancel = cancel or threading.Event()
+        # skip embedding chunks whose content-addressed id is already in the store
+        self.reuse_embeddings = reuse_embeddings
+        # a long-lived pool (IngestionContext.parse_pool) that outlives the run; without
+        # one, every run starts its own worker processes and shuts them down at the end
+        self.pool_provider = pool_provider
+
+        self.metrics = IngestMetrics()
+        self._stop = threading.Event()
+
+    def run(self, paths: Sequence[Path]) -> List[FileResult]:
+        """Ingest `paths` and return one FileResult per path, in input order."""
+        paths = list(paths)
+        if not paths:
+            return []
+
+        self._stop.clear()
+        self._deferred: List[FileResult] = []
+        results: Dict[str, FileResult] = {}
+        parsed_q: queue.Queue = queue.Queue(maxsize=self.parse_queue_depth)
+        write_q: queue.Queue = queue.Queue(maxsize=self.write_queue_depth)
+
+        feeder = threading.Thread(target=self._feed, args=(paths, parsed_q), name="ingest-parse", daemon=True)
+        writer = threading.Thread(target=self._write, args=(write_q, results), name="ingest-write", daemon=True)
+        feeder.start()
+        writer.start()
+
+        try:
+            self._embed_stage(parsed_q, write_q, results)
+        finally:
+            self._stop.set()
+            self._put(write_q, _DONE, force=True)
+            writer.join()
+            feeder.join()
+
+        # the writer is gone, so this thread is the only one talking to the store again
+        for res in self._deferred:
+            if self.cancel.is_set():
+                break
+            self._stream(res, results)
+
+        out: List[FileResult] = []
+        for p in paths:
+            res = results.get(str(p))
+            if res is None:
+                res = (
+                    FileResult(path=p, cancelled=True)
+                    if self.cancel.is_set()
+                    else FileResult(path=p, error=f"{p}: ingestion did not complete")
+                )
+            out.append(res)
+        return out
+
+    # ------------------------------------------------------------------
+    # Stages
+    # ------------------------------------------------------------------
+
+    def _feed(self, paths: List[Path], out_q: queue.Queue) -> None:
+        try:
+            if self.workers <= 0 or len(paths) < _MIN_FILES_FOR_POOL:
+                for p in paths:
+                    if self._stop.is_set() or self.cancel.is_set():
+                        break
+                    self._put(out_q, _parse_and_chunk(str(p), self.parser, self.stream_threshold))
+                return
+
+            if self.pool_provider is not None:
+                self._parse_in_pool(self.pool_provider(self.workers), paths, out_q)
+            else:
+                with start_parse_pool(self.workers) as pool:
+                    self._parse_in_pool(pool, paths, out_q)
+        except Exception:
+            traceback.print_exc()
+        finally:
+            # not forced: if the embed stage already bailed out nobody is left to read it
+            self._put(out_q, _DONE)
+
+    def _parse_in_pool(self, pool: Executor, paths: List[Path], out_q: queue.Queue) -> None:
+        pending = iter(paths)
+        inflight: set[Future] = set()
+        # keep every worker busy plus one queued task each, never the whole vault
+        max_inflight = self.workers * 2
+        while not (self._stop.is_set() or self.cancel.is_set()):
+            for p in pending:
+                inflight.add(pool.submit(_parse_and_chunk, str(p), None, self.stream_threshold))
+                if len(inflight) >= max_inflight:
+                    break
+            if not inflight:
+                break
+            done, inflight = wait(inflight, return_when=FIRST_COMPLETED)
+            for fut in done:
+                self._put(out_q, fut.result())
+        for fut in inflight:
+            fut.cancel()
+
+    def _embed_stage(self, in_q: queue.Queue, write_q: queue.Queue, results: Dict[str, FileResult]) -> None:
+        """Pool chunks from many files into full embedding batches.
+
+        Most notes are 1–3 chunks, so embedding per file would send LM Studio a
+        near-empty request per note. Instead chunks queue up FIFO across files,
+        go out `batch_size` at a time, and a file moves on to the writer once its
+        last chunk has a vector. A partial batch is only sent when the parse stage
+        has gone quiet or finished. Chunks already in the store are never queued.
+        """
+        if self.embedder is None:
+            self.embedder = EmbeddingModel()
+
+        def batch_size() -> int:
+            # re-read every time: an adaptive embedder retunes its size as it goes
+            return max(1, int(getattr(self.embedder, "batch_size", 64) or 64))
+
+        waiting: deque[FileResult] = deque()          # files with chunks still lacking vectors
+        todo: deque[Tuple[FileResult, Dict[str, Any]]] = deque()  # those chunks, in order
+        pending: Dict[int, int] = {}                  # id(file) -> chunks still lacking vectors
+
+        def embed_next(n: int) -> None:
+            take = [todo.popleft() for _ in range(min(n, len(todo)))]
+            if not take:
+                return
+            try:
+                with self.metrics.timed("embed", items=len(take), tokens=sum(c.get("tokens", 0) for _, c in take)):
+                    vectors = self.embedder.embed([c["text"] for _, c in take])
+                if len(vectors) != len(take):
+                    raise ValueError(
+                        f"Embedding count mismatch: {len(vectors)} vectors for {len(take)} chunks"
+                    )
+                for (owner, chunk), vec in zip(take, vectors):
+                    chunk["embeddings"] = vec
+                    pending[id(owner)] -= 1
+            except Exception as e:
+                failed = {id(owner) for owner, _ in take}
+                for owner, _ in take:
+                    if owner.error is None:
+                        owner.error = f"{owner.path}: {e}"
+                # drop the rest of the failed files' chunks too
+                kept = [(o, c) for o, c in todo if id(o) not in failed]
+                todo.clear()
+                todo.extend(kept)
+
+            release()
+
+        def release() -> None:
+            # release finished (or failed) files, oldest first
+            while waiting:
+                head = waiting[0]
+                if head.error is None and pending[id(head)] > 0:
+                    break
+                waiting.popleft()
+                del pending[id(head)]
+                if head.error is not None:
+                    self._finish(results, head)
+                else:
+                    self._put(write_q, head, force=True)
+
+        while True:
+            try:
+                item = in_q.get(timeout=0.25) if todo else in_q.get()
+            except queue.Empty:
+                # parsers are behind; don't sit on a partial batch
+                embed_next(len(todo))
+                continue
+
+            if item is _DONE:
+                while todo:
+                    embed_next(batch_size())
+                return
+
+            res: FileResult = item
+            if res.deferred:
+                self._deferred.append(res)
+                continue
+            self._record_parse(res)
+            if res.error is not None:
+                self._finish(results, res)
+                continue
+
+            if self.reuse_embeddings:
+                self._mark_reused(res)
+            waiting.append(res)
+            new = [(res, c) for c in res.chunks if not c.get("reused")]
+            pending[id(res)] = len(new)
+            todo.extend(new)
+            if not new:
+                release()
+            while len(todo) >= batch_size():
+                embed_next(batch_size())
+
+    def _write(self, in_q: queue.Queue, results: Dict[str, FileResult]) -> None:
+        batch: List[FileResult] = []
+        batch_chunks = 0
+
+        def flush():
+            nonlocal batch, batch_chunks
+            if not batch:
+                return
+            try:
+                with self.metrics.timed("upsert", items=batch_chunks):
+                    self.store.replace_documents({str(r.path): r.chunks for r in batch})
+            except Exception as e:
+                for r in batch:
+                    r.error = f"{r.path}: upsert failed: {e}"
+            for r in batch:
+                r.chunks = []  # vectors are in Chroma now; don't hold them until the run ends
+            committed = [r for r in batch if r.error is None]
+            if committed and self.on_committed is not None:
+                try:
+                    self.on_committed(committed)
+                except Exception:
+                    traceback.print_exc()
+            for r in batch:
+                self._finish(results, r)
+            batch = []
+            batch_chunks = 0
+
+        while True:
+            try:
+                # an idle embedder shouldn't leave finished files sitting unwritten
+                item = in_q.get(timeout=0.5)
+            except queue.Empty:
+                flush()
+                continue
+            if item is _DONE:
+                flush()
+                return
+            batch.append(item)
+            batch_chunks += item.chunk_count
+            if batch_chunks >= self.upsert_batch_size:
+                flush()
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def _stream(self, res: FileResult, results: Dict[str, FileResult]) -> None:
+        """Ingest one deferred (huge) note through the bounded streaming path."""
+        try:
+            streamed = stream_note(
+                res.path,
+                parser=self.parser or MarkdownNoteParser(),
+                embedder=self.embedder,
+                store=self.store,
+                batch_size=self.upsert_batch_size,
+                reuse_embeddings=self.reuse_embeddings,
+                metrics=self.metrics,
+            )
+            res.size, res.mtime, res.content_hash = streamed.size, streamed.mtime, streamed.content_hash
+            res.chunk_count, res.reused = streamed.chunk_count, streamed.reused
+        except Exception as e:
+            res.error = f"{res.path}: {e}"
+        if res.error is None and self.on_committed is not None:
+            try:
+                self.on_committed([res])
+            except Exception:
+                traceback.print_exc()
+        self._finish(results, res)
+
+    def _record_parse(self, res: FileResult) -> None:
+        if not res.content_hash:
+            return  # never got as far as reading the file
+        self.metrics.add("read", res.read_s, items=1, bytes=res.size)
+        self.metrics.add("parse", res.parse_s, items=1)
+        self.metrics.add("chunk", res.chunk_s, items=res.chunk_count,
+                         tokens=sum(c.get("tokens", 0) for c in res.chunks))
+
+    def _mark_reused(self, res: FileResult) -> None:
+        """Flag the chunks of `res` that are already stored verbatim (same content-addressed id)."""
+        try:
+            have = self.store.existing_ids([c["chunk_id"] for c in res.chunks])
+        except Exception:
+            traceback.print_exc()
+            return
+        for c in res.chunks:
+            if c["chunk_id"] in have:
+                c["reused"] = True
+        res.reused = sum(1 for c in res.chunks if c.get("reused"))
+
+    def _finish(self, results: Dict[str, FileResult], res: FileResult) -> None:
+        results[str(res.path)] = res
+        if self.on_progress is not None:
+            try:
+                self.on_progress(res)
+            except Exception:
+                traceback.print_exc()
+
+    def _put(self, q: queue.Queue, item: Any, force: bool = False) -> None:
+        """Blocking put that gives up once the run is stopping (unless `force`)."""
+        while True:
+            try:
+                q.put(item, timeout=0.2)
+                return
+            except queue.Full:
+                if self._stop.is_set() and not force:
+                    return
+
+    def stop(self) -> None:
+        self._stop.set()
@@ -0,0 +1,185 @@
+# vectors/jobs.py — background ingestion jobs with progress events
+from __future__ import annotations
+
+import queue
+import threading
+import time
+import traceback
+import uuid
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from modules.vectors.VectorService import IngestProgress, IngestSummary, VectorService
+
+
+@dataclass
+class IngestJob:
+    id: str
+    kind: str                       # "directory" | "files"
+    targets: List[str]
+    force: bool = False
+    retry_errors: bool = False
+    status: str = "queued"          # queued | running | cancelling | completed | cancelled | failed
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    progress: Optional[IngestProgress] = None
+    summary: Optional[IngestSummary] = None
+    error: Optional[str] = None
+    cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+    _last_emit: float = field(default=0.0, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "cancelled", "failed")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "targets": self.targets,
+            "retry_errors": self.retry_errors,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "progress": asdict(self.progress) if self.progress else None,
+            "summary": asdict(self.summary) if self.summary else None,
+            "error": self.error,
+        }
+
+
+class IngestJobManager:
+    """Runs ingests on a background thread so bridge calls return immediately.
+
+    Jobs run one at a time, in submission order — two engines writing to the same
+    Chroma collection at once would only fight over it. Every state change and
+    (throttled) progress update is handed to `on_event` as a plain dict.
+    """
+
+    def __init__(
+        self,
+        service: VectorService,
+        on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+        emit_interval_s: float = 0.25,
+        keep_finished: int = 20,
+    ):
+        self.service = service
+        self.on_event = on_event
+        self.emit_interval_s = emit_interval_s
+        self.keep_finished = keep_finished
+
+        self._jobs: Dict[str, IngestJob] = {}
+        self._lock = threading.Lock()
+        self._queue: queue.Queue[IngestJob] = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def start_directory(self, dir_path: str | Path, force: bool = False, retry_errors: bool = False) -> str:
+        return self._submit(IngestJob(
+            id=str(uuid.uuid4()), kind="directory", targets=[str(dir_path)], force=force, retry_errors=retry_errors
+        ))
+
+    def start_files(self, file_paths: List[str | Path]) -> str:
+        return self._submit(IngestJob(id=str(uuid.uuid4()), kind="files", targets=[str(p) for p in file_paths]))
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.to_dict() if job else None
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [j.to_dict() for j in sorted(self._jobs.values(), key=lambda j: j.created_at)]
+
+    def cancel(self, job_id: str) -> bool:
+        """Request cancellation. A queued job never starts; a running one stops after in-flight files."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.finished:
+                return False
+            job.cancel_event.set()
+            if job.status == "queued":
+                job.status = "cancelled"
+                job.finished_at = time.time()
+            else:
+                job.status = "cancelling"
+        self._emit(job, force=True)
+        return True
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _submit(self, job: IngestJob) -> str:
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._work_loop, name="ingest-jobs", daemon=True)
+                self._worker.start()
+        self._queue.put(job)
+        self._emit(job, force=True)
+        return job.id
+
+    def _prune(self) -> None:
+        finished = sorted((j for j in self._jobs.values() if j.finished), key=lambda j: j.finished_at or 0)
+        for job in finished[: max(0, len(finished) - self.keep_finished)]:
+            del self._jobs[job.id]
+
+    def _work_loop(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job.cancel_event.is_set():
+                continue
+            self._run(job)
+
+    def _run(self, job: IngestJob) -> None:
+        with self._lock:
+            job.status = "running"
+            job.started_at = time.time()
+        self._emit(job, force=True)
+
+        def on_progress(p: IngestProgress) -> None:
+            job.progress = p
+            self._emit(job)
+
+        try:
+            if job.kind == "directory":
+                summary = self.service.ingest_directory(
+                    job.targets[0],
+                    force=job.force,
+                    progress=on_progress,
+                    cancel=job.cancel_event,
+                    retry_errors=job.retry_errors,
+                )
+            else:
+                summary = self.service.ingest_files(job.targets, progress=on_progress, cancel=job.cancel_event)
+            with self._lock:
+                job.summary = summary
+                job.status = "cancelled" if job.cancel_event.is_set() else "completed"
+        except Exception as e:
+            traceback.print_exc()
+            with self._lock:
+                job.error = str(e)
+                job.status = "failed"
+        with self._lock:
+            job.finished_at = time.time()
+        self._emit(job, force=True)
+
+    def _emit(self, job: IngestJob, force: bool = False) -> None:
+        if self.on_event is None:
+            return
+        now = time.monotonic()
+        if not force and now - job._last_emit < self.emit_interval_s:
+            return
+        job._last_emit = now
+        try:
+            self.on_event(job.to_dict())
+        except Exception as e:
+            # a closed window must not take the ingest down with it
+            print(f"[ingest-jobs] progress event dropped: {e}")
@@ -2,11 +2,17 @@ from modules.vectors.components.e_model import EmbeddingModel
 from modules.vectors.components.parser import MarkdownNoteParser
 from modules.vectors.components.chunker import chunk_elements
 from pathlib import Path
-import pandas as pd
-import sys
+from typing import Any, Dict, List
+import hashlib
+import stat
+import time
 import traceback
 
-from modules.vectors.index.chroma_store import ChromaVectorStore
+from modules.vectors.index.chroma_store import open_vector_store
+from modules.vectors.ingest_context import IngestionContext
+from modules.vectors.metrics import IngestMetrics
+from modules.vectors.note_stream import stream_note
+from modules.vectors.settings import get_settings
 class InvalidMarkdownFileError(Exception):
     pass
 class MarkdownParsingError(Exception):
@@ -21,78 +27,100 @@ class pipeline:
     content: str
     path: Path
 
-
-    def __init__(self, content):
-        self.content = content
-    
-    def __init__(self, i_path):
+    def __init__(self, i_path, context: IngestionContext | None = None):
         self.path       = i_path
-        self._validate_path(self.path)
-        self.content    = self.path.read_text(encoding="utf-8")
-        if self.content == "" or None:
-            raise InvalidMarkdownFileError(f"The file passed is empty or not readable at {self.path}. \nOutput content: {self.content}")
-        
+        # shared warm handles (VectorService passes its own); None builds fresh ones per call
+        self.context    = context
+        # per-stage time/counts for this file (read, parse, chunk, embed, upsert)
+        self.metrics    = IngestMetrics()
+        # one stat and one read per file; everything below is derived from these
+        started         = time.perf_counter()
+        st              = self._validate_path(self.path)
+        if st.st_size == 0:
+            raise InvalidMarkdownFileError(f"The file passed is empty or not readable at {self.path}.")
         self.filename   = self.path.name
-        self.size       = self.path.stat().st_size
+        self.size       = st.st_size
         self.stem       = self.path.stem
-        self.last_mod   = self.path.stat().st_mtime
-        self.create_at  = self.path.stat().st_ctime
-        self.abs_path   = self.path.resolve()
+        self.last_mod   = st.st_mtime
+        self.create_at  = st.st_ctime
+        # chunks whose embedding was already stored / chunks written (set by process_input_file)
+        self.reused     = 0
+        self.chunk_count = 0
 
+        # huge notes are streamed by process_input_file instead of being read whole here
+        self.streamed   = st.st_size > get_settings().ingest_stream_threshold_bytes
+        if self.streamed:
+            self.content = None
+            self.content_hash = ""
+            return
+
+        raw             = self.path.read_bytes()
+        self.metrics.add("read", time.perf_counter() - started, items=1, bytes=len(raw))
+        self.content    = raw.decode("utf-8")
+        self.content_hash = hashlib.sha256(raw).hexdigest()
+
+    @property
+    def abs_path(self) -> Path:
+        return self.path.resolve()
 
-        
-        
-        
-        
-    
     #Step 1 setup file and parse. 
-    #DEBUGGING
-    def process_input_file(self) -> pd.DataFrame:
-        #call parser
-        print("Starting pipeline for input file...")
-
-        print(f"[DEBUGGING] Debugging information: ",
-                f"Current file data: {self.content}"
-                f"Current filename: {self.filename}"
-            )
+    def process_input_file(self, keep_chunks: bool = True) -> List[Dict[str, Any]] | None:
+        """Parse, chunk, embed and store the note; returns its chunks (None on failure).
+
+        A streamed note only returns its chunks with `keep_chunks=True` — holding
+        them all is exactly what streaming avoids — so check `chunk_count` instead.
+        """
         try:
-            p = self.path
-            MdParser = MarkdownNoteParser()
-            parsed_md = MdParser.parse_markdown_file(path=p)
+            MdParser = self.context.parser if self.context else MarkdownNoteParser()
+            if self.streamed:
+                return self._stream(MdParser, keep_chunks)
+            # the text was already read in __init__; don't let the parser read the file again
+            with self.metrics.timed("parse", items=1):
+                parsed_md = MdParser.parse_markdown_text(self.content)
             if parsed_md == None:
                 raise MarkdownParsingError("The returned dictionary from the parser was empty or an error was thrown silently.")
-            
-            p_df = pd.DataFrame(parsed_md) #debugging use.
-            
-            
+
+            started = time.perf_counter()
             chunked_md = chunk_elements(elements=parsed_md, doc_name=self.filename, doc_path=self.path)
             if chunked_md == None:
                 raise MarkdownChunkingError("There was nothing returned from the chunking method or an error was thrown silently.")
-            # Debugging | c_df = pd.DataFrame(chunked_md)
+            self.metrics.add("chunk", time.perf_counter() - started, items=len(chunked_md),
+                             tokens=sum(c["tokens"] for c in chunked_md))
             
             
-            text_embedder = EmbeddingModel()
+            store = self.context.store if self.context else open_vector_store()
+
+            # chunk ids are content-addressed: an id already stored means the same text is too
+            have = store.existing_ids([c["chunk_id"] for c in chunked_md])
+            new_chunks = [c for c in chunked_md if c["chunk_id"] not in have]
+            for c in chunked_md:
+                if c["chunk_id"] in have:
+                    c["reused"] = True
+            self.reused = len(chunked_md) - len(new_chunks)
+
+            text_embedder = self.context.embedder if self.context else EmbeddingModel()
             if text_embedder == None:
                 raise ValueError("The embedding model failed to initialize.")
             
-            texts = [c["text"] for c in chunked_md]
-            vectors = text_embedder.embed(texts=texts)
+            texts = [c["text"] for c in new_chunks]
+            with self.metrics.timed("embed", items=len(texts), tokens=sum(c["tokens"] for c in new_chunks)):
+                vectors = text_embedder.embed(texts=texts) if texts else []
 
 
-            if len(vectors) != len(chunked_md):
+            if len(vectors) != len(new_chunks):
                 raise ValueError(
-                    f"Embedding count mismatch: {len(vectors)} vectors for {len(chunked_md)} chunks"
+                    f"Embedding count mismatch: {len(vectors)} vectors for {len(new_chunks)} chunks"
                 )
             
-            for chunk, vec in zip(chunked_md, vectors):
+            for chunk, vec in zip(new_chunks, vectors):
                 chunk["embeddings"] = vec
                 
-                
-            store = ChromaVectorStore()
             
-            store.upsert_chunks(chunked_md)
+            # replace, not upsert: a note that shrank must not leave its old tail chunks behind
+            with self.metrics.timed("upsert", items=len(chunked_md)):
+                store.replace_document(self.path, chunked_md)
 
-            print(f"Pipeline completed successfully for file: {self.filename}")
+            self.chunk_count = len(chunked_md)
             return chunked_md
 
         except Exception as e:
@@ -100,12 +128,35 @@ class pipeline:
             traceback.print_exc()
     
 
+    def _stream(self, parser: MarkdownNoteParser, keep_chunks: bool) -> List[Dict[str, Any]]:
+        kept: List[Dict[str, Any]] = []
+        res = stream_note(
+            self.path,
+            parser=parser,
+            embedder=self.context.embedder if self.context else EmbeddingModel(),
+            store=self.context.store if self.context else open_vector_store(),
+            batch_size=get_settings().ingest_upsert_batch_size,
+            metrics=self.metrics,
+            on_batch=kept.extend if keep_chunks else None,
+        )
+        # describe the bytes that were actually streamed, not the earlier stat
+        self.size = res.size
+        self.last_mod = res.mtime
+        self.content_hash = res.content_hash
+        self.reused = res.reused
+        self.chunk_count = res.chunk_count
+        return kept
+
     def _validate_path(self, path: Path):
+        """Check the path and return its stat result (the only stat the pipeline does)."""
         if not isinstance(path, Path):
             raise InvalidMarkdownFileError("Expected a pathlib.Path object.")
-        if not path.exists():
+        if path.suffix != ".md":
+            raise InvalidMarkdownFileError(f"Only .md files are supported: {path.name}")
+        try:
+            st = path.stat()
+        except FileNotFoundError:
             raise InvalidMarkdownFileError(f"Path does not exist: {path}")
-        if not path.is_file():
+        if not stat.S_ISREG(st.st_mode):
             raise InvalidMarkdownFileError(f"Path is not a file: {path}")
-        if path.suffix != ".md":
-            raise InvalidMarkdownFileError(f"Only .md files are supported: {path.name}")
\ No newline at end of file
+        return st
\ No newline at end of file
@@ -0,0 +1,171 @@
+# vectors/metrics.py — per-stage ingest timings/counters and their optional SQLite history
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from modules.vectors.settings import get_settings
+
+# in pipeline order; "scan" is the directory walk + manifest check, "total" the wall clock
+STAGES = ("scan", "read", "parse", "chunk", "embed", "upsert", "total")
+_COUNTERS = ("seconds", "items", "bytes", "tokens")
+
+# upper bounds (seconds) of the histogram buckets returned by MetricsStore.histograms
+_BUCKETS = (0.001, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, float("inf"))
+
+StageStats = Dict[str, Dict[str, float]]
+
+
+def merge_stages(a: StageStats, b: StageStats) -> StageStats:
+    """Counter-wise sum of two stage dicts."""
+    out = {stage: dict(vals) for stage, vals in a.items()}
+    for stage, vals in b.items():
+        dst = out.setdefault(stage, {k: 0 for k in _COUNTERS})
+        for k, v in vals.items():
+            dst[k] = dst.get(k, 0) + v
+    return out
+
+
+class IngestMetrics:
+    """Thread-safe accumulator: stage -> seconds / items / bytes / tokens.
+
+    Stage seconds are summed busy time. In the parallel engine several workers
+    parse at once, so parse+chunk seconds can exceed the run's wall clock; compare
+    them with "total" to see how well the stages overlapped.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: StageStats = {}
+
+    def add(self, stage: str, seconds: float = 0.0, items: int = 0, bytes: int = 0, tokens: int = 0) -> None:
+        with self._lock:
+            s = self._stages.setdefault(stage, {k: 0 for k in _COUNTERS})
+            s["seconds"] += seconds
+            s["items"] += items
+            s["bytes"] += bytes
+            s["tokens"] += tokens
+
+    @contextmanager
+    def timed(self, stage: str, items: int = 0, bytes: int = 0, tokens: int = 0) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - started, items=items, bytes=bytes, tokens=tokens)
+
+    def to_dict(self) -> StageStats:
+        with self._lock:
+            return {stage: dict(vals) for stage, vals in self._stages.items()}
+
+
+def _quantile(sorted_vals: List[float], q: float) -> Optional[float]:
+    if not sorted_vals:
+        return None
+    idx = min(len(sorted_vals) - 1, max(0, int(round(q * (len(sorted_vals) - 1)))))
+    return sorted_vals[idx]
+
+
+class MetricsStore:
+    """One row per stage per ingest run, for looking at how ingests behave over time."""
+
+    def __init__(self, db_path: str | Path | None = None):
+        self.db_path = Path(db_path) if db_path else get_settings().metrics_path
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=5)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL;")
+        self.conn.execute("PRAGMA busy_timeout=5000;")
+
+        self._init_schema()
+
+    def _init_schema(self) -> None:
+        with self.conn:
+            self.conn.execute("""
+                    CREATE TABLE IF NOT EXISTS ingest_metrics (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        run_at REAL NOT NULL,
+                        entry_point TEXT NOT NULL,
+                        files INTEGER NOT NULL,
+                        stage TEXT NOT NULL,
+                        seconds REAL NOT NULL,
+                        items INTEGER NOT NULL,
+                        bytes INTEGER NOT NULL,
+                        tokens INTEGER NOT NULL
+                    );
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_metrics_stage ON ingest_metrics(stage, run_at);")
+
+    def close(self) -> None:
+        try:
+            self.conn.close()
+        except Exception:
+            pass
+
+    def record(self, entry_point: str, files: int, stages: StageStats, run_at: Optional[float] = None) -> None:
+        run_at = time.time() if run_at is None else run_at
+        rows = [
+            (run_at, entry_point, files, stage,
+             float(v.get("seconds", 0)), int(v.get("items", 0)), int(v.get("bytes", 0)), int(v.get("tokens", 0)))
+            for stage, v in stages.items()
+        ]
+        if not rows:
+            return
+        with self._lock, self.conn:
+            self.conn.executemany(
+                """
+                INSERT INTO ingest_metrics (run_at, entry_point, files, stage, seconds, items, bytes, tokens)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                rows,
+            )
+
+    def histograms(self, since: Optional[float] = None, entry_point: Optional[str] = None) -> Dict[str, Any]:
+        """Per stage: run count, totals, p50/p95/max seconds, items/s and a seconds histogram."""
+        sql = "SELECT stage, seconds, items, bytes, tokens FROM ingest_metrics WHERE 1 = 1"
+        params: List[Any] = []
+        if since is not None:
+            sql += " AND run_at >= ?"
+            params.append(since)
+        if entry_point is not None:
+            sql += " AND entry_point = ?"
+            params.append(entry_point)
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+
+        by_stage: Dict[str, List[sqlite3.Row]] = {}
+        for row in rows:
+            by_stage.setdefault(row["stage"], []).append(row)
+
+        out: Dict[str, Any] = {}
+        for stage in sorted(by_stage, key=lambda s: STAGES.index(s) if s in STAGES else len(STAGES)):
+            stage_rows = by_stage[stage]
+            secs = sorted(r["seconds"] for r in stage_rows)
+            rates = sorted(r["items"] / r["seconds"] for r in stage_rows if r["seconds"] > 0 and r["items"])
+            counts = [0] * len(_BUCKETS)
+            for s in secs:
+                counts[next(i for i, le in enumerate(_BUCKETS) if s <= le)] += 1
+            out[stage] = {
+                "runs": len(stage_rows),
+                "totals": {k: sum(r[k] for r in stage_rows) for k in _COUNTERS},
+                "seconds": {
+                    "p50": _quantile(secs, 0.50),
+                    "p95": _quantile(secs, 0.95),
+                    "max": secs[-1] if secs else None,
+                    "buckets": [
+                        {"le": None if le == float("inf") else le, "count": c}
+                        for le, c in zip(_BUCKETS, counts)
+                    ],
+                },
+                "items_per_s": {
+                    "p50": _quantile(rates, 0.50),
+                    "p95": _quantile(rates, 0.95),
+                },
+            }
+        return out
@@ -0,0 +1,144 @@
+# vectors/note_stream.py — bounded-memory ingestion of one (possibly huge) note
+from __future__ import annotations
+
+import hashlib
+import os
+import time
+from dataclasses import dataclass
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from modules.vectors.components.chunker import iter_chunks
+from modules.vectors.metrics import IngestMetrics
+
+
+class NoteStreamError(Exception):
+    pass
+
+
+@dataclass
+class StreamedNote:
+    """What `stream_note` read and wrote; size/mtime/content_hash describe the bytes parsed."""
+    path: Path
+    size: int = 0
+    mtime: float = 0.0
+    content_hash: str = ""
+    chunk_count: int = 0
+    reused: int = 0
+    stale_removed: int = 0
+
+
+class _TimedIter:
+    """Wraps an iterator and adds the time spent producing each item to `seconds`."""
+
+    def __init__(self, it: Iterable[Any]):
+        self._it = iter(it)
+        self.seconds = 0.0
+
+    def __iter__(self) -> "_TimedIter":
+        return self
+
+    def __next__(self) -> Any:
+        started = time.perf_counter()
+        try:
+            return next(self._it)
+        finally:
+            self.seconds += time.perf_counter() - started
+
+
+def stream_note(
+    path: Path,
+    *,
+    parser: Any,
+    embedder: Any,
+    store: Any,
+    batch_size: int = 512,
+    reuse_embeddings: bool = True,
+    metrics: Optional[IngestMetrics] = None,
+    on_batch: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+) -> StreamedNote:
+    """Read -> parse -> chunk -> embed -> upsert one note, `batch_size` chunks at a time.
+
+    The file is read line by line, parsed section by section
+    (`MarkdownNoteParser.iter_markdown_elements`) and chunked lazily (`iter_chunks`),
+    so at any moment only one section, one chunk window and one batch of chunks with
+    their vectors are in memory — a 50 MB note costs about what a 5 MB one does.
+    Every batch carries the same `ingested_at` stamp; after the last batch the note's
+    links are recorded and its chunks that weren't rewritten are deleted, like
+    `replace_document` does.
+
+    `on_batch` sees every batch after it was written (vectors included).
+    Raises NoteStreamError for an empty note or one that yields no chunks.
+    """
+    path = Path(path)
+    metrics = metrics if metrics is not None else IngestMetrics()
+    result = StreamedNote(path=path)
+    hasher = hashlib.sha256()
+
+    def lines(f) -> Iterator[str]:
+        # '\n' never occurs inside a multi-byte UTF-8 sequence, so per-line decoding is safe
+        for raw in f:
+            hasher.update(raw)
+            result.size += len(raw)
+            yield raw.decode("utf-8")
+
+    stamp = time.time()
+    written: set[str] = set()
+    links: set[str] = set()
+    blank = True
+    with open(path, "rb") as f:
+        result.mtime = os.fstat(f.fileno()).st_mtime
+        previous = set(store.document_chunk_ids(path))
+
+        read_it = _TimedIter(lines(f))
+        parse_it = _TimedIter(parser.iter_markdown_elements(read_it))
+        chunk_it = _TimedIter(iter_chunks(parse_it, doc_name=path.name, doc_path=str(path)))
+        tokens = 0
+
+        while True:
+            batch = list(islice(chunk_it, batch_size))
+            if not batch:
+                break
+            blank = False
+
+            if reuse_embeddings:
+                have = store.existing_ids([c["chunk_id"] for c in batch])
+                for c in batch:
+                    if c["chunk_id"] in have:
+                        c["reused"] = True
+            new = [c for c in batch if not c.get("reused")]
+            if new:
+                with metrics.timed("embed", items=len(new), tokens=sum(c["tokens"] for c in new)):
+                    vectors = embedder.embed([c["text"] for c in new])
+                if len(vectors) != len(new):
+                    raise NoteStreamError(
+                        f"Embedding count mismatch: {len(vectors)} vectors for {len(new)} chunks"
+                    )
+                for c, vec in zip(new, vectors):
+                    c["embeddings"] = vec
+
+            with metrics.timed("upsert", items=len(batch)):
+                written |= store.write_chunks(batch, ingested_at=stamp)
+            result.chunk_count += len(batch)
+            result.reused += len(batch) - len(new)
+            tokens += sum(c["tokens"] for c in batch)
+            for c in batch:
+                links.update((c.get("metadata") or {}).get("links", []))
+            if on_batch is not None:
+                on_batch(batch)
+
+    # the iterators are nested: chunk time includes parse time, which includes the reads
+    metrics.add("read", read_it.seconds, items=1, bytes=result.size)
+    metrics.add("parse", parse_it.seconds - read_it.seconds, items=1)
+    metrics.add("chunk", chunk_it.seconds - parse_it.seconds, items=result.chunk_count, tokens=tokens)
+    result.content_hash = hasher.hexdigest()
+
+    if blank:
+        raise NoteStreamError(f"{path}: {'file is empty' if result.size == 0 else 'returned no chunks'}")
+
+    store.set_document_links(path, links)
+    stale = sorted(previous - written)
+    store.delete_ids(stale)
+    result.stale_removed = len(stale)
+    return result
@@ -5,7 +5,7 @@ import platform
 from dataclasses import dataclass
 from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Optional, Tuple
 
 
 APP_NAME = "reflection_etl"
@@ -36,9 +36,54 @@ class VectorsSettings:
     base_data_dir: Path
     chroma_dir: Path
     default_collection_name: str
+    vector_store: str
+    flat_index_dir: Path
+    fts_enabled: bool
+    fts_dir: Path
+    link_graph_enabled: bool
+    link_graph_dir: Path
+    link_expand_chunks_per_note: int
     
+    embedding_backend: str
+    local_embedding_dim: int
+    local_embedding_latency_s: float
+
     embedding_model: str
     embedding_batch_size: int
+    embedding_max_batch_tokens: int
+    embedding_adaptive_batching: bool
+    embedding_min_batch_size: int
+    embedding_max_batch_size: int
+    embedding_max_batch_latency_s: float
+
+    embedding_cache_enabled: bool
+    embedding_cache_path: Path
+    embedding_cache_max_entries: int
+    query_cache_max_entries: int
+    query_result_cache_max_entries: int
+    query_mode: str
+    query_rrf_k: int
+
+    manifest_path: Path
+
+    metrics_enabled: bool
+    metrics_path: Path
+
+    ingest_workers: int
+    ingest_parse_queue_depth: int
+    ingest_write_queue_depth: int
+    ingest_upsert_batch_size: int
+    ingest_stream_threshold_bytes: int
+
+    scan_ignore: Tuple[str, ...]
+    scan_gitignore: bool
+    scan_workers: int
+
+    vault_path: Optional[Path]
+    watch_debounce_s: float
+    watch_poll_interval_s: float
+    watch_queue_size: int
+    watch_ignore: Tuple[str, ...]
     
     @property
     def config_path(self) -> Path:
@@ -53,6 +98,13 @@ def _load_file_config(path: Path) -> Dict[str, Any]:
     except Exception:
         # don't let a bad config file kill the app
         return {}
+
+
+def _as_bool(value: Any) -> bool:
+    """Env vars arrive as strings, config.json values may already be bools."""
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    return bool(value)
     
     
 @lru_cache()
@@ -84,15 +136,129 @@ def get_settings() -> VectorsSettings:
     chroma_dir = Path(cfg("CHROMA_DIR", base_data_dir / "chroma"))
     chroma_dir.mkdir(parents=True, exist_ok=True)
 
-    collection_name = cfg("CHROMA_COLLECTION", "reflection_notes")
+    # "lmstudio" or "local" (deterministic hashed embeddings, no model server)
+    emb_backend = str(cfg("EMBEDDING_BACKEND", cfg("BACKEND", "lmstudio"))).strip().lower()
+    local_emb_dim = int(cfg("LOCAL_EMBEDDING_DIM", 768))
+    local_emb_latency = float(cfg("LOCAL_EMBEDDING_LATENCY_S", 0.0))
+
+    # hashed vectors must never share a collection with real ones
+    default_collection = "reflection_notes" if emb_backend == "lmstudio" else f"reflection_notes_{emb_backend}"
+    collection_name = cfg("CHROMA_COLLECTION", default_collection)
+
+    # "chroma" (HNSW, chromadb) or "flat" (exact search over a memory-mapped matrix, see flat_store)
+    vector_store = str(cfg("VECTOR_STORE", "chroma")).strip().lower()
+    flat_index_dir = Path(cfg("FLAT_INDEX_DIR", base_data_dir / "flat"))
+
+    # keyword (BM25) index mirrored from the vector store, one sqlite file per collection
+    fts_enabled = _as_bool(cfg("FTS_ENABLED", True))
+    fts_dir = Path(cfg("FTS_DIR", base_data_dir / "fts"))
+
+    # note-to-note [[link]] graph with backlinks, one sqlite file per collection
+    link_graph_enabled = _as_bool(cfg("LINK_GRAPH_ENABLED", True))
+    link_graph_dir = Path(cfg("LINK_GRAPH_DIR", base_data_dir / "graph"))
+    # chunks pulled in from each linked note when a query expands along links
+    link_expand_chunks_per_note = int(cfg("LINK_EXPAND_CHUNKS_PER_NOTE", 1))
 
     emb_model = cfg("EMBEDDING_MODEL", "text-embedding-nomic-embed-text-v1.5")
     emb_batch = int(cfg("EMBEDDING_BATCH_SIZE", 64))
+    # token budget per embedding request (cl100k tokens, prefix included); 0 = no limit
+    emb_max_batch_tokens = int(cfg("EMBEDDING_MAX_BATCH_TOKENS", 8192))
+    # tune the batch size from measured latency, within [min, max]
+    emb_adaptive = _as_bool(cfg("EMBEDDING_ADAPTIVE_BATCHING", True))
+    emb_min_batch = int(cfg("EMBEDDING_MIN_BATCH_SIZE", 1))
+    emb_max_batch = int(cfg("EMBEDDING_MAX_BATCH_SIZE", 256))
+    emb_max_latency = float(cfg("EMBEDDING_MAX_BATCH_LATENCY_S", 30.0))
+
+    cache_enabled = _as_bool(cfg("EMBEDDING_CACHE_ENABLED", True))
+    cache_path = Path(cfg("EMBEDDING_CACHE_PATH", base_data_dir / "cache" / "embed_cache.sqlite"))
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    cache_max_entries = int(cfg("EMBEDDING_CACHE_MAX_ENTRIES", 200_000))
+    # in-memory LRU of query vectors kept by VectorService; 0 disables it
+    query_cache_max_entries = int(cfg("QUERY_CACHE_MAX_ENTRIES", 1024))
+    # whole QueryResults, dropped whenever the collection changes; 0 disables it
+    query_result_cache_max_entries = int(cfg("QUERY_RESULT_CACHE_MAX_ENTRIES", 256))
+    # default retrieval: "vector", "hybrid" (BM25 + vector, reciprocal rank fusion) or "lexical"
+    query_mode = str(cfg("QUERY_MODE", "vector")).strip().lower()
+    query_rrf_k = int(cfg("QUERY_RRF_K", 60))
+
+    manifest_path = Path(cfg("MANIFEST_PATH", base_data_dir / "manifest.sqlite"))
+
+    # per-stage ingest timings are always in IngestSummary; this also keeps a history
+    metrics_enabled = _as_bool(cfg("METRICS_ENABLED", False))
+    metrics_path = Path(cfg("METRICS_PATH", base_data_dir / "metrics.sqlite"))
+
+    # parse/chunk worker processes; 0 parses inline on a single thread
+    ingest_workers = int(cfg("INGEST_WORKERS", max(1, (os.cpu_count() or 2) - 1)))
+    ingest_parse_queue_depth = int(cfg("INGEST_PARSE_QUEUE_DEPTH", 64))
+    ingest_write_queue_depth = int(cfg("INGEST_WRITE_QUEUE_DEPTH", 16))
+    ingest_upsert_batch_size = int(cfg("INGEST_UPSERT_BATCH_SIZE", 512))
+    # notes larger than this are streamed (line reads, per-section parse, batched upserts)
+    ingest_stream_threshold_bytes = int(cfg("INGEST_STREAM_THRESHOLD_BYTES", 4 * 1024 * 1024))
+
+    # vault scans: gitignore-style patterns skipped on top of the vault's own .gitignore
+    scan_ignore_cfg = cfg("SCAN_IGNORE", ".obsidian/,.trash/,.git/")
+    if isinstance(scan_ignore_cfg, str):
+        scan_ignore_cfg = scan_ignore_cfg.split(",")
+    scan_ignore = tuple(p.strip() for p in scan_ignore_cfg if p.strip())
+    scan_gitignore = _as_bool(cfg("SCAN_GITIGNORE", True))
+    # threads listing directories in parallel; 0 or 1 walks on the calling thread
+    scan_workers = int(cfg("SCAN_WORKERS", min(8, os.cpu_count() or 1)))
+
+    # vault watcher — disabled unless a vault path is configured
+    vault_path_cfg = cfg("VAULT_PATH", None)
+    vault_path = Path(vault_path_cfg).expanduser() if vault_path_cfg else None
+    # a note is re-ingested once it has had no saves for this long: long enough to fold an
+    # editor's autosave burst into one ingest, short enough that search catches up quickly
+    watch_debounce_s = float(cfg("WATCH_DEBOUNCE_S", 3.0))
+    watch_poll_interval_s = float(cfg("WATCH_POLL_INTERVAL_S", 5.0))
+    watch_queue_size = int(cfg("WATCH_QUEUE_SIZE", 256))
+    watch_ignore_cfg = cfg("WATCH_IGNORE", ".obsidian,.trash,.git")
+    if isinstance(watch_ignore_cfg, str):
+        watch_ignore_cfg = watch_ignore_cfg.split(",")
+    watch_ignore = tuple(name.strip() for name in watch_ignore_cfg if name.strip())
 
     return VectorsSettings(
         base_data_dir=base_data_dir,
         chroma_dir=chroma_dir,
         default_collection_name=collection_name,
+        vector_store=vector_store,
+        flat_index_dir=flat_index_dir,
+        fts_enabled=fts_enabled,
+        fts_dir=fts_dir,
+        link_graph_enabled=link_graph_enabled,
+        link_graph_dir=link_graph_dir,
+        link_expand_chunks_per_note=link_expand_chunks_per_note,
+        embedding_backend=emb_backend,
+        local_embedding_dim=local_emb_dim,
+        local_embedding_latency_s=local_emb_latency,
         embedding_model=emb_model,
         embedding_batch_size=emb_batch,
+        embedding_max_batch_tokens=emb_max_batch_tokens,
+        embedding_adaptive_batching=emb_adaptive,
+        embedding_min_batch_size=emb_min_batch,
+        embedding_max_batch_size=emb_max_batch,
+        embedding_max_batch_latency_s=emb_max_latency,
+        embedding_cache_enabled=cache_enabled,
+        embedding_cache_path=cache_path,
+        embedding_cache_max_entries=cache_max_entries,
+        query_cache_max_entries=query_cache_max_entries,
+        query_result_cache_max_entries=query_result_cache_max_entries,
+        query_mode=query_mode,
+        query_rrf_k=query_rrf_k,
+        manifest_path=manifest_path,
+        metrics_enabled=metrics_enabled,
+        metrics_path=metrics_path,
+        ingest_workers=ingest_workers,
+        ingest_parse_queue_depth=ingest_parse_queue_depth,
+        ingest_write_queue_depth=ingest_write_queue_depth,
+        ingest_upsert_batch_size=ingest_upsert_batch_size,
+        ingest_stream_threshold_bytes=ingest_stream_threshold_bytes,
+        scan_ignore=scan_ignore,
+        scan_gitignore=scan_gitignore,
+        scan_workers=scan_workers,
+        vault_path=vault_path,
+        watch_debounce_s=watch_debounce_s,
+        watch_poll_interval_s=watch_poll_interval_s,
+        watch_queue_size=watch_queue_size,
+        watch_ignore=watch_ignore,
     )
\ No newline at end of file
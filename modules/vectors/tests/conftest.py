@@ -5,6 +5,7 @@ import pytest
 # Normal imports — assume parser.py and chunker.py live in your root or package
 from modules.vectors.components.parser import MarkdownNoteParser
 from modules.vectors.components.chunker import chunk_elements
+from modules.vectors.settings import get_settings
 
 
 VAULT_PATH = Path(r"C:\Mob\test_note")
@@ -40,3 +41,12 @@ def test_chunk_vault_to_dataframe():
     print(f"Reconstructions saved to {RECON_DIR}")
     
     return df
+
+
+@pytest.fixture
+def temp_vectors_dir(monkeypatch, tmp_path):
+    data_dir = tmp_path / "reflection"
+    monkeypatch.setenv("REFLECTION_DATA_DIR", str(data_dir))
+    get_settings.cache_clear()
+    yield data_dir
+    get_settings.cache_clear()
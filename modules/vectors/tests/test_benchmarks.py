@@ -0,0 +1,57 @@
+import json
+import os
+
+from modules.vectors.benchmarks import bench_vault
+from modules.vectors.benchmarks.vault_gen import generate_vault
+
+
+def test_vault_generator_is_deterministic_and_obsidian_shaped(tmp_path):
+    a = generate_vault(tmp_path / "a", 40, seed=7)
+    b = generate_vault(tmp_path / "b", 40, seed=7)
+
+    notes_a = sorted(p.relative_to(a.root) for p in a.root.rglob("*.md"))
+    assert len(notes_a) == 40
+    assert notes_a == sorted(p.relative_to(b.root) for p in b.root.rglob("*.md"))
+    assert a.bytes == b.bytes and a.links > 0
+
+    text = "".join(p.read_text(encoding="utf-8") for p in a.root.rglob("*.md"))
+    for marker in ("\n# ", "\n## ", "[[", "#", "```", "\n- "):
+        assert marker in text
+
+
+def test_bench_vault_writes_json_report(tmp_path, monkeypatch):
+    monkeypatch.setenv("REFLECTION_DATA_DIR", str(tmp_path / "outer"))
+    monkeypatch.delenv("REFLECTION_EMBEDDING_BACKEND", raising=False)
+    out = tmp_path / "bench.json"
+
+    bench_vault.main(["--notes", "25", "--queries", "10", "--workers", "2", "--out", str(out),
+                      "--work-dir", str(tmp_path / "work")])
+
+    # the run's settings overrides are undone afterwards
+    assert os.environ["REFLECTION_DATA_DIR"] == str(tmp_path / "outer")
+    assert "REFLECTION_EMBEDDING_BACKEND" not in os.environ
+    report = json.loads(out.read_text(encoding="utf-8").splitlines()[-1])
+    run = report["runs"][0]
+    assert run["notes"] == 25 and run["chunks"] > 0 and run["errors"] == 0
+    assert {"scan", "read", "parse", "chunk", "embed", "upsert"} == set(run["stages"])
+    assert run["stages"]["embed"]["requests"] > 0 and run["ingest_s"] > 0
+    assert run["query"]["n"] == 10 and run["query"]["p99_ms"] >= run["query"]["p50_ms"]
+    assert run["peak_rss_mb"] is None or run["peak_rss_mb"] > 0
+
+
+def test_bench_store_compares_backends(tmp_path, monkeypatch):
+    from modules.vectors.benchmarks import bench_store
+
+    monkeypatch.delenv("REFLECTION_VECTOR_STORE", raising=False)
+    out = tmp_path / "bench_store.json"
+
+    bench_store.main(["--chunks", "300", "--dim", "16", "--queries", "10", "--out", str(out),
+                      "--work-dir", str(tmp_path / "work")])
+
+    assert "REFLECTION_VECTOR_STORE" not in os.environ
+
+    run = json.loads(out.read_text(encoding="utf-8").splitlines()[-1])["runs"][0]
+    assert run["chunks"] == 300
+    for backend in bench_store.BACKENDS:
+        assert run[backend]["open_s"] > 0 and run[backend]["query"]["p99_ms"] >= run[backend]["query"]["p50_ms"]
+    assert 0 < run["chroma_recall"] <= 1
@@ -0,0 +1,39 @@
+from modules.vectors.benchmarks.bench_chunker import (
+    _CountingEncoder,
+    legacy_chunk_elements,
+    synthetic_elements,
+)
+from modules.vectors.components import chunker
+from modules.vectors.components.chunker import _sep_tokens, chunk_elements
+
+
+def test_each_element_is_tokenized_once(monkeypatch):
+    elements = synthetic_elements(600, seed=3)
+    _sep_tokens()  # cached once per process, not part of what's being counted
+    counting = _CountingEncoder(chunker._encoder())
+    monkeypatch.setattr(chunker, "_ENC", counting)
+
+    chunks = chunk_elements(elements, doc_name="n.md", doc_path="/v/n.md", max_tokens=300, overlap=60)
+
+    assert len(chunks) > 10
+    assert counting.calls == len(elements)
+
+
+def test_same_chunks_as_reencoding_chunker():
+    elements = synthetic_elements(600, seed=4)
+    kw = dict(doc_name="n.md", doc_path="/v/n.md", max_tokens=300, overlap=60)
+
+    old = legacy_chunk_elements(elements, **kw)
+    new = chunk_elements(elements, **kw)
+
+    assert [c["text"] for c in new] == [c["text"] for c in old]
+    assert [c["heading_path"] for c in new] == [c["heading_path"] for c in old]
+    # summed element counts only drift from re-encoding by BPE merges at the joins
+    for a, b in zip(old, new):
+        assert abs(a["tokens"] - b["tokens"]) <= _sep_tokens() * len(b["element_types"])
+
+
+def test_embeds_are_not_links():
+    elements = [{"type": "paragraph", "text": "See [[Other Note|alias]] and ![[diagram.png]] or ![[Embedded Note]]."}]
+    chunks = chunk_elements(elements, doc_name="n.md", doc_path="/v/n.md")
+    assert chunks[0]["metadata"]["links"] == ["Other Note|alias"]
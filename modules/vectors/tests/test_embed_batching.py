@@ -0,0 +1,66 @@
+import modules.vectors.components.e_model as e_model
+from modules.vectors.components.batch_tuner import BatchTuner
+from modules.vectors.components.e_model import EmbeddingModel
+
+
+class _FakeLMModel:
+    def __init__(self, max_texts=None):
+        self.max_texts = max_texts
+        self.requests = []
+
+    def embed(self, texts):
+        if self.max_texts is not None and len(texts) > self.max_texts:
+            raise RuntimeError("batch too large")
+        self.requests.append(list(texts))
+        return [[float(len(t))] for t in texts]
+
+
+def _model(monkeypatch, lm, **kw):
+    monkeypatch.setattr(e_model, "get_embedding_backend", lambda name, backend=None: lm)
+    return EmbeddingModel(cache=None, **kw)
+
+
+def test_batches_respect_real_token_budget(temp_vectors_dir, monkeypatch):
+    lm = _FakeLMModel()
+    model = _model(monkeypatch, lm, batch_size=64, max_tokens_per_batch=300, adaptive=False)
+    texts = [" ".join(["word"] * 100)] * 10 + ["short"] * 5
+
+    vectors = model.embed(texts)
+
+    assert len(vectors) == len(texts)
+    per_request = [sum(e_model._count_tokens_many(r)) for r in lm.requests]
+    assert all(tokens <= 300 for tokens in per_request)
+    assert len(lm.requests) > 1
+    assert model.stats()["batch_sizes"]
+
+
+def test_failed_batches_are_split_and_size_backs_off(temp_vectors_dir, monkeypatch):
+    lm = _FakeLMModel(max_texts=10)
+    model = _model(monkeypatch, lm, batch_size=40, max_tokens_per_batch=0)
+
+    vectors = model.embed([f"text {i}" for i in range(100)])
+
+    assert len(vectors) == 100
+    assert all(len(r) <= 10 for r in lm.requests)
+    stats = model.stats()
+    assert stats["errors"] >= 1
+    assert stats["batch_size"] <= 20
+
+
+def test_tuner_grows_while_throughput_holds_and_backs_off_when_it_drops():
+    tuner = BatchTuner(initial_size=16, max_size=64)
+    # throughput keeps improving with size -> keep growing up to the cap
+    for _ in range(20):
+        n = tuner.batch_size
+        tuner.record(n, n * 10, latency_s=0.1 + n * 0.001, full=True)
+    assert tuner.batch_size == 64
+
+    # past the server's sweet spot throughput collapses -> shrink
+    tuner.record(64, 640, latency_s=10.0, full=True)
+    assert tuner.batch_size < 64
+
+    # partial batches never move the size
+    size = tuner.batch_size
+    tuner.record(3, 30, latency_s=5.0, full=False)
+    assert tuner.batch_size == size
+    assert tuner.stats()["batch_sizes"][64] >= 1
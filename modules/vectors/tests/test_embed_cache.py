@@ -0,0 +1,50 @@
+from modules.vectors.components.cache.sqlite_cache import EmbeddingCache
+
+
+def test_cache_round_trip_and_counters(tmp_path):
+    cache = EmbeddingCache(db_path=tmp_path / "cache.sqlite", max_entries=10)
+
+    assert cache.get_many("m", "search_document: ", ["a", "b"]) == [None, None]
+    cache.put_many("m", "search_document: ", ["a", "b"], [[0.5, 1.0], [2.0, 4.0]])
+
+    hits = cache.get_many("m", "search_document: ", ["b", "a", "c"])
+    assert hits == [[2.0, 4.0], [0.5, 1.0], None]
+
+    # model and prefix are part of the key
+    assert cache.get("other-model", "search_document: ", "a") is None
+    assert cache.get("m", "search_query: ", "a") is None
+
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["hits"] == 2
+    assert stats["misses"] == 5
+    cache.close()
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = EmbeddingCache(db_path=tmp_path / "cache.sqlite", max_entries=3)
+
+    for i, text in enumerate(["a", "b", "c"]):
+        cache.put("m", "p", text, [float(i)])
+    # touch "a" so "b" becomes the oldest entry
+    assert cache.get("m", "p", "a") == [0.0]
+
+    cache.put("m", "p", "d", [3.0])
+
+    assert len(cache) == 3
+    assert cache.get("m", "p", "b") is None
+    assert cache.get("m", "p", "a") == [0.0]
+    assert cache.stats()["evictions"] == 1
+    cache.close()
+
+
+def test_cache_persists_across_connections(tmp_path):
+    db = tmp_path / "cache.sqlite"
+    first = EmbeddingCache(db_path=db, max_entries=10)
+    first.put("m", "p", "note text", [0.25, 0.75])
+    first.close()
+
+    second = EmbeddingCache(db_path=db, max_entries=10)
+    assert len(second) == 1
+    assert second.get("m", "p", "note text") == [0.25, 0.75]
+    second.close()
@@ -0,0 +1,93 @@
+import os
+from pathlib import Path
+
+from modules.vectors.utils.file_utils import IgnoreRules, scan_notes, scan_vault
+from modules.vectors.tests.test_manifest import _make_service
+
+
+def _touch(root: Path, rel: str, text: str = "# Note\n\nbody\n") -> Path:
+    p = root / rel
+    p.parent.mkdir(parents=True, exist_ok=True)
+    p.write_text(text, encoding="utf-8")
+    return p
+
+
+def _vault(tmp_path: Path) -> Path:
+    vault = tmp_path / "vault"
+    for rel in (
+        "a.md", "b.txt", "sub/c.md", "sub/deep/d.md", "drafts/e.md", "drafts/keep.md",
+        ".obsidian/workspace.md", "Attachments/f.md", "notes/Attachments/g.md", "x.tmp.md",
+    ):
+        _touch(vault, rel)
+    (vault / ".gitignore").write_text(
+        "# comment\n/drafts/*\n!/drafts/keep.md\n*.tmp.md\nAttachments/\n", encoding="utf-8"
+    )
+    return vault
+
+
+def test_ignore_rules_follow_gitignore_semantics():
+    rules = IgnoreRules(["*.log", "/build/", "docs/**/private", "!keep.log", "cache/"])
+    assert rules.match("x.log", False) and rules.match("a/b/x.log", False)
+    assert not rules.match("keep.log", False)
+    assert rules.match("build", True) and not rules.match("build", False)
+    assert not rules.match("src/build", True)  # anchored to the root
+    assert rules.match("docs/private", True) and rules.match("docs/a/b/private", True)
+    assert not rules.match("cache", False)  # directories only
+    assert rules.ignores("cache/note.md", False)  # ...but everything under one is ignored
+    assert not IgnoreRules(["# just a comment", "", "   "])
+
+
+def test_scan_notes_skips_ignored_paths_and_attaches_stat(temp_vectors_dir, tmp_path):
+    vault = _vault(tmp_path)
+    rules = IgnoreRules.for_root(vault, [".obsidian/"])
+
+    notes = list(scan_notes(vault, ignore=rules))
+    rel = [n.path.relative_to(vault).as_posix() for n in notes]
+    # breadth-first, names sorted within each directory
+    assert rel == ["a.md", "drafts/keep.md", "sub/c.md", "sub/deep/d.md"]
+    for n in notes:
+        st = os.stat(n.path)
+        assert (n.size, n.mtime) == (st.st_size, st.st_mtime)
+
+    # parallel listing yields exactly the same sequence
+    assert list(scan_notes(vault, ignore=rules, workers=4)) == notes
+
+    # a subfolder walked with the vault's rules still honours anchored patterns
+    sub = list(scan_notes(vault / "drafts", ignore=rules, base=vault))
+    assert [n.path.name for n in sub] == ["keep.md"]
+    assert list(scan_notes(vault / ".obsidian", ignore=rules, base=vault)) == []
+
+    # explicit patterns replace the configured ones; the vault's .gitignore still applies
+    assert sorted(p.name for p in scan_vault(vault, ignore=[], workers=0)) == [
+        "a.md", "b.txt", "c.md", "d.md", "keep.md", "workspace.md",
+    ]
+
+
+def test_directory_ingest_uses_scan_stat(temp_vectors_dir, tmp_path, monkeypatch):
+    monkeypatch.setenv("REFLECTION_SCAN_WORKERS", "2")
+    vault = _vault(tmp_path)
+    service = _make_service(monkeypatch)
+
+    first = service.ingest_directory(vault)
+    assert first.added == 4
+    assert sorted(service.store.written) == ["a.md", "c.md", "d.md", "keep.md"]
+
+    stats = []
+    real_stat = Path.stat
+
+    def counting_stat(self, *args, **kwargs):
+        if self.suffix == ".md":
+            stats.append(self.name)
+        return real_stat(self, *args, **kwargs)
+
+    monkeypatch.setattr(Path, "stat", counting_stat)
+    again = service.ingest_directory(vault)
+    assert again.unchanged == 4 and again.files_processed == 0
+    assert stats == []
+
+    # newly ignored notes drop out of the index like deleted ones
+    (vault / ".gitignore").write_text("sub/\n", encoding="utf-8")
+    dropped = service.ingest_directory(vault)
+    assert dropped.deleted == 2
+    assert sorted(Path(p).name for p in service.store.deleted) == ["c.md", "d.md"]
+    service.manifest.close()
@@ -0,0 +1,148 @@
+import json
+import sqlite3
+
+import numpy as np
+
+from modules.vectors.index.chroma_store import ChromaVectorStore, open_vector_store
+from modules.vectors.index.flat_store import FlatVectorStore, _where_sql
+from modules.vectors.index.fts_store import where_matches
+from modules.vectors.settings import get_settings
+
+
+def _chunks(doc_path, n, dim=8, seed=0):
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            "chunk_id": f"{doc_path}-{i}",
+            "text": f"chunk {i} of {doc_path}",
+            "embeddings": rng.normal(size=dim).tolist(),
+            "document_name": "note.md",
+            "document_path": str(doc_path),
+            "metadata": {"chunk_index": i, "links": ["other"] if i == 0 else []},
+        }
+        for i in range(n)
+    ]
+
+
+def _unstamped(meta):
+    return {k: v for k, v in meta.items() if k != "ingested_at"}
+
+
+def test_flat_store_matches_chroma(temp_vectors_dir, tmp_path):
+    notes = [tmp_path / f"n{i}.md" for i in range(4)]
+    docs = {str(p): _chunks(p, 30, seed=i) for i, p in enumerate(notes)}
+    flat = FlatVectorStore(collection_name="test_parity")
+    chroma = ChromaVectorStore(collection_name="test_parity")
+    for store in (flat, chroma):
+        store.replace_documents(docs)
+        store.replace_document(notes[1], _chunks(notes[1], 10, seed=1))
+        store.delete_document(notes[3])
+
+    assert flat.collection.count() == chroma.collection.count() == 30 + 10 + 30
+    assert sorted(flat.document_chunk_ids(notes[1])) == sorted(chroma.document_chunk_ids(notes[1]))
+
+    queries = np.random.default_rng(9).normal(size=(3, 8)).tolist()
+    for where in (None, {"document_path": str(notes[0])}, {"chunk_index": {"$lt": 5}}):
+        a = flat.query(["q"] * 3, n_results=7, where=where, query_embeddings=queries)
+        b = chroma.query(["q"] * 3, n_results=7, where=where, query_embeddings=queries)
+        assert a["ids"] == b["ids"]
+        assert np.allclose(a["distances"], b["distances"], atol=1e-4)
+        assert [_unstamped(m) for m in a["metadatas"][0]] == [_unstamped(m) for m in b["metadatas"][0]]
+
+    paths = [str(notes[0]), str(notes[1])]
+    a = flat.chunks_for_documents(paths, per_document=2)
+    b = chroma.chunks_for_documents(paths, per_document=2)
+    assert {p: [(cid, text, _unstamped(m)) for cid, text, m in rows] for p, rows in a.items()} == \
+        {p: [(cid, text, _unstamped(m)) for cid, text, m in rows] for p, rows in b.items()}
+
+
+def test_where_sql_agrees_with_where_matches():
+    metas = [
+        {"document_path": "/v/a.md", "chunk_index": 0, "tags": "x", "draft": True},
+        {"document_path": "/v/a.md", "chunk_index": 3, "tags": "y"},
+        {"document_path": "/v/b.md", "chunk_index": 1},
+        {"document_path": "/v/c.md", "chunk_index": 7, "tags": "x", "draft": False},
+    ]
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE chunks (row INTEGER PRIMARY KEY, document_path TEXT, metadata TEXT)")
+    conn.executemany("INSERT INTO chunks VALUES (?, ?, ?)",
+                     [(i, m["document_path"], json.dumps(m)) for i, m in enumerate(metas)])
+    filters = [
+        {"document_path": "/v/a.md"},
+        {"document_path": {"$in": ["/v/b.md", "/v/c.md"]}},
+        {"chunk_index": {"$gte": 1, "$lt": 7}},
+        {"tags": {"$ne": "x"}},
+        {"tags": {"$nin": ["y"]}},
+        {"tags": {"$in": []}},
+        {"draft": True},
+        {"$or": [{"tags": "y"}, {"chunk_index": {"$gt": 5}}]},
+        {"$and": [{"document_path": "/v/a.md"}, {"chunk_index": {"$lt": 1}}]},
+        {"chunk_index": {"$regex": "x"}},
+    ]
+    for where in filters:
+        sql, params = _where_sql(where)
+        got = [r for (r,) in conn.execute(f"SELECT row FROM chunks WHERE {sql} ORDER BY row", params)]
+        assert got == [i for i, m in enumerate(metas) if where_matches(m, where)], where
+
+
+def test_query_skips_freed_rows(temp_vectors_dir, tmp_path):
+    notes = [tmp_path / f"n{i}.md" for i in range(10)]
+    docs = {str(p): _chunks(p, 20, seed=i) for i, p in enumerate(notes)}
+    store = FlatVectorStore(collection_name="test_freed")
+    store.replace_documents(docs)
+    store.delete_document(notes[4])
+    live = [c for p in notes if p != notes[4] for c in docs[str(p)]]
+
+    vectors = np.array([c["embeddings"] for c in live])
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = np.random.default_rng(5).normal(size=(2, 8))
+    # unfiltered, a wide filter, and one selective enough to gather its rows
+    for where in (None, {"chunk_index": {"$lt": 10}}, {"document_path": str(notes[7])}):
+        kept = [i for i, c in enumerate(live)
+                if where_matches({**c["metadata"], "document_path": c["document_path"]}, where)]
+        res = store.query(["q"] * 2, n_results=5, where=where, query_embeddings=queries.tolist())
+        for q, ids in zip(queries, res["ids"]):
+            scores = vectors[kept] @ (q / np.linalg.norm(q))
+            assert ids == [live[kept[i]]["chunk_id"] for i in np.argsort(-scores)[:5]]
+
+
+def test_flat_store_persists_and_reuses_freed_rows(temp_vectors_dir, tmp_path):
+    note, other = tmp_path / "note.md", tmp_path / "other.md"
+    note.write_text("# note", encoding="utf-8")
+    store = FlatVectorStore(collection_name="test_reopen")
+    store.replace_document(note, _chunks(note, 1500))  # past the first growth step
+    store.replace_document(note, _chunks(note, 20))
+    size = store.collection.vectors_path.stat().st_size
+
+    store.replace_document(other, _chunks(other, 100, seed=3))
+    assert store.collection.vectors_path.stat().st_size == size
+
+    reopened = FlatVectorStore(collection_name="test_reopen")
+    assert reopened.collection.count() == 120
+    probe = _chunks(other, 100, seed=3)[42]["embeddings"]
+    res = reopened.query(["q"], n_results=1, query_embeddings=[probe])
+    assert res["ids"] == [[f"{other}-42"]] and abs(res["distances"][0][0]) < 1e-5
+    # `other` never existed on disk
+    assert reopened.vacuum() == 100
+    assert reopened.document_chunk_ids(other) == []
+
+
+def test_vector_store_setting_selects_flat_backend(temp_vectors_dir, tmp_path, monkeypatch):
+    monkeypatch.setenv("REFLECTION_VECTOR_STORE", "flat")
+    monkeypatch.setenv("REFLECTION_EMBEDDING_BACKEND", "local")
+    monkeypatch.setenv("REFLECTION_LOCAL_EMBEDDING_DIM", "32")
+    monkeypatch.setenv("REFLECTION_INGEST_WORKERS", "0")
+    get_settings.cache_clear()
+    from modules.vectors.VectorService import VectorService
+
+    assert isinstance(open_vector_store(), FlatVectorStore)
+    vault = tmp_path / "vault"
+    vault.mkdir()
+    (vault / "rust.md").write_text("# Rust\n\nOwnership and borrowing in Rust.", encoding="utf-8")
+    (vault / "tea.md").write_text("# Tea\n\nGreen tea steeping temperature.", encoding="utf-8")
+
+    service = VectorService()
+    assert isinstance(service.store, FlatVectorStore)
+    service.ingest_files(sorted(vault.glob("*.md")))
+    result = service.query("borrowing in Rust", n_results=1)
+    assert result.results[0].metadata["document_name"] == "rust.md"
@@ -0,0 +1,121 @@
+import sqlite3
+
+from modules.vectors.index.fts_store import FullTextIndex, fts_query, where_matches
+from modules.vectors.settings import get_settings
+from modules.vectors.VectorService import VectorService, _rrf_fuse
+
+
+def _meta(path, i=0):
+    return {"document_path": path, "document_name": path.rsplit("/", 1)[-1], "chunk_index": i}
+
+
+def test_fts_query_quotes_every_term():
+    assert fts_query('parse_markdown_text AND "x" OR (y*)') == '"parse_markdown_text" OR "AND" OR "x" OR "OR" OR "y"'
+    assert fts_query("?!") == ""
+
+
+def test_index_upserts_deletes_and_ranks(temp_vectors_dir, tmp_path):
+    fts = FullTextIndex(db_path=tmp_path / "fts.sqlite")
+    fts.upsert(
+        ["a", "b", "c"],
+        [
+            "call parse_markdown_text before chunking",
+            "markdown notes about sleep",
+            "CS101 midterm covers recursion",
+        ],
+        [_meta("/v/a.md"), _meta("/v/b.md"), _meta("/v/c.md", 3)],
+    )
+    assert [h.chunk_id for h in fts.search("parse_markdown_text")] == ["a"]
+    assert [h.chunk_id for h in fts.search("cs101")] == ["c"]
+    assert fts.search("cs101")[0].metadata["chunk_index"] == 3
+
+    # re-upserting replaces the text in the index, not just the row
+    fts.upsert(["a"], ["nothing to see"], [_meta("/v/a.md")])
+    assert fts.search("parse_markdown_text") == []
+    assert [h.chunk_id for h in fts.search("markdown")] == ["b"]
+
+    assert [h.chunk_id for h in fts.search("markdown OR recursion", where={"document_path": "/v/c.md"})] == ["c"]
+    fts.delete_document("/v/c.md")
+    fts.delete_ids(["b"])
+    assert len(fts) == 1 and fts.search("recursion") == []
+    fts.close()
+
+
+def test_where_matches_chroma_operators():
+    meta = {"document_path": "/v/a.md", "chunk_index": 2, "tags": "x"}
+    assert where_matches(meta, {"document_path": "/v/a.md"})
+    assert where_matches(meta, {"chunk_index": {"$gte": 2}, "tags": {"$in": ["x", "y"]}})
+    assert where_matches(meta, {"$or": [{"tags": "nope"}, {"chunk_index": {"$lt": 3}}]})
+    assert not where_matches(meta, {"$and": [{"tags": "x"}, {"chunk_index": {"$ne": 2}}]})
+    assert not where_matches(meta, {"missing": {"$gt": 1}})
+
+
+def test_rrf_prefers_chunks_ranked_by_both():
+    vector = [("v1", "t", {}, 0.1), ("both", "t", {}, 0.2), ("v3", "t", {}, 0.3)]
+    lexical = [("l1", "t", {}, -5.0), ("both", "t", {}, -4.0)]
+    fused = _rrf_fuse([vector, lexical], k=60)
+    assert fused[0][0] == "both"
+    assert fused[0][3] == 2 / 62
+    assert {row[0] for row in fused} == {"v1", "v3", "l1", "both"}
+
+
+def test_service_lexical_and_hybrid_modes(temp_vectors_dir, tmp_path, monkeypatch):
+    monkeypatch.setenv("REFLECTION_EMBEDDING_BACKEND", "local")
+    monkeypatch.setenv("REFLECTION_LOCAL_EMBEDDING_DIM", "32")
+    monkeypatch.setenv("REFLECTION_INGEST_WORKERS", "0")
+    get_settings.cache_clear()
+
+    vault = tmp_path / "vault"
+    vault.mkdir()
+    (vault / "code.md").write_text("# Parser\n\nThe entry point is parse_markdown_text.\n", encoding="utf-8")
+    (vault / "course.md").write_text("# Courses\n\nCS101 covers recursion and lists.\n", encoding="utf-8")
+    (vault / "diary.md").write_text("# Diary\n\nSlept badly, long walk in the park.\n", encoding="utf-8")
+
+    service = VectorService()
+    service.ingest_directory(vault)
+
+    lexical = service.query("parse_markdown_text", n_results=3, mode="lexical")
+    assert lexical.mode == "lexical"
+    assert [r.document for r in lexical.results] == ["code.md"]
+    assert service.query_cache_stats()["vectors"]["misses"] == 0  # no embedding involved
+
+    hybrid = service.query("CS101", n_results=3, mode="hybrid")
+    assert hybrid.results[0].document == "course.md"
+    assert len(hybrid.results) == 3  # vector candidates fill the rest
+    assert hybrid.results[0].score > hybrid.results[-1].score
+
+    (vault / "course.md").unlink()
+    service.ingest_directory(vault)
+    assert service.query("CS101", n_results=3, mode="lexical").results == []
+
+    # an existing collection without keyword entries is backfilled on warm-up
+    service.store.fts.clear()
+    service.warm_up()
+    assert [r.document for r in service.query("parse_markdown_text", mode="lexical").results] == ["code.md"]
+    service.manifest.close()
+
+
+def test_failed_mirror_write_is_rebuilt(temp_vectors_dir, tmp_path):
+    from modules.vectors.index.chroma_store import ChromaVectorStore
+
+    note = tmp_path / "note.md"
+    store = ChromaVectorStore(collection_name="test_stale")
+    chunks = [
+        {"chunk_id": f"c{i}", "text": f"quaternion {i}", "embeddings": [1.0, float(i)],
+         "document_path": str(note), "metadata": {"chunk_index": i}}
+        for i in range(3)
+    ]
+
+    def broken(*args):
+        raise sqlite3.OperationalError("database is locked")
+
+    store.fts.upsert = broken
+    store.replace_document(note, chunks)
+    del store.fts.upsert
+    assert store.collection.count() == 3
+    # the marker outlives the process that failed
+    assert ChromaVectorStore(collection_name="test_stale").stale_indexes() == ["fts"]
+
+    assert store.rebuild_stale_indexes() == {"fts": 3}
+    assert store.stale_indexes() == []
+    assert [h.chunk_id for h in store.fts.search("quaternion", limit=5)] == ["c0", "c1", "c2"]
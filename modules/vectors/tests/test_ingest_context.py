@@ -0,0 +1,70 @@
+import modules.vectors.ingest_context as context_module
+from modules.vectors.ingest_context import IngestionContext
+
+
+class _Handle:
+    created = 0
+
+    def __init__(self):
+        _Handle.created += 1
+
+
+def test_context_reuses_handles_and_reports_lifetimes(monkeypatch):
+    monkeypatch.setattr(context_module, "EmbeddingModel", _Handle)
+    _Handle.created = 0
+    store = object()
+    ctx = IngestionContext(store=store)
+
+    assert ctx.lifetimes()["embedder"] is None
+    first = ctx.embedder
+    assert ctx.embedder is first
+    assert _Handle.created == 1
+
+    lifetimes = ctx.lifetimes()
+    assert lifetimes["embedder"]["uses"] == 2
+    assert lifetimes["store"] is not None
+    assert ctx.store is store
+
+    ctx.close()
+    assert ctx.lifetimes()["embedder"] is None
+    # the store was handed in, so it outlives the context's own handles
+    assert ctx.store is store
+
+
+class _Store:
+    def __init__(self):
+        self.replaced = {}
+
+    def existing_ids(self, ids):
+        return set()
+
+    def replace_document(self, path, chunks):
+        self.replaced[str(path)] = chunks
+
+
+class _Embedder:
+    def embed(self, texts):
+        return [[1.0, 0.0] for _ in texts]
+
+
+def test_pipeline_reads_each_note_once_and_stays_quiet(tmp_path, monkeypatch, capsys):
+    from pathlib import Path
+    from modules.vectors.main_pipeline import pipeline
+
+    note = tmp_path / "note.md"
+    note.write_text("# Title\n\nSome text with [[Link]].\n\n## Sub\n\n- a\n- b\n", encoding="utf-8")
+
+    reads = []
+    real_read_bytes = Path.read_bytes
+    monkeypatch.setattr(Path, "read_bytes", lambda self: reads.append(self) or real_read_bytes(self))
+    monkeypatch.setattr(Path, "read_text", lambda self, *a, **k: reads.append(self) or "")
+    monkeypatch.setattr(context_module, "EmbeddingModel", _Embedder)
+
+    store = _Store()
+    ctx = IngestionContext(store=store)
+    p = pipeline(note, context=ctx)
+    chunks = p.process_input_file()
+
+    assert chunks and store.replaced[str(note)] is chunks
+    assert reads == [note]
+    assert capsys.readouterr().out == ""
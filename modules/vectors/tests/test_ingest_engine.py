@@ -0,0 +1,110 @@
+from pathlib import Path
+
+from modules.vectors.ingest_engine import IngestionEngine
+
+
+class _RecordingStore:
+    def __init__(self):
+        self.batches = []
+
+    def replace_documents(self, docs):
+        self.batches.append({Path(p).name: len(chunks) for p, chunks in docs.items()})
+        for chunks in docs.values():
+            assert all("embeddings" in c for c in chunks)
+        return 0
+
+    def existing_ids(self, ids):
+        return set()
+
+
+class _FakeEmbedder:
+    def embed(self, texts):
+        return [[float(len(t)), 1.0] for t in texts]
+
+
+def _write_vault(root: Path, n: int) -> list[Path]:
+    paths = []
+    for i in range(n):
+        p = root / f"note_{i:03d}.md"
+        p.write_text(f"# Note {i}\n\nSome text for note {i}.\n\n- a\n- b\n", encoding="utf-8")
+        paths.append(p)
+    return paths
+
+
+def test_engine_parallel_parse_single_writer(temp_vectors_dir, tmp_path):
+    paths = _write_vault(tmp_path, 20)
+    (tmp_path / "empty.md").write_text("", encoding="utf-8")
+    paths.append(tmp_path / "empty.md")
+
+    store = _RecordingStore()
+    committed = []
+    engine = IngestionEngine(
+        store,
+        embedder=_FakeEmbedder(),
+        workers=2,
+        parse_queue_depth=2,
+        write_queue_depth=2,
+        upsert_batch_size=5,
+        on_committed=committed.extend,
+    )
+    results = engine.run(paths)
+
+    assert [r.path for r in results] == paths
+    assert results[-1].error is not None
+    assert all(r.error is None and r.chunk_count > 0 for r in results[:-1])
+
+    written = {name for batch in store.batches for name in batch}
+    assert written == {p.name for p in paths[:-1]}
+    # several files share one upsert batch
+    assert len(store.batches) < 20
+    assert {r.path for r in committed} == set(paths[:-1])
+
+
+def test_context_parse_pool_outlives_runs(temp_vectors_dir, tmp_path):
+    from modules.vectors.ingest_context import IngestionContext
+
+    paths = _write_vault(tmp_path, 10)
+    store = _RecordingStore()
+    ctx = IngestionContext(store=store)
+    pools = []
+
+    def provider(workers):
+        pools.append(ctx.parse_pool(workers))
+        return pools[-1]
+
+    for _ in range(2):
+        engine = IngestionEngine(store, embedder=_FakeEmbedder(), workers=2, pool_provider=provider)
+        assert all(r.error is None for r in engine.run(paths))
+    # one set of worker processes served both runs, and is still up afterwards
+    assert len(pools) == 2 and pools[0] is pools[1]
+    assert pools[0].submit(len, "abc").result() == 3
+
+    ctx.close()
+    assert ctx.parse_pool(2) is not pools[0]
+    ctx.close()
+
+
+class _CountingEmbedder(_FakeEmbedder):
+    batch_size = 8
+
+    def __init__(self):
+        self.batches = []
+
+    def embed(self, texts):
+        self.batches.append(len(texts))
+        return super().embed(texts)
+
+
+def test_engine_pools_chunks_across_files(temp_vectors_dir, tmp_path):
+    paths = _write_vault(tmp_path, 30)
+    embedder = _CountingEmbedder()
+    engine = IngestionEngine(_RecordingStore(), embedder=embedder, workers=0, upsert_batch_size=64)
+
+    results = engine.run(paths)
+    total_chunks = sum(r.chunk_count for r in results)
+
+    assert all(r.error is None for r in results)
+    assert sum(embedder.batches) == total_chunks
+    # every request but the last is a full batch, instead of one request per note
+    assert all(n == 8 for n in embedder.batches[:-1])
+    assert len(embedder.batches) == -(-total_chunks // 8)
@@ -0,0 +1,71 @@
+import threading
+import time
+
+from modules.vectors.VectorService import IngestProgress, IngestSummary
+from modules.vectors.jobs import IngestJobManager
+
+
+class _SlowService:
+    """Stands in for VectorService: reports progress per 'file' and honours cancel."""
+
+    def __init__(self, files: int = 5, delay: float = 0.02):
+        self.files = files
+        self.delay = delay
+        self.release = threading.Event()
+        self.release.set()
+
+    def ingest_directory(self, dir_path, force=False, progress=None, cancel=None, retry_errors=False):
+        self.release.wait()
+        done = 0
+        for i in range(self.files):
+            if cancel is not None and cancel.is_set():
+                break
+            time.sleep(self.delay)
+            done += 1
+            progress(IngestProgress(files_total=self.files, files_done=done, chunks_done=done * 2))
+        return IngestSummary(files_processed=done, total_chunks=done * 2, errors=[])
+
+
+def _wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_job_runs_in_background_and_streams_events():
+    events = []
+    manager = IngestJobManager(_SlowService(), on_event=events.append, emit_interval_s=0.0)
+
+    job_id = manager.start_directory("/vault")
+    assert manager.status(job_id)["status"] in ("queued", "running")
+
+    assert _wait_until(lambda: manager.status(job_id)["status"] == "completed")
+    status = manager.status(job_id)
+    assert status["summary"]["files_processed"] == 5
+    assert status["progress"]["files_done"] == 5
+
+    seen = [e["status"] for e in events if e["job_id"] == job_id]
+    assert seen[0] == "queued" and seen[-1] == "completed"
+    assert any(e["progress"] for e in events)
+
+
+def test_cancel_running_and_queued_jobs():
+    service = _SlowService(files=200, delay=0.01)
+    service.release.clear()
+    manager = IngestJobManager(service)
+
+    running = manager.start_directory("/vault")
+    queued = manager.start_directory("/vault")
+    assert _wait_until(lambda: manager.status(running)["status"] == "running")
+
+    assert manager.cancel(queued)
+    assert manager.status(queued)["status"] == "cancelled"
+
+    service.release.set()
+    assert manager.cancel(running)
+    assert _wait_until(lambda: manager.status(running)["status"] == "cancelled")
+    assert manager.status(running)["summary"]["files_processed"] < 200
+    assert not manager.cancel(running)
@@ -0,0 +1,94 @@
+from modules.vectors.index.link_graph import LinkGraph, link_key
+from modules.vectors.settings import get_settings
+from modules.vectors.VectorService import VectorService
+
+
+def test_link_key_matches_obsidian_targets():
+    assert link_key("Folder/Note Name#Heading|alias") == "note name"
+    assert link_key("Note Name.md") == "note name"
+    assert link_key("#Just a heading") == ""
+
+
+def test_graph_resolves_links_in_both_directions(temp_vectors_dir, tmp_path):
+    graph = LinkGraph(db_path=tmp_path / "graph.sqlite")
+    graph.set_many({
+        "/v/a.md": ["B", "missing"],
+        "/v/b.md": ["A#intro", "c|see c"],
+        "/v/sub/c.md": [],
+    })
+    assert graph.outlinks("/v/a.md") == ["/v/b.md"]
+    assert graph.backlinks("/v/a.md") == ["/v/b.md"]
+    assert graph.backlinks("/v/sub/c.md") == ["/v/b.md"]
+
+    # a link to a note that doesn't exist yet resolves once the note is indexed
+    graph.set_links("/v/x/Missing.md", [])
+    assert graph.backlinks("/v/x/Missing.md") == ["/v/a.md"]
+
+    # editing a note replaces its outgoing links; removing it drops them
+    graph.set_links("/v/b.md", ["c"])
+    assert graph.backlinks("/v/a.md") == []
+    assert graph.neighbors(["/v/a.md", "/v/sub/c.md"]) == {"/v/b.md": ["/v/a.md", "/v/sub/c.md"], "/v/x/Missing.md": ["/v/a.md"]}
+    graph.remove("/v/b.md")
+    assert graph.backlinks("/v/sub/c.md") == []
+    assert len(graph) == 3
+    graph.close()
+
+
+def test_query_expands_hits_with_linked_notes(temp_vectors_dir, tmp_path, monkeypatch):
+    monkeypatch.setenv("REFLECTION_EMBEDDING_BACKEND", "local")
+    monkeypatch.setenv("REFLECTION_LOCAL_EMBEDDING_DIM", "32")
+    monkeypatch.setenv("REFLECTION_INGEST_WORKERS", "0")
+    get_settings.cache_clear()
+
+    vault = tmp_path / "vault"
+    vault.mkdir()
+    (vault / "hub.md").write_text("# Hub\n\nquaternion rotations, see [[Detail]] and ![[figure.png]]\n", encoding="utf-8")
+    (vault / "Detail.md").write_text("# Detail\n\nslerp interpolation between orientations\n", encoding="utf-8")
+    (vault / "fan.md").write_text("# Fan\n\nunrelated words that link to [[hub]]\n", encoding="utf-8")
+    (vault / "island.md").write_text("# Island\n\nnothing links here\n", encoding="utf-8")
+
+    service = VectorService()
+    service.ingest_directory(vault)
+    hub = str((vault / "hub.md").resolve())
+    assert service.note_links(hub) == {
+        "outlinks": [str((vault / "Detail.md").resolve())],
+        "backlinks": [str((vault / "fan.md").resolve())],
+    }
+
+    plain = service.query("quaternion", n_results=1, mode="lexical")
+    expanded = service.query("quaternion", n_results=1, mode="lexical", expand_links=True)
+    assert [r.document for r in plain.results] == ["hub.md"]
+    assert [r.document for r in expanded.results] == ["hub.md", "Detail.md"]
+    assert expanded.results[1].linked_from == hub
+    assert plain.results[0].linked_from is None
+
+    # wider expansion reaches backlinks too; deleting a linked note drops it
+    wide = service.query("quaternion", n_results=2, mode="lexical", expand_links=True)
+    assert {r.document for r in wide.results[1:]} == {"Detail.md", "fan.md"}
+    (vault / "Detail.md").unlink()
+    service.ingest_directory(vault)
+    again = service.query("quaternion", n_results=2, mode="lexical", expand_links=True)
+    assert [r.document for r in again.results] == ["hub.md", "fan.md"]
+
+    # a collection from before the graph existed is backfilled on warm-up
+    service.store.links.clear()
+    service.warm_up()
+    assert service.note_links(hub)["backlinks"] == [str((vault / "fan.md").resolve())]
+    service.manifest.close()
+
+
+def test_rebuilt_graph_keeps_links_with_commas(temp_vectors_dir, tmp_path):
+    from modules.vectors.index.chroma_store import ChromaVectorStore
+
+    smith, note = tmp_path / "Smith, John.md", tmp_path / "note.md"
+    store = ChromaVectorStore(collection_name="test_comma_links")
+    store.replace_documents({
+        str(smith): [{"chunk_id": "s0", "text": "smith", "embeddings": [1.0, 0.0],
+                      "document_path": str(smith), "metadata": {"chunk_index": 0, "links": []}}],
+        str(note): [{"chunk_id": "n0", "text": "note", "embeddings": [0.0, 1.0],
+                     "document_path": str(note), "metadata": {"chunk_index": 0, "links": ["Smith, John"]}}],
+    })
+    assert store.links.backlinks(smith) == [str(note)]
+
+    assert store.rebuild_links() == 2
+    assert store.links.backlinks(smith) == [str(note)]
@@ -0,0 +1,41 @@
+import math
+
+from modules.backends import get_embedding_backend
+from modules.backends.local import HashedEmbeddingModel
+
+
+def _cos(a, b):
+    return sum(x * y for x, y in zip(a, b))
+
+
+def test_hashed_embeddings_are_deterministic_unit_vectors():
+    model = HashedEmbeddingModel(dim=128)
+
+    one = model.embed("search_document: light bends through the prism")
+    batch = model.embed(["search_document: light bends through the prism", ""])
+
+    assert batch[0] == one
+    assert len(one) == 128 and len(batch[1]) == 128
+    assert math.isclose(math.sqrt(sum(v * v for v in one)), 1.0, rel_tol=1e-9)
+    assert math.isclose(math.sqrt(sum(v * v for v in batch[1])), 1.0, rel_tol=1e-9)
+
+
+def test_shared_words_embed_closer():
+    model = HashedEmbeddingModel(dim=256)
+    q = model.embed("how does light refract in a prism")
+    near = model.embed("a prism makes light refract into colours")
+    far = model.embed("quarterly budget spreadsheet totals")
+
+    assert _cos(q, near) > _cos(q, far)
+
+
+def test_backend_is_selected_from_settings(temp_vectors_dir, monkeypatch):
+    from modules.vectors.settings import get_settings
+
+    monkeypatch.setenv("REFLECTION_BACKEND", "local")
+    monkeypatch.setenv("REFLECTION_LOCAL_EMBEDDING_DIM", "32")
+    get_settings.cache_clear()
+
+    backend = get_embedding_backend("any-model")
+    assert isinstance(backend, HashedEmbeddingModel) and backend.dim == 32
+    assert get_settings().default_collection_name == "reflection_notes_local"
@@ -0,0 +1,231 @@
+import os
+from pathlib import Path
+
+import modules.vectors.VectorService as vs_module
+import modules.vectors.ingest_context as context_module
+from modules.vectors.VectorService import VectorService
+from modules.vectors.index.manifest import FileManifest, ManifestEntry, file_digest
+
+
+class _FakeStore:
+    def __init__(self):
+        self.deleted = []
+        self.written = []
+
+    def replace_documents(self, docs):
+        self.written.extend(Path(p).name for p in docs)
+        return 0
+
+    def existing_ids(self, ids):
+        return set()
+
+    def delete_document(self, document_path):
+        self.deleted.append(str(document_path))
+
+
+class _FakeEmbedder:
+    def embed(self, texts):
+        return [[float(len(t)), 1.0] for t in texts]
+
+
+def _make_service(monkeypatch):
+    monkeypatch.setattr(vs_module, "open_vector_store", _FakeStore)
+    monkeypatch.setattr(context_module, "EmbeddingModel", _FakeEmbedder)
+    return VectorService()
+
+
+def test_manifest_entries_under_is_scoped_to_root(temp_vectors_dir, tmp_path):
+    manifest = FileManifest(db_path=tmp_path / "manifest.sqlite")
+    manifest.record_many([
+        ManifestEntry("/vault/a.md", 1, 1.0, "h1"),
+        ManifestEntry("/vault/sub/b.md", 2, 2.0, "h2"),
+        ManifestEntry("/vault_other/c.md", 3, 3.0, "h3"),
+    ])
+
+    assert set(manifest.entries_under("/vault")) == {"/vault/a.md", "/vault/sub/b.md"}
+
+    manifest.remove_many(["/vault/a.md"])
+    assert manifest.get("/vault/a.md") is None
+    assert len(manifest) == 2
+    manifest.close()
+
+
+def test_scan_finds_unseen_entries_page_by_page(temp_vectors_dir, tmp_path):
+    manifest = FileManifest(db_path=tmp_path / "manifest.sqlite")
+    manifest.record_many([ManifestEntry(f"/vault/n{i:02d}.md", i, 1.0, "h") for i in range(10)])
+    manifest.record(ManifestEntry("/elsewhere/x.md", 1, 1.0, "h"))
+
+    scan = manifest.begin_scan()
+    manifest.mark_seen(scan, [f"/vault/n{i:02d}.md" for i in range(0, 10, 2)])
+    assert set(manifest.get_many(["/vault/n00.md", "/vault/missing.md"])) == {"/vault/n00.md"}
+
+    pages = []
+    for page in manifest.iter_unseen_under(scan, "/vault", page_size=2):
+        pages.append(page)
+        manifest.remove_many(page)  # removing while paging must not skip anything
+    manifest.end_scan(scan)
+
+    assert [p for page in pages for p in page] == [f"/vault/n{i:02d}.md" for i in range(1, 10, 2)]
+    assert max(len(page) for page in pages) == 2
+    assert len(manifest) == 6
+    manifest.close()
+
+
+def test_ingest_directory_only_processes_changes(temp_vectors_dir, tmp_path, monkeypatch):
+    vault = tmp_path / "vault"
+    vault.mkdir()
+    (vault / "keep.md").write_text("# Keep\n\nsame", encoding="utf-8")
+    (vault / "edit.md").write_text("# Edit\n\nbefore", encoding="utf-8")
+    (vault / "gone.md").write_text("# Gone\n\nbye", encoding="utf-8")
+
+    service = _make_service(monkeypatch)
+    first = service.ingest_directory(vault)
+    assert (first.added, first.updated, first.unchanged, first.deleted) == (3, 0, 0, 0)
+    assert first.errors == []
+
+    edited = vault / "edit.md"
+    edited.write_text("# Edit\n\nafter, and longer", encoding="utf-8")
+    (vault / "gone.md").unlink()
+    (vault / "new.md").write_text("# New", encoding="utf-8")
+    # touched but identical content must not be re-ingested
+    keep = vault / "keep.md"
+    os.utime(keep, (keep.stat().st_atime, keep.stat().st_mtime + 10))
+
+    service.store.written = []
+    second = service.ingest_directory(vault)
+
+    assert (second.added, second.updated, second.unchanged, second.deleted) == (1, 1, 1, 1)
+    assert sorted(service.store.written) == ["edit.md", "new.md"]
+    assert service.store.deleted == [str(vault.resolve() / "gone.md")]
+
+    service.store.written = []
+    third = service.ingest_directory(vault)
+    assert third.unchanged == 3
+    assert service.store.written == []
+
+
+def test_sync_paths_handles_edits_and_deletions(temp_vectors_dir, tmp_path, monkeypatch):
+    vault = tmp_path / "vault"
+    vault.mkdir()
+    a = vault / "a.md"
+    b = vault / "b.md"
+    a.write_text("# A", encoding="utf-8")
+    b.write_text("# B", encoding="utf-8")
+
+    service = _make_service(monkeypatch)
+    service.ingest_directory(vault)
+
+    a.write_text("# A, edited", encoding="utf-8")
+    b.unlink()
+    service.store.written = []
+    summary = service.sync_paths([a, b, a])
+
+    assert (summary.updated, summary.deleted) == (1, 1)
+    assert service.store.written == ["a.md"]
+    assert service.store.deleted == [str(b.resolve())]
+    assert service.manifest.get(b.resolve()) is None
+
+
+def test_retry_errors_only_reingests_failed_notes(temp_vectors_dir, tmp_path, monkeypatch):
+    vault = tmp_path / "vault"
+    vault.mkdir()
+    (vault / "ok.md").write_text("# Ok", encoding="utf-8")
+    bad = vault / "bad.md"
+    bad.write_text("   ", encoding="utf-8")
+
+    service = _make_service(monkeypatch)
+    first = service.ingest_directory(vault)
+    assert len(first.errors) == 1 and "bad.md" in first.errors[0]
+    assert service.manifest.failed_paths(vault.resolve()) == [str(bad.resolve())]
+    assert service.manifest.last_run(vault.resolve()).status == "completed"
+
+    bad.write_text("# Bad, fixed", encoding="utf-8")
+    (vault / "new.md").write_text("# New", encoding="utf-8")
+    service.store.written = []
+    retry = service.ingest_directory(vault, retry_errors=True)
+
+    # new.md isn't a previous failure, so the retry leaves it alone
+    assert service.store.written == ["bad.md"]
+    assert (retry.added, retry.errors) == (1, [])
+    assert service.manifest.failed_paths() == []
+
+
+def test_unreachable_embedder_fails_the_run_instead_of_raising(temp_vectors_dir, tmp_path, monkeypatch):
+    vault = tmp_path / "vault"
+    vault.mkdir()
+    (vault / "a.md").write_text("# A", encoding="utf-8")
+
+    class _DownEmbedder:
+        def __init__(self):
+            raise RuntimeError("embedding server is not running")
+
+    service = _make_service(monkeypatch)
+    monkeypatch.setattr(context_module, "EmbeddingModel", _DownEmbedder)
+    summary = service.ingest_directory(vault)
+
+    assert summary.files_processed == 0
+    assert summary.errors == ["Ingestion aborted: embedding server is not running"]
+    assert service.manifest.last_run(vault.resolve()).status == "failed"
+
+
+def test_rerun_resumes_interrupted_run(temp_vectors_dir, tmp_path, monkeypatch):
+    vault = tmp_path / "vault"
+    vault.mkdir()
+    for name in ("a.md", "b.md", "c.md"):
+        (vault / name).write_text(f"# {name}", encoding="utf-8")
+    root = vault.resolve()
+
+    service = _make_service(monkeypatch)
+    # a forced run that crashed after its first batch committed a.md
+    run_id = service.manifest.begin_run(root, 3)
+    a = root / "a.md"
+    st = a.stat()
+    service.manifest.record_many([ManifestEntry(str(a), st.st_size, st.st_mtime, file_digest(a))], run_id=run_id)
+    assert service.manifest.last_run(root).files_done == 1
+
+    summary = service.ingest_directory(vault, force=True)
+
+    assert sorted(service.store.written) == ["b.md", "c.md"]
+    assert (summary.resumed, summary.unchanged, summary.added) == (1, 1, 2)
+    assert service.manifest.last_run(root).status == "completed"
+
+    # once a run has completed, force means force again
+    service.store.written = []
+    service.ingest_directory(vault, force=True)
+    assert sorted(service.store.written) == ["a.md", "b.md", "c.md"]
+
+
+def test_watcher_sync_and_job_ingest_never_overlap(temp_vectors_dir, tmp_path, monkeypatch):
+    import threading
+    import time
+
+    vault = tmp_path / "vault"
+    vault.mkdir()
+    for name in ("a.md", "b.md"):
+        (vault / name).write_text(f"# {name}", encoding="utf-8")
+
+    service = _make_service(monkeypatch)
+    real_run = service._run_engine
+    active, overlaps = [], []
+
+    def slow_run(*args, **kwargs):
+        active.append(1)
+        overlaps.append(len(active))
+        time.sleep(0.05)
+        try:
+            return real_run(*args, **kwargs)
+        finally:
+            active.pop()
+
+    monkeypatch.setattr(service, "_run_engine", slow_run)
+    threads = [
+        threading.Thread(target=service.ingest_directory, args=(vault,), kwargs={"force": True}),
+        threading.Thread(target=service.sync_paths, args=([vault / "a.md"],)),
+        threading.Thread(target=service.ingest_files, args=([vault / "b.md"],)),
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert overlaps and max(overlaps) == 1
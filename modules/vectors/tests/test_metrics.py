@@ -0,0 +1,98 @@
+from modules.vectors.ingest_engine import IngestionEngine
+from modules.vectors.metrics import IngestMetrics, MetricsStore, merge_stages
+from modules.vectors.settings import get_settings
+from modules.vectors.VectorService import VectorService
+
+
+class _Store:
+    def replace_documents(self, docs):
+        return 0
+
+    def existing_ids(self, ids):
+        return set()
+
+
+class _Embedder:
+    batch_size = 4
+
+    def embed(self, texts):
+        return [[1.0, 0.0] for _ in texts]
+
+
+def test_engine_reports_every_stage(temp_vectors_dir, tmp_path):
+    paths = []
+    for i in range(6):
+        p = tmp_path / f"note_{i}.md"
+        p.write_text(f"# Note {i}\n\nSome words for note {i}.\n", encoding="utf-8")
+        paths.append(p)
+
+    engine = IngestionEngine(_Store(), embedder=_Embedder(), workers=0)
+    results = engine.run(paths)
+    stages = engine.metrics.to_dict()
+
+    chunks = sum(r.chunk_count for r in results)
+    assert stages["read"]["items"] == 6
+    assert stages["read"]["bytes"] == sum(p.stat().st_size for p in paths)
+    assert stages["parse"]["items"] == 6
+    assert stages["chunk"]["items"] == chunks
+    assert stages["embed"]["items"] == chunks
+    assert stages["embed"]["tokens"] == stages["chunk"]["tokens"] > 0
+    assert stages["upsert"]["items"] == chunks
+    assert all(s["seconds"] >= 0 for s in stages.values())
+
+
+def test_merge_stages_adds_counters():
+    a = IngestMetrics()
+    a.add("embed", 1.0, items=2, tokens=10)
+    b = IngestMetrics()
+    b.add("embed", 0.5, items=1, tokens=5)
+    b.add("upsert", 0.25, items=3)
+
+    merged = merge_stages(a.to_dict(), b.to_dict())
+    assert merged["embed"] == {"seconds": 1.5, "items": 3, "bytes": 0, "tokens": 15}
+    assert merged["upsert"]["items"] == 3
+
+
+def test_metrics_store_histograms(temp_vectors_dir, tmp_path):
+    store = MetricsStore(tmp_path / "metrics.sqlite")
+    for secs in (0.005, 0.02, 2.0):
+        store.record("directory", 10, {"embed": {"seconds": secs, "items": 100, "bytes": 0, "tokens": 1000}})
+    store.record("file", 1, {"total": {"seconds": 0.1, "items": 1, "bytes": 50, "tokens": 0}})
+
+    hist = store.histograms()
+    assert list(hist) == ["embed", "total"]
+    embed = hist["embed"]
+    assert embed["runs"] == 3
+    assert embed["totals"]["items"] == 300
+    assert embed["seconds"]["max"] == 2.0
+    assert sum(b["count"] for b in embed["seconds"]["buckets"]) == 3
+    assert embed["items_per_s"]["p50"] == 100 / 0.02
+
+    assert list(store.histograms(entry_point="file")) == ["total"]
+    store.close()
+
+
+def test_service_persists_run_metrics(monkeypatch, temp_vectors_dir, tmp_path):
+    monkeypatch.setenv("REFLECTION_EMBEDDING_BACKEND", "local")
+    monkeypatch.setenv("REFLECTION_LOCAL_EMBEDDING_DIM", "32")
+    monkeypatch.setenv("REFLECTION_INGEST_WORKERS", "0")
+    monkeypatch.setenv("REFLECTION_METRICS_ENABLED", "true")
+    get_settings.cache_clear()
+
+    vault = tmp_path / "vault"
+    vault.mkdir()
+    for i in range(3):
+        (vault / f"n{i}.md").write_text(f"# N{i}\n\nbody {i}\n", encoding="utf-8")
+
+    service = VectorService()
+    summary = service.ingest_directory(vault)
+    assert summary.files_processed == 3
+    assert {"scan", "read", "parse", "chunk", "embed", "upsert", "total"} <= set(summary.stages)
+    assert summary.stages["scan"]["items"] == 3
+    assert summary.stages["total"]["items"] == 3
+
+    hist = service.ingest_metrics()
+    assert hist["total"]["runs"] == 1
+    assert hist["read"]["totals"]["items"] == 3
+    service.manifest.close()
+    service.metrics.close()
@@ -0,0 +1,116 @@
+from pathlib import Path
+
+from modules.vectors.components.chunker import chunk_elements, iter_chunks
+from modules.vectors.components.parser import MarkdownNoteParser, iter_markdown_sections
+from modules.vectors.ingest_engine import IngestionEngine
+from modules.vectors.note_stream import stream_note
+
+
+class _Store:
+    """Just enough of ChromaVectorStore for the streaming path."""
+
+    def __init__(self):
+        self.chunks = {}  # id -> document_path
+        self.batches = []
+
+    def document_chunk_ids(self, path):
+        return [cid for cid, doc in self.chunks.items() if doc == str(path)]
+
+    def existing_ids(self, ids):
+        return {cid for cid in ids if cid in self.chunks}
+
+    def write_chunks(self, chunks, ingested_at):
+        self.batches.append(len(chunks))
+        for c in chunks:
+            assert "embeddings" in c or c.get("reused")
+            self.chunks[c["chunk_id"]] = str(c["document_path"])
+        return {c["chunk_id"] for c in chunks}
+
+    def set_document_links(self, path, links):
+        self.links = (str(path), set(links))
+
+    def delete_ids(self, ids):
+        for cid in ids:
+            self.chunks.pop(cid, None)
+
+    def replace_documents(self, docs):
+        raise AssertionError("streamed notes must not go through replace_documents")
+
+
+class _Embedder:
+    batch_size = 8
+
+    def __init__(self):
+        self.embedded = 0
+
+    def embed(self, texts):
+        self.embedded += len(texts)
+        return [[1.0, 0.0] for _ in texts]
+
+
+def _big_note(path: Path, sections: int) -> Path:
+    parts = []
+    for i in range(sections):
+        parts.append(f"# Section {i}\n\n" + " ".join(f"word{i}_{j}" for j in range(300)) + f" [[Note {i % 3}]]\n")
+        parts.append("```python\n# not a heading\nx = 1\n```\n")
+    path.write_text("\n".join(parts), encoding="utf-8")
+    return path
+
+
+def test_sections_split_at_headings_outside_fences():
+    lines = ["intro\n", "# A\n", "```\n", "# inside code\n", "```\n", "#tag is not a heading\n", "## B\n", "text\n"]
+    sections = list(iter_markdown_sections(lines))
+    assert sections == ["intro\n", "# A\n```\n# inside code\n```\n#tag is not a heading\n", "## B\ntext\n"]
+
+
+def test_streamed_chunks_match_whole_note_chunks(tmp_path):
+    note = _big_note(tmp_path / "big.md", 40)
+    text = note.read_text(encoding="utf-8")
+    parser = MarkdownNoteParser()
+
+    whole = chunk_elements(parser.parse_markdown_text(text), doc_name="big.md", doc_path=str(note))
+    with open(note, encoding="utf-8") as f:
+        streamed = list(iter_chunks(parser.iter_markdown_elements(f), doc_name="big.md", doc_path=str(note)))
+
+    assert [c["chunk_id"] for c in streamed] == [c["chunk_id"] for c in whole]
+
+
+def test_stream_note_writes_bounded_batches_and_drops_stale_chunks(tmp_path):
+    note = _big_note(tmp_path / "big.md", 40)
+    store, embedder = _Store(), _Embedder()
+    store.chunks["old-chunk"] = str(note)
+
+    first = stream_note(note, parser=MarkdownNoteParser(), embedder=embedder, store=store, batch_size=7)
+
+    assert first.chunk_count > 7
+    assert max(store.batches) <= 7
+    assert "old-chunk" not in store.chunks and first.stale_removed == 1
+    assert len(store.document_chunk_ids(note)) == first.chunk_count
+    assert first.size == note.stat().st_size and first.content_hash
+    assert store.links == (str(note), {"Note 0", "Note 1", "Note 2"})
+
+    # unchanged note: every chunk is reused, nothing re-embedded
+    embedded = embedder.embedded
+    again = stream_note(note, parser=MarkdownNoteParser(), embedder=embedder, store=store, batch_size=7)
+    assert again.reused == again.chunk_count
+    assert embedder.embedded == embedded
+
+
+def test_engine_streams_notes_over_threshold(temp_vectors_dir, tmp_path):
+    big = _big_note(tmp_path / "big.md", 10)
+    small = tmp_path / "small.md"
+    small.write_text("# Small\n\nshort note\n", encoding="utf-8")
+
+    store = _Store()
+    store.replace_documents = lambda docs: store.batches.append(sum(len(c) for c in docs.values()))
+    committed = []
+    engine = IngestionEngine(
+        store, embedder=_Embedder(), workers=0, upsert_batch_size=4,
+        stream_threshold=small.stat().st_size, on_committed=committed.extend,
+    )
+    results = engine.run([big, small])
+
+    assert all(r.error is None for r in results)
+    assert results[0].chunk_count == len(store.document_chunk_ids(big)) > 4
+    assert {r.path for r in committed} == {big, small}
+    assert engine.metrics.to_dict()["read"]["items"] == 2
@@ -0,0 +1,129 @@
+import modules.vectors.VectorService as vs_module
+from modules.vectors.components.cache.query_cache import QueryResultCache, QueryVectorCache, normalize_query
+from modules.vectors.tests.test_manifest import _FakeStore, _make_service
+
+
+class _QueryStore(_FakeStore):
+    def __init__(self):
+        super().__init__()
+        self.queries = []
+        self.version = 0
+
+    def query(self, query_texts, n_results=5, where=None, embedder=None, query_embeddings=None):
+        self.queries.append(query_embeddings)
+        return {
+            "ids": [[f"id-{t}"] for t in query_texts],
+            "documents": [[f"text for {t}"] for t in query_texts],
+            "metadatas": [[{"document_name": "a.md"}] for _ in query_texts],
+            "distances": [[0.1] for _ in query_texts],
+        }
+
+
+class _CountingEmbedder:
+    instances = 0
+
+    def __init__(self, batch_size=None):
+        type(self).instances += 1
+        self.model_name = "fake-model"
+        self.calls = []
+
+        self.requests = 0
+
+    def embed_queries(self, texts):
+        self.requests += 1
+        self.calls.extend(texts)
+        return [[float(len(t)), 1.0] for t in texts]
+
+
+def test_lru_evicts_least_recently_used_and_counts_hits():
+    cache = QueryVectorCache(max_entries=2)
+    cache.put("m", "a", [1.0])
+    cache.put("m", "b", [2.0])
+    assert cache.get("m", "  a ") == [1.0]  # refreshes "a"
+    cache.put("m", "c", [3.0])               # evicts "b"
+
+    assert cache.get("m", "b") is None
+    assert cache.get("other-model", "a") is None
+    stats = cache.stats()
+    assert (stats["entries"], stats["hits"], stats["misses"], stats["evictions"]) == (2, 1, 2, 1)
+    assert stats["hit_rate"] == 1 / 3
+
+    disabled = QueryVectorCache(max_entries=0)
+    disabled.put("m", "a", [1.0])
+    assert disabled.get("m", "a") is None and len(disabled) == 0
+
+
+def test_normalize_query_collapses_whitespace_but_keeps_case():
+    assert normalize_query("  what\tis\n\nRust? ") == "what is Rust?"
+    assert normalize_query("Rust") != normalize_query("rust")
+
+
+def test_service_reuses_one_embedder_and_skips_repeat_queries(temp_vectors_dir, monkeypatch):
+    monkeypatch.setattr(vs_module, "EmbeddingModel", _CountingEmbedder)
+    _CountingEmbedder.instances = 0
+    service = _make_service(monkeypatch)
+    store = _QueryStore()
+    service.store = store
+
+    first = service.query("what did I write about  sleep?")
+    second = service.query(" what did I write about sleep? ")
+    service.query("something else")
+
+    assert _CountingEmbedder.instances == 1
+    assert service.query_embedder.calls == ["what did I write about sleep?", "something else"]
+    assert first.results[0].document == second.results[0].document == "a.md"
+    stats = service.query_cache_stats()["vectors"]
+    assert (stats["hits"], stats["misses"]) == (1, 2)
+    service.manifest.close()
+
+
+def test_result_cache_is_dropped_when_the_version_moves():
+    cache = QueryResultCache(max_entries=8)
+    cache.put(1, "q", 5, {"b": 1, "a": 2}, "result")
+    assert cache.get(1, "q", 5, {"a": 2, "b": 1}) == "result"
+    assert cache.get(1, "q", 3) is None
+    assert cache.get(2, "q", 5, {"a": 2, "b": 1}) is None
+    assert len(cache) == 0 and cache.stats()["invalidations"] == 1
+
+    # a result computed before a write that another lookup already saw is never stored
+    cache.put(1, "q", 5, None, "stale")
+    assert cache.get(2, "q", 5) is None
+
+
+def test_service_serves_repeat_queries_until_the_store_changes(temp_vectors_dir, monkeypatch):
+    monkeypatch.setattr(vs_module, "EmbeddingModel", _CountingEmbedder)
+    service = _make_service(monkeypatch)
+    store = _QueryStore()
+    service.store = store
+
+    first = service.query("sleep", n_results=3)
+    assert service.query("sleep", n_results=3) is first
+    assert service.query("sleep", n_results=4) is not first
+    assert len(store.queries) == 2
+
+    store.version += 1  # what every upsert/delete through ChromaVectorStore does
+    assert service.query("sleep", n_results=3) is not first
+    assert len(store.queries) == 3
+    results = service.query_cache_stats()["results"]
+    assert (results["hits"], results["invalidations"]) == (1, 1)
+    service.manifest.close()
+
+
+def test_query_many_embeds_and_searches_once(temp_vectors_dir, monkeypatch):
+    monkeypatch.setattr(vs_module, "EmbeddingModel", _CountingEmbedder)
+    service = _make_service(monkeypatch)
+    store = _QueryStore()
+    service.store = store
+
+    service.query("cached already", n_results=2)
+    texts = ["alpha", "beta", "cached already", "alpha", "beta "]
+    results = service.query_many(texts, n_results=2)
+
+    assert [r.query for r in results] == texts
+    assert results[0] is results[3]
+    assert results[1].results[0].text == "text for beta"
+    # "beta " is its own result key, but shares beta's vector
+    assert service.query_embedder.calls == ["cached already", "alpha", "beta"]
+    assert service.query_embedder.requests == 2
+    assert len(store.queries) == 2 and len(store.queries[1]) == 3
+    service.manifest.close()
@@ -0,0 +1,107 @@
+from modules.vectors.index.chroma_store import ChromaVectorStore
+
+
+def _chunks(doc_path, n):
+    return [
+        {
+            "chunk_id": f"{doc_path}-{i}",
+            "text": f"chunk {i} of {doc_path}",
+            "embeddings": [1.0, float(i + 1), 0.5],
+            "document_name": "note.md",
+            "document_path": str(doc_path),
+            "metadata": {"chunk_index": i},
+        }
+        for i in range(n)
+    ]
+
+
+def test_replace_document_drops_tail_chunks(temp_vectors_dir, tmp_path):
+    note = tmp_path / "note.md"
+    note.write_text("# note", encoding="utf-8")
+    store = ChromaVectorStore(collection_name="test_replace")
+
+    store.replace_document(note, _chunks(note, 12))
+    assert len(store.document_chunk_ids(note)) == 12
+
+    removed = store.replace_document(note, _chunks(note, 4))
+    assert removed == 8
+    assert sorted(store.document_chunk_ids(note)) == sorted(c["chunk_id"] for c in _chunks(note, 4))
+
+
+def test_vacuum_removes_orphans(temp_vectors_dir, tmp_path):
+    kept = tmp_path / "kept.md"
+    kept.write_text("# kept", encoding="utf-8")
+    gone = tmp_path / "gone.md"
+    store = ChromaVectorStore(collection_name="test_vacuum")
+
+    # legacy upsert leaves 12 chunks, then a replace only rewrites 4 of them
+    store.upsert_chunks(_chunks(kept, 12))
+    store.collection.upsert(**dict(zip(
+        ("ids", "documents", "embeddings", "metadatas"),
+        store._build_records(_chunks(kept, 4), ingested_at=1.0),
+    )))
+    store.upsert_chunks(_chunks(gone, 3))
+
+    assert store.vacuum() == 8 + 3
+    assert len(store.document_chunk_ids(kept)) == 4
+    assert store.document_chunk_ids(gone) == []
+    assert store.vacuum() == 0
+
+
+class _CountingEmbedder:
+    def __init__(self):
+        self.embedded = []
+
+    def embed(self, texts):
+        self.embedded.extend(texts)
+        return [[float(len(t)), 1.0, 0.5] for t in texts]
+
+
+def test_reingest_only_embeds_changed_chunks(temp_vectors_dir, tmp_path, monkeypatch):
+    import modules.vectors.ingest_context as context_module
+    from modules.vectors.VectorService import VectorService
+
+    embedder = _CountingEmbedder()
+    monkeypatch.setattr(context_module, "EmbeddingModel", lambda: embedder)
+
+    sections = [f"## Section {i}\n\n" + " ".join(f"word{i}_{j}" for j in range(500)) for i in range(6)]
+    note = tmp_path / "long.md"
+    note.write_text("# Long\n\n" + "\n\n".join(sections), encoding="utf-8")
+
+    service = VectorService()
+    first = service.ingest_files([note])
+    assert first.embeddings_reused == 0
+    before = set(service.store.document_chunk_ids(note))
+    assert len(before) >= 4
+
+    # a new paragraph near the top shifts every later chunk's position, but not its id
+    sections[0] += "\n\nA freshly inserted paragraph."
+    note.write_text("# Long\n\n" + "\n\n".join(sections), encoding="utf-8")
+    embedder.embedded = []
+    second = service.ingest_files([note])
+
+    after = set(service.store.document_chunk_ids(note))
+    assert second.embeddings_reused == len(after & before) > 0
+    assert len(embedder.embedded) == len(after - before) == second.total_chunks - second.embeddings_reused
+    # chunks that no longer exist are gone, and reused ones survive a vacuum
+    assert service.vacuum() == 0
+    assert set(service.store.document_chunk_ids(note)) == after
+
+
+def test_every_write_and_delete_bumps_the_version(temp_vectors_dir, tmp_path):
+    note = tmp_path / "note.md"
+    store = ChromaVectorStore(collection_name="test_version")
+    versions = [store.version]
+
+    store.replace_document(note, _chunks(note, 3))
+    versions.append(store.version)
+    store.delete_ids([])  # nothing deleted, nothing changed
+    versions.append(store.version)
+    store.delete_document(note)
+    versions.append(store.version)
+
+    assert versions[1] > versions[0]
+    assert versions[2] == versions[1]
+    assert versions[3] > versions[2]
+    store.query(["x"], n_results=1, query_embeddings=[[1.0, 1.0, 0.5]])
+    assert store.version == versions[3]
@@ -0,0 +1,57 @@
+import sys
+import threading
+import time
+
+import pytest
+
+from modules.vectors.watcher import VaultWatcher
+
+
+class _RecordingService:
+    def __init__(self):
+        self.calls = []
+        self.synced = threading.Event()
+
+    def sync_paths(self, paths):
+        self.calls.append(sorted(p.name for p in paths))
+        self.synced.set()
+        return None
+
+
+def _wait_for(event: threading.Event, timeout: float = 5.0) -> bool:
+    return event.wait(timeout)
+
+
+@pytest.mark.parametrize("use_inotify", [
+    pytest.param(True, marks=pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux-only")),
+    False,
+])
+def test_watcher_coalesces_saves_and_ignores_obsidian(temp_vectors_dir, tmp_path, use_inotify):
+    vault = tmp_path / "vault"
+    (vault / ".obsidian").mkdir(parents=True)
+    note = vault / "note.md"
+    note.write_text("# v0", encoding="utf-8")
+
+    service = _RecordingService()
+    watcher = VaultWatcher(
+        service,
+        vault_path=vault,
+        debounce_s=0.3,
+        poll_interval_s=0.05,
+        use_inotify=use_inotify,
+    )
+    watcher.start()
+    try:
+        assert watcher.backend_name == ("inotify" if use_inotify else "polling")
+        for i in range(5):
+            note.write_text(f"# v{i + 1}" + "!" * i, encoding="utf-8")
+            (vault / ".obsidian" / "workspace.md").write_text(str(i), encoding="utf-8")
+            time.sleep(0.06)
+
+        assert _wait_for(service.synced)
+        time.sleep(0.5)
+    finally:
+        watcher.stop()
+
+    # five saves inside the idle window -> one re-ingest, and nothing from .obsidian/
+    assert service.calls == [["note.md"]]
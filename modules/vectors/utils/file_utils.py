@@ -1,12 +1,233 @@
 # utils/file_utils.py
 
 import os
+import re
+import stat
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from itertools import islice
 from pathlib import Path
 from datetime import datetime
+from typing import Deque, Iterable, Iterator, List, Optional, Pattern, Tuple, TypeVar
 
-def scan_vault(directory: str, extensions=(".md", ".txt")) -> list[Path]:
-    """Recursively scans a directory and returns all note files."""
-    return [p for p in Path(directory).rglob("*") if p.suffix in extensions]
+from modules.vectors.settings import get_settings
+
+T = TypeVar("T")
+
+@dataclass(frozen=True)
+class ScannedNote:
+    """A note found by `scan_notes`, with the size/mtime its directory entry reported."""
+    path: Path
+    size: int
+    mtime: float
+
+def _translate_glob(pattern: str) -> str:
+    """gitignore glob -> regex body: `*`/`?` stop at '/', `**` crosses directories."""
+    out: List[str] = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == "*":
+            if pattern.startswith("**", i):
+                i += 2
+                if pattern.startswith("/", i):
+                    out.append("(?:.*/)?")
+                    i += 1
+                else:
+                    out.append(".*")
+                continue
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[" and "]" in pattern[i + 2:]:
+            end = pattern.index("]", i + 2)
+            body = pattern[i + 1:end]
+            if body.startswith("!"):
+                body = "^" + body[1:]
+            out.append("[" + body.replace("\\", "\\\\") + "]")
+            i = end
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+class IgnoreRules:
+    """gitignore-style patterns, matched against paths relative to the vault root.
+
+    Supported: `#` comments, `!` negation (last matching pattern wins), a trailing `/`
+    for directories only, a leading or inner `/` to anchor at the root, and `*`, `?`,
+    `[...]` and `**` globs. A bare name like `.obsidian` matches at any depth. As in
+    git, nothing under an ignored directory can be re-included — the walk never enters it.
+    """
+
+    def __init__(self, patterns: Iterable[str] = ()):
+        # (regex, negated, directories only)
+        self._rules: List[Tuple[Pattern[str], bool, bool]] = []
+        for raw in patterns:
+            self.add(raw)
+
+    @classmethod
+    def for_root(cls, root: str | Path, patterns: Iterable[str] = (), gitignore: bool = True) -> "IgnoreRules":
+        """`patterns` plus, if asked for and present, the root's own .gitignore."""
+        rules = cls(patterns)
+        if gitignore:
+            try:
+                with open(os.path.join(root, ".gitignore"), encoding="utf-8", errors="replace") as f:
+                    for line in f:
+                        rules.add(line)
+            except OSError:
+                pass
+        return rules
+
+    def add(self, pattern: str) -> None:
+        pattern = pattern.rstrip("\n").rstrip("\r")
+        if not pattern.endswith("\\ "):
+            pattern = pattern.rstrip()
+        if not pattern or pattern.startswith("#"):
+            return
+        negated = pattern.startswith("!")
+        if negated:
+            pattern = pattern[1:]
+        dir_only = pattern.endswith("/")
+        pattern = pattern.rstrip("/")
+        if not pattern:
+            return
+        anchored = "/" in pattern
+        body = _translate_glob(pattern.lstrip("/"))
+        regex = re.compile(("" if anchored else "(?:.*/)?") + body + "$")
+        self._rules.append((regex, negated, dir_only))
+
+    def __bool__(self) -> bool:
+        return bool(self._rules)
+
+    def match(self, rel: str, is_dir: bool) -> bool:
+        """True if `rel` itself (a '/'-separated path relative to the root) is ignored."""
+        ignored = False
+        for regex, negated, dir_only in self._rules:
+            if (is_dir or not dir_only) and ignored == negated and regex.match(rel):
+                ignored = not negated
+        return ignored
+
+    def ignores(self, rel: str, is_dir: bool) -> bool:
+        """Like `match`, but also True when any parent directory of `rel` is ignored."""
+        parts = rel.strip("/").split("/")
+        for depth in range(1, len(parts)):
+            if self.match("/".join(parts[:depth]), True):
+                return True
+        return self.match("/".join(parts), is_dir)
+
+def _scan_dir(
+    path: str, rel: str, extensions: Tuple[str, ...], ignore: Optional[IgnoreRules]
+) -> Tuple[List[ScannedNote], List[Tuple[str, str]]]:
+    """One directory: its notes (stat attached) and the subdirectories worth entering."""
+    notes: List[ScannedNote] = []
+    subdirs: List[Tuple[str, str]] = []
+    try:
+        it = os.scandir(path)
+    except OSError:
+        # vanished or unreadable mid-walk; os.walk skips these too
+        return notes, subdirs
+    with it:
+        for entry in it:
+            name = entry.name
+            try:
+                # d_type / FindNextFile already know this; no stat for directories
+                if entry.is_dir(follow_symlinks=False):
+                    if not (ignore and ignore.match(rel + name, True)):
+                        subdirs.append((entry.path, rel + name + "/"))
+                    continue
+                if os.path.splitext(name)[1] not in extensions:
+                    continue
+                if ignore and ignore.match(rel + name, False):
+                    continue
+                # free on Windows (cached from the listing), one stat elsewhere
+                st = entry.stat()
+            except OSError:
+                continue
+            if stat.S_ISREG(st.st_mode):
+                notes.append(ScannedNote(Path(entry.path), st.st_size, st.st_mtime))
+    notes.sort(key=lambda n: n.path.name)
+    subdirs.sort()
+    return notes, subdirs
+
+def scan_notes(
+    root: str | Path,
+    extensions: Iterable[str] = (".md",),
+    ignore: Optional[IgnoreRules] = None,
+    workers: int = 0,
+    base: str | Path | None = None,
+) -> Iterator[ScannedNote]:
+    """Lazily yield the notes under `root` with their stat, skipping ignored paths.
+
+    Built on `os.scandir`, so directories are told apart without a stat and each note
+    is stat'ed exactly once, here — callers doing change detection should use
+    `ScannedNote.size`/`.mtime` rather than stat'ing again. With `workers > 1`
+    directories are listed on a thread pool (scandir/stat release the GIL), a bounded
+    number ahead of the consumer. Either way the order is the same: breadth-first,
+    names sorted within each directory. Symlinked directories are not followed.
+
+    `ignore` patterns are relative to `base` (default: `root`), so a subfolder of the
+    vault can be walked with the vault's rules.
+    """
+    extensions = tuple(extensions)
+    ignore = ignore or None
+    rel = ""
+    if base is not None:
+        rel = Path(os.path.relpath(root, base)).as_posix()
+        rel = "" if rel == "." else rel + "/"
+        if ignore and rel and ignore.ignores(rel, True):
+            return
+    waiting: Deque[Tuple[str, str]] = deque([(os.fspath(root), rel)])
+
+    if workers <= 1:
+        while waiting:
+            notes, subdirs = _scan_dir(*waiting.popleft(), extensions, ignore)
+            waiting.extend(subdirs)
+            yield from notes
+        return
+
+    ahead = workers * 4
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="vault-scan") as pool:
+        inflight: Deque = deque()
+        try:
+            while waiting or inflight:
+                while waiting and len(inflight) < ahead:
+                    inflight.append(pool.submit(_scan_dir, *waiting.popleft(), extensions, ignore))
+                notes, subdirs = inflight.popleft().result()
+                waiting.extend(subdirs)
+                yield from notes
+        finally:
+            # the consumer may stop early; don't list directories nobody will read
+            for fut in inflight:
+                fut.cancel()
+
+def scan_vault(
+    directory: str | Path,
+    extensions=(".md", ".txt"),
+    ignore: Iterable[str] | None = None,
+    workers: int | None = None,
+) -> list[Path]:
+    """Recursively scans a directory and returns all note files.
+
+    `ignore` (gitignore-style patterns) and `workers` default to the REFLECTION_SCAN_*
+    settings; the directory's own .gitignore is honoured unless that's switched off.
+    """
+    config = get_settings()
+    rules = IgnoreRules.for_root(
+        directory, config.scan_ignore if ignore is None else ignore, config.scan_gitignore
+    )
+    workers = config.scan_workers if workers is None else workers
+    return [n.path for n in scan_notes(directory, extensions, rules, workers)]
+
+def batched(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Consecutive lists of `size` items (the last one may be shorter)."""
+    it = iter(items)
+    while batch := list(islice(it, size)):
+        yield batch
 
 def read_file(path: Path) -> str:
     """Reads the file content."""
@@ -0,0 +1,343 @@
+# vectors/watcher.py — debounced vault watcher feeding incremental re-ingestion
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import queue
+import select
+import struct
+import sys
+import threading
+import time
+import traceback
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from modules.vectors.settings import get_settings
+from modules.vectors.utils.file_utils import IgnoreRules, scan_notes
+
+_STOP = object()
+
+
+def _is_ignored(path: Path, root: Path, rules: IgnoreRules, is_dir: bool = False) -> bool:
+    try:
+        rel = path.relative_to(root).as_posix()
+    except ValueError:
+        return True
+    return bool(rules) and rules.ignores(rel, is_dir)
+
+
+# ----------------------------------------------------------------------
+# Backends: report raw "something happened at <path>" events
+# ----------------------------------------------------------------------
+
+class _InotifyBackend:
+    """Linux inotify via ctypes. Blocks in select() while the vault is idle, so it costs no CPU."""
+
+    _IN_CLOSE_WRITE = 0x00000008
+    _IN_MOVED_FROM = 0x00000040
+    _IN_MOVED_TO = 0x00000080
+    _IN_CREATE = 0x00000100
+    _IN_DELETE = 0x00000200
+    _IN_DELETE_SELF = 0x00000400
+    _IN_Q_OVERFLOW = 0x00004000
+    _IN_IGNORED = 0x00008000
+    _IN_ONLYDIR = 0x01000000
+    _IN_ISDIR = 0x40000000
+    _IN_NONBLOCK = 0o4000
+    _IN_CLOEXEC = 0o2000000
+
+    _MASK = _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE | _IN_DELETE_SELF
+    _EVENT = struct.Struct("iIII")
+
+    def __init__(self, root: Path, rules: IgnoreRules, emit: Callable[[Path], None]):
+        libc_name = ctypes.util.find_library("c")
+        if not libc_name:
+            raise OSError("libc not found")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(self._IN_NONBLOCK | self._IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        self.root = root
+        self.rules = rules
+        self.emit = emit
+        self._wd_to_dir: Dict[int, Path] = {}
+        self._wake_r, self._wake_w = os.pipe()
+        self._add_tree(root)
+
+    def _add_watch(self, directory: Path) -> None:
+        wd = self._libc.inotify_add_watch(
+            self._fd, os.fsencode(str(directory)), self._MASK | self._IN_ONLYDIR
+        )
+        if wd >= 0:
+            self._wd_to_dir[wd] = directory
+        elif ctypes.get_errno() == errno.ENOSPC:
+            raise OSError(errno.ENOSPC, "inotify watch limit reached (fs.inotify.max_user_watches)")
+
+    def _add_tree(self, top: Path) -> None:
+        for dirpath, dirnames, _ in os.walk(top):
+            # prune ignored folders so we never even watch .obsidian/.trash/.git
+            dirnames[:] = [d for d in dirnames if not _is_ignored(Path(dirpath, d), self.root, self.rules, True)]
+            self._add_watch(Path(dirpath))
+
+    def run(self, stop: threading.Event) -> None:
+        while not stop.is_set():
+            ready, _, _ = select.select([self._fd, self._wake_r], [], [])
+            if self._wake_r in ready or stop.is_set():
+                return
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                continue
+            self._dispatch(data)
+
+    def _dispatch(self, data: bytes) -> None:
+        offset = 0
+        while offset + self._EVENT.size <= len(data):
+            wd, mask, _cookie, name_len = self._EVENT.unpack_from(data, offset)
+            offset += self._EVENT.size
+            name = data[offset:offset + name_len].rstrip(b"\0")
+            offset += name_len
+
+            if mask & self._IN_Q_OVERFLOW:
+                # events were dropped; let a full incremental sync of the vault sort it out
+                self.emit(self.root)
+                continue
+            if mask & self._IN_IGNORED:
+                self._wd_to_dir.pop(wd, None)
+                continue
+
+            directory = self._wd_to_dir.get(wd)
+            if directory is None:
+                continue
+            path = directory / os.fsdecode(name) if name else directory
+
+            if mask & self._IN_ISDIR:
+                if _is_ignored(path, self.root, self.rules, True):
+                    continue
+                if mask & (self._IN_CREATE | self._IN_MOVED_TO):
+                    self._add_tree(path)
+                self.emit(path)
+            elif mask & self._IN_DELETE_SELF:
+                self.emit(path)
+            elif not (mask & self._IN_CREATE):
+                # IN_CREATE on a file is always followed by IN_CLOSE_WRITE
+                self.emit(path)
+
+    def close(self) -> None:
+        try:
+            os.write(self._wake_w, b"x")
+        except OSError:
+            pass
+
+    def release(self) -> None:
+        for fd in (self._fd, self._wake_r, self._wake_w):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
+class _PollingBackend:
+    """Portable fallback: diff a (mtime, size) snapshot of the vault every `interval` seconds."""
+
+    def __init__(self, root: Path, rules: IgnoreRules, emit: Callable[[Path], None], interval: float):
+        self.root = root
+        self.rules = rules
+        self.emit = emit
+        self.interval = interval
+        self._wake = threading.Event()
+        self._snapshot = self._scan()
+
+    def _scan(self) -> Dict[str, Tuple[float, int]]:
+        # the scanner already stat'ed every note; single-threaded keeps the poll light
+        return {str(n.path): (n.mtime, n.size) for n in scan_notes(self.root, ignore=self.rules)}
+
+    def run(self, stop: threading.Event) -> None:
+        while not stop.is_set():
+            self._wake.wait(self.interval)
+            if stop.is_set():
+                return
+            current = self._scan()
+            for path, sig in current.items():
+                if self._snapshot.get(path) != sig:
+                    self.emit(Path(path))
+            for path in self._snapshot.keys() - current.keys():
+                self.emit(Path(path))
+            self._snapshot = current
+
+    def close(self) -> None:
+        self._wake.set()
+
+    def release(self) -> None:
+        pass
+
+
+# ----------------------------------------------------------------------
+# Watcher
+# ----------------------------------------------------------------------
+
+class VaultWatcher:
+    """Watch a vault and re-ingest notes once they've been idle for `debounce_s`.
+
+    Three threads:
+      backend   — inotify (Linux) or polling; records every event per path
+      debounce  — a path is released once no new event arrived for `debounce_s`,
+                  so a burst of saves to one note becomes a single re-ingest
+      worker    — drains the bounded work queue and hands the affected paths to
+                  `VectorService.sync_paths`, which only touches changed notes
+    """
+
+    def __init__(
+        self,
+        service,
+        vault_path: str | Path | None = None,
+        debounce_s: float | None = None,
+        poll_interval_s: float | None = None,
+        queue_size: int | None = None,
+        ignore: Iterable[str] | None = None,
+        use_inotify: bool | None = None,
+        on_synced: Optional[Callable[[object], None]] = None,
+    ):
+        config = get_settings()
+        root = vault_path or config.vault_path
+        if root is None:
+            raise ValueError("No vault path configured (set REFLECTION_VAULT_PATH).")
+        self.root = Path(root).expanduser().resolve()
+        if not self.root.is_dir():
+            raise ValueError(f"Vault path is not a directory: {self.root}")
+
+        self.service = service
+        self.debounce_s = config.watch_debounce_s if debounce_s is None else debounce_s
+        self.poll_interval_s = config.watch_poll_interval_s if poll_interval_s is None else poll_interval_s
+        self.ignore = tuple(config.watch_ignore if ignore is None else ignore)
+        # the same rules a directory ingest applies (scan_ignore + .gitignore), plus `ignore`
+        self.rules = IgnoreRules.for_root(self.root, self.ignore + config.scan_ignore, config.scan_gitignore)
+        self.use_inotify = sys.platform.startswith("linux") if use_inotify is None else use_inotify
+        self.on_synced = on_synced
+
+        self._work_q: queue.Queue = queue.Queue(maxsize=config.watch_queue_size if queue_size is None else queue_size)
+        self._pending: Dict[Path, float] = {}
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._backend = None
+        self.backend_name: Optional[str] = None
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._stop.clear()
+        self._backend = self._make_backend()
+        self._threads = [
+            threading.Thread(target=self._backend.run, args=(self._stop,), name="vault-watch", daemon=True),
+            threading.Thread(target=self._debounce_loop, name="vault-debounce", daemon=True),
+            threading.Thread(target=self._work_loop, name="vault-ingest", daemon=True),
+        ]
+        for t in self._threads:
+            t.start()
+
+    def _make_backend(self):
+        if self.use_inotify:
+            try:
+                backend = _InotifyBackend(self.root, self.rules, self._on_event)
+                self.backend_name = "inotify"
+                return backend
+            except (OSError, AttributeError) as e:
+                print(f"[watcher] inotify unavailable ({e}); falling back to polling")
+        self.backend_name = "polling"
+        return _PollingBackend(self.root, self.rules, self._on_event, self.poll_interval_s)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        if not self._threads:
+            return
+        self._stop.set()
+        self._backend.close()
+        with self._cond:
+            self._cond.notify_all()
+        try:
+            self._work_q.put_nowait(_STOP)
+        except queue.Full:
+            pass
+        for t in self._threads:
+            t.join(timeout)
+        self._backend.release()
+        self._threads = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._threads) and not self._stop.is_set()
+
+    def pending_count(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    # ------------------------------------------------------------------
+    # Event flow
+    # ------------------------------------------------------------------
+
+    def _on_event(self, path: Path) -> None:
+        if path != self.root and _is_ignored(path, self.root, self.rules, path.is_dir()):
+            return
+        # only notes and folders matter; attachments etc. are skipped
+        if path.suffix != ".md" and not path.is_dir() and path.suffix:
+            return
+        with self._cond:
+            self._pending[path] = time.monotonic()
+            self._cond.notify()
+
+    def _debounce_loop(self) -> None:
+        while not self._stop.is_set():
+            with self._cond:
+                if not self._pending:
+                    self._cond.wait()
+                    continue
+                now = time.monotonic()
+                ready = [p for p, t in self._pending.items() if now - t >= self.debounce_s]
+                if not ready:
+                    next_due = min(self._pending.values()) + self.debounce_s
+                    self._cond.wait(max(0.0, next_due - now))
+                    continue
+                for p in ready:
+                    del self._pending[p]
+
+            for p in ready:
+                # bounded queue: if the worker is behind, wait here instead of growing without limit
+                while not self._stop.is_set():
+                    try:
+                        self._work_q.put(p, timeout=0.5)
+                        break
+                    except queue.Full:
+                        continue
+
+    def _work_loop(self) -> None:
+        while True:
+            item = self._work_q.get()
+            if item is _STOP or self._stop.is_set():
+                return
+            batch = [item]
+            # pick up anything else that's ready so one engine run covers it
+            while True:
+                try:
+                    nxt = self._work_q.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is _STOP:
+                    self._stop.set()
+                    break
+                batch.append(nxt)
+            try:
+                summary = self.service.sync_paths(batch)
+                if self.on_synced is not None:
+                    self.on_synced(summary)
+            except Exception:
+                traceback.print_exc()
+            if self._stop.is_set():
+                return
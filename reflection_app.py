@@ -1,3 +1,12 @@
+import os
+
+if os.getenv("REFLECTION_PROFILE_STARTUP", "").strip().lower() in ("1", "true", "yes", "on"):
+    # has to come before every other import so they all get timed
+    from modules.user_interface.host import startup_profile
+    startup_profile.start()
+
+import threading
+
 from modules.user_interface.host.app import main as run_desktop
 from modules.integrations.discord_presence import DiscordRichPresence
 
@@ -6,12 +15,20 @@ import logging
 logging.getLogger("pywebview").setLevel(logging.DEBUG)
 
 
+def _start_rpc(rpc: DiscordRichPresence) -> None:
+    try:
+        rpc.start()
+    except Exception as e:
+        print(f"[Discord RPC] disabled: {e}")
+
+
 if __name__ == "__main__":
     rpc = None
     try:
         try:
             rpc = DiscordRichPresence()
-            rpc.start()
+            # connecting to Discord can take a while; don't hold up the window for it
+            threading.Thread(target=_start_rpc, args=(rpc,), name="discord-rpc", daemon=True).start()
         except Exception as e:
             print(f"[Discord RPC] disabled: {e}")
             
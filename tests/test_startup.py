@@ -0,0 +1,37 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from modules.user_interface.host.startup_profile import ImportProfiler
+
+_ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_backend_modules_import_without_heavy_dependencies():
+    # what the desktop host imports before the window can show
+    code = (
+        "import sys\n"
+        "import modules.orchestration.inference, modules.vectors.jobs, modules.vectors.watcher\n"
+        "print(','.join(m for m in ('chromadb', 'tiktoken', 'mistune', 'lmstudio', 'pandas') if m in sys.modules))\n"
+    )
+    out = subprocess.run([sys.executable, "-c", code], cwd=_ROOT, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == ""
+
+
+def test_import_profiler_times_new_modules_only():
+    profiler = ImportProfiler()
+    sys.modules.pop("json.tool", None)
+    profiler.install()
+    try:
+        import json.tool  # noqa: F401  (loaded fresh)
+        import os  # noqa: F401  (already loaded: not recorded)
+    finally:
+        profiler.uninstall()
+    profiler.mark("done")
+
+    assert "json.tool" in profiler.imports
+    assert "os" not in profiler.imports
+    self_s, cumulative_s = profiler.imports["json.tool"]
+    assert 0 <= self_s <= cumulative_s
+    report = profiler.report(top=5)
+    assert "done" in report and "json.tool" in report
@@ -1,5 +1,39 @@
+import time
+
+from modules.backends.local import CannedChatModel
 from modules.orchestration.inference import ModelInterface
+from modules.orchestration.orc_settings import get_settings
+
+
+def test_canned_model_streams_tokens_with_latency():
+    model = CannedChatModel(response="one two three four", token_latency_s=0.01, reasoning="hmm ok")
+    fragments = []
+
+    started = time.perf_counter()
+    result = model.respond("Hello!", on_prediction_fragment=fragments.append)
+    elapsed = time.perf_counter() - started
+
+    assert result.content == "one two three four"
+    assert result.reasoning == "hmm ok"
+    kinds = [f.reasoning_type for f in fragments]
+    assert kinds[0] == "reasoningStartTag" and "reasoningEndTag" in kinds
+    assert "".join(f.content for f in fragments if f.reasoning_type == "none") == result.content
+    # 4 answer + 2 reasoning + 2 tag fragments, 10ms apart
+    assert result.tokens == 8
+    assert elapsed >= 8 * 0.01
+
+
+def test_model_interface_streams_from_local_backend(monkeypatch, tmp_path):
+    monkeypatch.setenv("REFLECTION_DATA_DIR", str(tmp_path))
+    monkeypatch.setenv("REFLECTION_CHAT_BACKEND", "local")
+    monkeypatch.setenv("REFLECTION_LOCAL_CHAT_TOKEN_LATENCY_S", "0")
+    monkeypatch.setenv("REFLECTION_LOCAL_CHAT_RESPONSE", "Hi there, from the stand-in.")
+    get_settings.cache_clear()
 
-model = ModelInterface()
+    streamed = []
+    model = ModelInterface(on_fragment=streamed.append, vectors=object())
+    msg = model.invoke("Hello!", thread_id="t1")
+    get_settings.cache_clear()
 
-model.invoke("Hello!")
\ No newline at end of file
+    assert msg.text == "Hi there, from the stand-in."
+    assert "".join(f["content"] for f in streamed) == msg.text